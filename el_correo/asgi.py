@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'el_correo.settings')
+# Marca el proceso como ASGI antes de cargar settings (ver DB_CONN_MAX_AGE)
+os.environ.setdefault('EL_CORREO_ASGI', '1')
 
 application = get_asgi_application()
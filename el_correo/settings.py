@@ -40,15 +40,19 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'usuarios',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',             # Seguridad general
+    'usuarios.middleware.InstrumentacionMiddleware',               # SQL/tiempos por request (Server-Timing)
     'django.contrib.sessions.middleware.SessionMiddleware',       # Manejo de sesiones
     'django.middleware.common.CommonMiddleware',                  # Funcionalidades comunes de Django
     'django.middleware.csrf.CsrfViewMiddleware',                  # Protección contra ataques CSRF
     'django.contrib.auth.middleware.AuthenticationMiddleware',     # Autenticación de usuarios
+    'usuarios.middleware.RolesMiddleware',                         # Roles del usuario (caché por request)
+    'usuarios.middleware.ReplicaMiddleware',                       # Lecturas en réplica / fijación a primaria
     'django.contrib.messages.middleware.MessageMiddleware',        # Sistema de mensajes
     'django.middleware.clickjacking.XFrameOptionsMiddleware',      # Protección contra clickjacking
 ]
@@ -79,23 +83,137 @@ WSGI_APPLICATION = 'el_correo.wsgi.application'
 # Base de datos
 # Usa MySQL con `pymysql` y variables de entorno:
 # - DB_NAME, DB_USER, DB_PASSWORD, DB_HOST (por defecto 'localhost'), DB_PORT (por defecto '3306')
+# - DB_ENGINE: 'mysql' (por defecto), 'mysql_pool' (MySQL con pool de conexiones por
+#   proceso, ver usuarios/db/pool.py) o 'sqlite' (archivo DB_NAME o db.sqlite3, para desarrollo)
+# - DB_CONN_MAX_AGE: segundos que un hilo conserva su conexión entre requests
+#   (60 por defecto; 0 abre una por request; con 'mysql_pool' por defecto 0: cada
+#   request devuelve la conexión al pool). Bajo ASGI (el_correo/asgi.py define
+#   EL_CORREO_ASGI=1) el valor por defecto es 0: el ORM async consulta desde hilos
+#   del executor y una conexión persistente quedaría abierta en cada uno
+# - DB_CONN_HEALTH_CHECKS: '1' (por defecto) verifica una conexión reutilizada antes de usarla
+# - DB_POOL_SIZE (10), DB_POOL_TIMEOUT (10 s) y DB_POOL_MAX_LIFETIME (600 s): solo 'mysql_pool'.
+#   Máximo de conexiones en uso por proceso = DB_POOL_SIZE; conviene <= hilos por worker
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.2/ref/databases/#persistent-connections
 
-import pymysql
-pymysql.install_as_MySQLdb()
-DATABASES = {
+DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    import pymysql
+    pymysql.install_as_MySQLdb()
+    DATABASES = {
+        'default': {
+            'ENGINE': 'usuarios.db.mysql_pool' if DB_ENGINE == 'mysql_pool' else 'django.db.backends.mysql',
+            'NAME': os.getenv('DB_NAME'),
+            'USER': os.getenv('DB_USER'),
+            'PASSWORD': os.getenv('DB_PASSWORD'),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '3306'),
+            # Activa modo estricto de MySQL para evitar datos inválidos
+            'OPTIONS': {'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"},
+        }
+    }
+    if DB_ENGINE == 'mysql_pool':
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'max_size': int(os.getenv('DB_POOL_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            'max_lifetime': int(os.getenv('DB_POOL_MAX_LIFETIME', '600')),
+        }
+
+EJECUTA_ASGI = os.getenv('EL_CORREO_ASGI') == '1'
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.getenv('DB_CONN_MAX_AGE', '0' if DB_ENGINE == 'mysql_pool' or EJECUTA_ASGI else '60')
+)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1'
+
+# Réplica de lectura (opcional): se activa con DB_REPLICA_HOST (MySQL) o
+# DB_REPLICA_NAME (otro archivo con DB_ENGINE=sqlite). Usa los mismos
+# ajustes que 'default' salvo DB_REPLICA_NAME/USER/PASSWORD/HOST/PORT.
+# Los listados, el dashboard y las APIs de lectura leen de ella
+# (usuarios/replicas.py); tras escribir, el usuario lee de la primaria
+# durante USUARIOS_REPLICA_PIN_SEGUNDOS.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'NAME': os.getenv('DB_REPLICA_NAME') or DATABASES['default']['NAME'],
+        # En tests la réplica es la misma base de prueba que 'default'
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DB_ENGINE != 'sqlite':
+        DATABASES['replica'].update({
+            'USER': os.getenv('DB_REPLICA_USER') or DATABASES['default']['USER'],
+            'PASSWORD': os.getenv('DB_REPLICA_PASSWORD') or DATABASES['default']['PASSWORD'],
+            'HOST': os.getenv('DB_REPLICA_HOST') or DATABASES['default']['HOST'],
+            'PORT': os.getenv('DB_REPLICA_PORT') or DATABASES['default']['PORT'],
+        })
+
+DATABASE_ROUTERS = ['usuarios.replicas.ReplicaRouter']
+# Segundos que un usuario lee de la primaria después de escribir
+USUARIOS_REPLICA_PIN_SEGUNDOS = int(os.getenv('USUARIOS_REPLICA_PIN_SEGUNDOS', '10'))
+
+# Caché
+# Por defecto en memoria del proceso. Con varios workers usar un backend
+# compartido (p. ej. CACHE_BACKEND='django.core.cache.backends.redis.RedisCache'
+# y CACHE_LOCATION='redis://127.0.0.1:6379') para que las invalidaciones
+# se vean en todos los procesos.
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': os.getenv('DB_NAME'),
-        'USER': os.getenv('DB_USER'),
-        'PASSWORD': os.getenv('DB_PASSWORD'),
-        'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', '3306'),
-        # Activa modo estricto de MySQL para evitar datos inválidos
-        'OPTIONS': {'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"},
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'el-correo'),
     }
 }
 
+# Segundos que se conservan los roles (grupos) de un usuario en caché
+USUARIOS_ROLES_CACHE_TIMEOUT = int(os.getenv('USUARIOS_ROLES_CACHE_TIMEOUT', '300'))
+# Segundos máximos que un proceso sirve catálogos (áreas, deptos, cargos) sin recargar
+USUARIOS_CATALOGOS_TTL = int(os.getenv('USUARIOS_CATALOGOS_TTL', '60'))
+# Segundos que se conservan los conteos por faceta del listado de trabajadores
+USUARIOS_FACETAS_TIMEOUT = int(os.getenv('USUARIOS_FACETAS_TIMEOUT', '300'))
+# Filas por contador materializado; más fragmentos, menos espera entre altas concurrentes
+USUARIOS_CONTADORES_FRAGMENTOS = int(os.getenv('USUARIOS_CONTADORES_FRAGMENTOS', '8'))
+
+# Instrumentación por request (usuarios.middleware.InstrumentacionMiddleware)
+USUARIOS_INSTRUMENTACION = os.getenv('USUARIOS_INSTRUMENTACION', '1') == '1'
+# Cabecera Server-Timing (db, template, view) en cada respuesta
+USUARIOS_SERVER_TIMING = os.getenv('USUARIOS_SERVER_TIMING', '1') == '1'
+# Umbral (ms) para registrar un request como lento en el logger usuarios.rendimiento
+USUARIOS_SLOW_REQUEST_MS = int(os.getenv('USUARIOS_SLOW_REQUEST_MS', '500'))
+# Repeticiones de una misma forma de SQL que se reportan como posible N+1
+USUARIOS_N_MAS_1_MIN = int(os.getenv('USUARIOS_N_MAS_1_MIN', '5'))
+# Tope de SQL distintos que se guardan por request para duplicados y formas (0: no se guardan)
+USUARIOS_SQL_DISTINTAS_MAX = int(os.getenv('USUARIOS_SQL_DISTINTAS_MAX', '1000'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'usuarios.rendimiento': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Django REST Framework: API de solo lectura en /api/ (ver usuarios/api.py)
+# https://www.django-rest-framework.org/api-guide/settings/
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,5 +1,6 @@
-"""Enrutamiento raíz del proyecto: admin y app `usuarios`."""
+"""Enrutamiento raíz del proyecto: admin, app `usuarios` y API REST."""
 from usuarios import views as usuarios_views
+from usuarios.api import router as api_router
 from django.contrib import admin
 from django.urls import path, include
 
@@ -7,4 +8,5 @@ urlpatterns = [
     path('', usuarios_views.root_redirect, name='root'),
     path('admin/', admin.site.urls),
     path('usuarios/', include('usuarios.urls')),
+    path('api/', include(api_router.urls)),
 ]
@@ -1,12 +1,41 @@
 """Registro de modelos en el admin de Django para gestión interna."""
+from django import forms
 from django.contrib import admin
+from .forms import RutValidadoMixin
 from .models import Area, Departamento, Cargo, Trabajador, ContactoEmergencia, CargaFamiliar
 
 # Register your models here.
 
+
+class DepartamentoAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'area')
+    list_filter = ('area',)
+    search_fields = ('nombre',)
+
+    def get_queryset(self, request):
+        # El changelist muestra el área de cada fila
+        return super().get_queryset(request).con_area()
+
+
+class TrabajadorAdminForm(RutValidadoMixin, forms.ModelForm):
+    class Meta:
+        model = Trabajador
+        fields = '__all__'
+
+
+class TrabajadorAdmin(admin.ModelAdmin):
+    form = TrabajadorAdminForm
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Etiquetas `nombre (área)` del select de departamento en una sola consulta
+        if db_field.name == 'departamento':
+            kwargs.setdefault('queryset', Departamento.objects.con_area())
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 admin.site.register(Area)
-admin.site.register(Departamento)
+admin.site.register(Departamento, DepartamentoAdmin)
 admin.site.register(Cargo)
-admin.site.register(Trabajador)
+admin.site.register(Trabajador, TrabajadorAdmin)
 admin.site.register(ContactoEmergencia)
 admin.site.register(CargaFamiliar)
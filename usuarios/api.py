@@ -0,0 +1,189 @@
+"""API REST de solo lectura (Django REST Framework).
+
+Expone trabajadores, catálogos y los contactos/cargas de cada trabajador
+con paginación por cursor (`?cursor=`), los mismos filtros que
+`lista_trabajadores` y *sparse fieldsets* (`?fields=id,nombres,area_nombre`)
+que se traducen a `.only()`, `select_related` y `prefetch_related`.
+"""
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+from rest_framework.utils.urls import replace_query_param
+
+from .facetas import opciones_facetas
+from .filtros import filtrar_trabajadores, leer_filtros_trabajadores, orden_trabajadores
+from .models import Area, CargaFamiliar, Cargo, ContactoEmergencia, Departamento, Trabajador
+from .paginacion import paginar_por_cursor
+from .replicas import lectura_en_replica
+from .roles import ADMINISTRADOR, JEFE_RRHH, tiene_rol
+from .serializers import (
+    AreaSerializer, CargaFamiliarSerializer, CargoSerializer, ContactoEmergenciaSerializer,
+    DepartamentoSerializer, TrabajadorSerializer,
+)
+
+
+class KeysetPagination(BasePagination):
+    """Paginación por cursor basada en `usuarios.paginacion`.
+
+    El orden lo define la vista con `get_keyset_ordering()`; el tamaño de
+    página se ajusta con `?page_size=` hasta `max_page_size`.
+    """
+    page_size = 50
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        size = max(1, min(size, self.max_page_size))
+        self.page = paginar_por_cursor(
+            queryset, view.get_keyset_ordering(), request.query_params.get('cursor'), per_page=size
+        )
+        return list(self.page)
+
+    def _url(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), 'cursor', cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._url(self.page.next_cursor),
+            'previous': self._url(self.page.prev_cursor),
+            'results': data,
+        })
+
+
+class EsRRHHoAdministrador(permissions.BasePermission):
+    """Mismo criterio que `lista_trabajadores`: RR.HH., Administrador o superusuario."""
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and tiene_rol(request.user, JEFE_RRHH, ADMINISTRADOR))
+
+
+class SoloLecturaViewSet(viewsets.ReadOnlyModelViewSet):
+    """Base de los endpoints: cursor, orden estable y campos a pedido."""
+    pagination_class = KeysetPagination
+    permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ['id']
+
+    def dispatch(self, request, *args, **kwargs):
+        # Como las vistas de lectura: GET/HEAD pueden leer de la réplica
+        return lectura_en_replica(super().dispatch)(request, *args, **kwargs)
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def campos_pedidos(self):
+        """Campos de `?fields=` válidos para el serializador, o `None` si no se pidió ninguno."""
+        fields = self.request.query_params.get('fields', '')
+        pedidos = [f.strip() for f in fields.split(',') if f.strip()]
+        validos = [f for f in pedidos if f in self.get_serializer_class().Meta.fields]
+        return validos or None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.campos_pedidos()
+        return context
+
+    def optimizar(self, queryset):
+        """Carga solo las columnas y relaciones que necesitan los campos pedidos."""
+        meta = self.get_serializer_class().Meta
+        campos = self.campos_pedidos() or meta.fields
+        only, select, prefetch = {'id'}, set(), set()
+        only.update(o.lstrip('-') for o in self.get_keyset_ordering() if o.lstrip('-') != 'relevancia')
+        concretos = {f.name for f in meta.model._meta.concrete_fields}
+        for campo in campos:
+            req = meta.requisitos.get(campo)
+            if req:
+                only.update(req.get('only', []))
+                select.update(req.get('select', []))
+                prefetch.update(req.get('prefetch', []))
+            elif campo in concretos:
+                only.add(campo)
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset.only(*sorted(only))
+
+
+class TrabajadorViewSet(SoloLecturaViewSet):
+    """Trabajadores con los filtros de `lista_trabajadores` (`q`, `rut`, `area`, `cargo`, `depto`, `sexo`, `order`)."""
+    serializer_class = TrabajadorSerializer
+    permission_classes = [EsRRHHoAdministrador]
+
+    def get_keyset_ordering(self):
+        return orden_trabajadores(leer_filtros_trabajadores(self.request.query_params))
+
+    def get_queryset(self):
+        filtros = leer_filtros_trabajadores(self.request.query_params)
+        return self.optimizar(filtrar_trabajadores(Trabajador.objects.all(), filtros))
+
+    @action(detail=False, pagination_class=None)
+    def facetas(self, request):
+        """Conteos por área, departamento, cargo y sexo bajo los filtros actuales."""
+        return Response(opciones_facetas(leer_filtros_trabajadores(request.query_params)))
+
+
+class AreaViewSet(SoloLecturaViewSet):
+    serializer_class = AreaSerializer
+    keyset_ordering = ['nombre', 'id']
+
+    def get_queryset(self):
+        return self.optimizar(Area.objects.all())
+
+
+class DepartamentoViewSet(SoloLecturaViewSet):
+    """Departamentos; `?area=<id>` filtra por área."""
+    serializer_class = DepartamentoSerializer
+    keyset_ordering = ['nombre', 'id']
+
+    def get_queryset(self):
+        qs = Departamento.objects.all()
+        area = self.request.query_params.get('area', '').strip()
+        if area.isdigit():
+            qs = qs.filter(area_id=area)
+        return self.optimizar(qs)
+
+
+class CargoViewSet(SoloLecturaViewSet):
+    serializer_class = CargoSerializer
+    keyset_ordering = ['nombre', 'id']
+
+    def get_queryset(self):
+        return self.optimizar(Cargo.objects.all())
+
+
+class DelTrabajadorViewSet(SoloLecturaViewSet):
+    """Base para contactos y cargas; `?trabajador=<id>` filtra por trabajador."""
+    permission_classes = [EsRRHHoAdministrador]
+    keyset_ordering = ['trabajador_id', 'id']
+
+    def get_queryset(self):
+        qs = self.get_serializer_class().Meta.model.objects.all()
+        trabajador = self.request.query_params.get('trabajador', '').strip()
+        if trabajador.isdigit():
+            qs = qs.filter(trabajador_id=trabajador)
+        return self.optimizar(qs)
+
+
+class ContactoEmergenciaViewSet(DelTrabajadorViewSet):
+    serializer_class = ContactoEmergenciaSerializer
+
+
+class CargaFamiliarViewSet(DelTrabajadorViewSet):
+    serializer_class = CargaFamiliarSerializer
+
+
+router = DefaultRouter()
+router.register('trabajadores', TrabajadorViewSet, basename='trabajador')
+router.register('areas', AreaViewSet, basename='area')
+router.register('departamentos', DepartamentoViewSet, basename='departamento')
+router.register('cargos', CargoViewSet, basename='cargo')
+router.register('contactos', ContactoEmergenciaViewSet, basename='contacto')
+router.register('cargas', CargaFamiliarViewSet, basename='carga')
@@ -0,0 +1,252 @@
+"""Aprovisionamiento masivo de cuentas de usuario.
+
+Crea miles de usuarios como lo hace `crear_usuario` (grupo opcional y
+`Trabajador` por defecto para que puedan entrar a su perfil), pero por
+lotes con `bulk_create` sobre `User`, la tabla intermedia de grupos y
+`Trabajador` (ver `usuarios.importacion.insertar_lote`).
+
+El costo dominante es el hash de contraseñas (PBKDF2, decenas de ms por
+usuario). Las contraseñas propias de cada fila se hashean en un pool de
+procesos y en tubería: mientras un lote se inserta, el siguiente ya se
+está hasheando. Con invitaciones no se hashea nada: las cuentas quedan con
+contraseña inutilizable y cada usuario define la suya con un enlace de un
+solo uso (`usuarios:invitacion`, token de `default_token_generator`,
+vigente `PASSWORD_RESET_TIMEOUT` segundos).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+
+from django.contrib.auth import get_user_model, password_validation
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.mail import send_mass_mail
+from django.core.validators import validate_email
+from django.db import DatabaseError
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .importacion import (
+    ResultadoImportacion, descartar_existentes, insertar_lote, texto_celda, validar_largos,
+)
+from .models import Trabajador
+
+COLUMNAS = ['username', 'email', 'password', 'grupo', 'nombres', 'apellidos']
+TAMANO_LOTE = 1000
+# Bajo esta cantidad de contraseñas no conviene levantar procesos
+MINIMO_PARALELO = 32
+
+
+class ResultadoAprovisionamiento(ResultadoImportacion):
+    """Resumen del aprovisionamiento; `invitaciones` son `(username, email, ruta)`."""
+
+    def __init__(self):
+        super().__init__()
+        self.invitaciones = []
+
+
+def _iniciar_proceso():
+    # Con el método `spawn` (macOS, Windows) el proceso hijo parte sin Django cargado
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def pool_hash(procesos=None):
+    """Pool de procesos para hashear, o un contexto nulo si no conviene paralelizar."""
+    procesos = procesos or os.cpu_count() or 1
+    if procesos <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso)
+
+
+def hashear_contrasenas(contrasenas, pool=None):
+    """Hashes de `contrasenas`, en el mismo orden.
+
+    Con `pool` (ver `pool_hash`) los hashes se encargan de inmediato y se
+    devuelve un iterador que los entrega a medida que terminan: quien lo
+    consume más tarde no espera lo que ya se calculó mientras tanto.
+    """
+    contrasenas = list(contrasenas)
+    if pool is None or len(contrasenas) < MINIMO_PARALELO:
+        return iter([make_password(c) for c in contrasenas])
+    trozo = max(1, len(contrasenas) // ((os.cpu_count() or 1) * 4))
+    return pool.map(make_password, contrasenas, chunksize=trozo)
+
+
+def ruta_invitacion(user):
+    """Ruta (sin dominio) del enlace para que `user` defina su primera contraseña."""
+    return reverse('usuarios:invitacion', kwargs={
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    })
+
+
+def _validar(numero, fila, grupos, grupo_defecto, invitar, resultado):
+    User = get_user_model()
+    errores_previos = len(resultado.errores)
+    datos = {c: texto_celda(fila, c) for c in COLUMNAS}
+    # Las contraseñas no se recortan
+    datos['password'] = '' if fila.get('password') is None else str(fila['password'])
+
+    validar_largos(numero, datos, resultado)
+    if not datos['username']:
+        resultado.error(numero, 'username', 'Campo obligatorio.')
+    else:
+        try:
+            User.username_validator(datos['username'])
+        except ValidationError as exc:
+            resultado.error(numero, 'username', exc.messages[0])
+    if datos['email']:
+        try:
+            validate_email(datos['email'])
+        except ValidationError:
+            resultado.error(numero, 'email', 'Email inválido.')
+    elif invitar:
+        resultado.error(numero, 'email', 'La invitación requiere email.')
+
+    nombre_grupo = datos['grupo'] or grupo_defecto
+    if nombre_grupo and nombre_grupo not in grupos:
+        resultado.error(numero, 'grupo', f'Grupo inexistente: {nombre_grupo}.')
+
+    password = None if invitar else (datos['password'] or None)
+    if password is not None:
+        try:
+            password_validation.validate_password(
+                password, User(username=datos['username'], email=datos['email'])
+            )
+        except ValidationError as exc:
+            resultado.error(numero, 'password', ' '.join(exc.messages))
+
+    if len(resultado.errores) > errores_previos:
+        return None
+    largo_nombres = Trabajador._meta.get_field('nombres').max_length
+    return {
+        'numero': numero,
+        'username': datos['username'],
+        'email': datos['email'],
+        'clave': password,
+        'grupos': [grupos[nombre_grupo]] if nombre_grupo else [],
+        # Mismos valores por defecto que `crear_usuario`
+        'trabajador': {
+            'nombres': datos['nombres'] or datos['username'][:largo_nombres],
+            'apellidos': datos['apellidos'] or 'Usuario',
+            'rut': None,
+            'rut_normalizado': None,
+            'sexo': 'O',
+            'fecha_ingreso': date.today(),
+        },
+        'contactos': [],
+        'cargas': [],
+    }
+
+
+def _lotes_validos(filas, grupos, grupo_defecto, invitar, batch_size, resultado):
+    """Filas válidas, sin repetidos en el archivo ni usuarios existentes, por lotes."""
+    vistos_username, vistos_email = set(), set()
+    lote = []
+    # La fila 1 es el encabezado
+    for numero, fila in enumerate(filas, start=2):
+        if fila is None:
+            continue
+        resultado.leidas += 1
+        datos = _validar(numero, fila, grupos, grupo_defecto, invitar, resultado)
+        if datos is None:
+            continue
+        # Sin distinguir mayúsculas, como la colación de MySQL
+        if datos['username'].lower() in vistos_username:
+            resultado.error(numero, 'username', 'Usuario repetido en el archivo.')
+            continue
+        if datos['email'] and datos['email'].lower() in vistos_email:
+            resultado.error(numero, 'email', 'Email repetido en el archivo.')
+            continue
+        vistos_username.add(datos['username'].lower())
+        if datos['email']:
+            vistos_email.add(datos['email'].lower())
+        lote.append(datos)
+        if len(lote) >= batch_size:
+            yield descartar_existentes(lote, resultado)
+            lote = []
+    if lote:
+        yield descartar_existentes(lote, resultado)
+
+
+def aprovisionar_usuarios(filas, grupo=None, invitar=False, procesos=None,
+                          batch_size=TAMANO_LOTE, dry_run=False):
+    """Valida y crea las cuentas de `filas` y devuelve un `ResultadoAprovisionamiento`.
+
+    Cada fila trae `username` y, opcionales, `email`, `password`, `grupo`
+    (nombre de un grupo existente; por defecto `grupo`), `nombres` y
+    `apellidos` para el `Trabajador`. Sin `password` la cuenta queda con
+    contraseña inutilizable. Con `invitar` se ignoran las contraseñas y se
+    genera un enlace de invitación por cuenta creada (`invitaciones`).
+    `procesos` limita el pool de hash (por defecto, un proceso por CPU).
+    """
+    resultado = ResultadoAprovisionamiento()
+    grupos = dict(Group.objects.values_list('name', 'id'))
+    inutilizable = make_password(None)
+    User = get_user_model()
+
+    def insertar(lote, hashes):
+        for fila, password_hash in zip(lote, hashes):
+            fila['password'] = password_hash
+        try:
+            creadas = insertar_lote(lote, inutilizable, None)
+        except DatabaseError as exc:
+            # El lote se revirtió completo; los anteriores quedan creados
+            for fila in lote:
+                resultado.error(fila['numero'], '', f'Lote no insertado: {exc}')
+            return
+        resultado.creadas += creadas
+        if invitar:
+            # El token depende del hash y del id: se leen las cuentas recién creadas
+            for user in User.objects.filter(username__in=[f['username'] for f in lote]).order_by('username'):
+                resultado.invitaciones.append((user.get_username(), user.email, ruta_invitacion(user)))
+
+    lotes = _lotes_validos(filas, grupos, grupo, invitar, max(1, batch_size), resultado)
+    if dry_run:
+        for lote in lotes:
+            resultado.creadas += len(lote)
+    else:
+        # Con invitaciones no hay nada que hashear: sin pool
+        with pool_hash(1 if invitar else procesos) as pool:
+            pendiente = None
+            for lote in lotes:
+                # Se encarga el hash de este lote antes de insertar el anterior
+                con_clave = [f for f in lote if f['clave'] is not None]
+                hashes = iter(hashear_contrasenas([f['clave'] for f in con_clave], pool))
+                if pendiente:
+                    insertar(*pendiente)
+                pendiente = (lote, _hashes_del_lote(lote, hashes, inutilizable))
+            if pendiente:
+                insertar(*pendiente)
+    resultado.errores.sort(key=lambda e: e[0])
+    return resultado
+
+
+def _hashes_del_lote(lote, hashes, inutilizable):
+    """Hash por fila del lote: el calculado para las que traen contraseña, si no el inutilizable."""
+    for fila in lote:
+        yield next(hashes) if fila['clave'] is not None else inutilizable
+
+
+def enviar_invitaciones(invitaciones, url_base, remitente=None):
+    """Envía por correo los enlaces de `invitaciones` (ver `aprovisionar_usuarios`); devuelve cuántos."""
+    url_base = url_base.rstrip('/')
+    mensajes = [
+        (
+            'Activa tu cuenta en El Correo',
+            f'Hola {username}:\n\nSe creó tu cuenta en El Correo. Define tu contraseña en:\n'
+            f'{url_base}{ruta}\n\nEl enlace se puede usar una sola vez.',
+            remitente,
+            [email],
+        )
+        for username, email, ruta in invitaciones if email
+    ]
+    return send_mass_mail(mensajes, fail_silently=False)
@@ -0,0 +1,158 @@
+"""Medición de las vistas de `usuarios.urls`: latencia, consultas SQL y tiempo SQL.
+
+Usado por el comando `bench_views` (tamaños de datos crecientes, JSON de
+resultados y comparación con una línea base) y por los tests de
+presupuesto de consultas en `usuarios/tests.py`.
+
+Cada vista declara en `PRESUPUESTO_CONSULTAS` el máximo de consultas por
+request, que no debe depender de la cantidad de trabajadores. Superarlo
+hace fallar el comando y los tests.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import Client
+from django.urls import reverse
+
+from . import urls as usuarios_urls
+from .instrumentacion import RegistroSQL, registrar_sql
+from .models import Trabajador
+from .roles import ADMINISTRADOR, JEFE_RRHH, TRABAJADOR
+
+# Máximo de consultas por request (el peor caso entre los roles)
+PRESUPUESTO_CONSULTAS = {
+    'login': 2,
+    'signup': 4,
+    'lista_usuarios': 8,
+    'dashboard': 4,
+    'perfil': 7,
+    'lista_trabajadores': 6,
+    'alta_trabajador': 5,
+    'importar_trabajadores': 3,
+    'exportar_trabajadores': 4,
+    'crear_usuario': 4,
+    'lista_departamentos': 6,
+    'lista_cargos': 6,
+    'lista_areas': 6,
+    'api_dashboard': 4,
+    'api_trabajadores': 4,
+    'api_usuarios_sin_trabajador': 4,
+    'api_catalogo_areas': 3,
+    'api_catalogo_departamentos': 3,
+    'api_catalogo_cargos': 3,
+    'password_change': 3,
+    'password_change_done': 3,
+}
+# Vistas que no se miden (cierran la sesión del cliente)
+EXCLUIDAS = {'logout'}
+
+ROLES = {
+    'administrador': ADMINISTRADOR,
+    'rrhh': JEFE_RRHH,
+    'trabajador': TRABAJADOR,
+}
+
+
+def rutas():
+    """Nombres de las rutas con nombre de `usuarios.urls` que se miden."""
+    return [
+        p.name for p in usuarios_urls.urlpatterns
+        if p.name and p.name not in EXCLUIDAS and not p.pattern.converters
+    ]
+
+
+def usuarios_por_rol():
+    """Crea (si faltan) un usuario con `Trabajador` por rol y devuelve `{rol: user}`."""
+    User = get_user_model()
+    usuarios = {}
+    for rol, grupo in ROLES.items():
+        user, creado = User.objects.get_or_create(
+            username=f'bench_{rol}', defaults={'email': f'bench_{rol}@ejemplo.cl'}
+        )
+        if creado:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+            user.groups.add(Group.objects.get_or_create(name=grupo)[0])
+            Trabajador.objects.get_or_create(
+                user=user, defaults={'nombres': 'Bench', 'apellidos': rol.title(), 'sexo': 'O'}
+            )
+        usuarios[rol] = user
+    return usuarios
+
+
+def _percentil(valores, p):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+def medir(client, url, repeticiones=10):
+    """Hace `repeticiones` GET a `url` y resume latencia (ms), consultas y SQL (ms).
+
+    Las respuestas en streaming se consumen completas dentro de la medición.
+    """
+    latencias, consultas, sql = [], [], []
+    status = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        # Solo consultas y tiempo: sin duplicados ni formas
+        with registrar_sql(RegistroSQL(max_distintas=0)) as registro:
+            response = client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(registro.consultas)
+        sql.append(registro.segundos * 1000)
+        status = response.status_code
+    return {
+        'status': status,
+        'p50_ms': round(_percentil(latencias, 50), 2),
+        'p95_ms': round(_percentil(latencias, 95), 2),
+        'consultas': max(consultas),
+        'sql_ms': round(statistics.median(sql), 2),
+    }
+
+
+def medir_vistas(repeticiones=10, calentar=True):
+    """Mide cada ruta para cada rol. Devuelve `{ruta: {rol: medición}}`."""
+    resultados = {}
+    usuarios = usuarios_por_rol()
+    for rol, user in usuarios.items():
+        client = Client()
+        client.force_login(user)
+        for nombre in rutas():
+            url = reverse(f'usuarios:{nombre}')
+            if calentar:
+                # Primer request: cachés de roles, catálogos y plantillas
+                medir(client, url, repeticiones=1)
+            resultados.setdefault(nombre, {})[rol] = medir(client, url, repeticiones)
+    return resultados
+
+
+def excesos_presupuesto(resultados):
+    """Lista de `(ruta, rol, consultas, presupuesto)` que superan su presupuesto."""
+    excesos = []
+    for nombre, por_rol in resultados.items():
+        presupuesto = PRESUPUESTO_CONSULTAS.get(nombre)
+        for rol, medicion in por_rol.items():
+            if presupuesto is None or medicion['consultas'] > presupuesto:
+                excesos.append((nombre, rol, medicion['consultas'], presupuesto))
+    return excesos
+
+
+def regresiones(resultados, base, tolerancia=0.25):
+    """Compara con una línea base: más consultas, o p95 peor que `tolerancia` (fracción)."""
+    cambios = []
+    for nombre, por_rol in resultados.items():
+        for rol, actual in por_rol.items():
+            previo = base.get(nombre, {}).get(rol)
+            if not previo:
+                continue
+            if actual['consultas'] > previo['consultas']:
+                cambios.append((nombre, rol, 'consultas', previo['consultas'], actual['consultas']))
+            if actual['p95_ms'] > previo['p95_ms'] * (1 + tolerancia):
+                cambios.append((nombre, rol, 'p95_ms', previo['p95_ms'], actual['p95_ms']))
+    return cambios
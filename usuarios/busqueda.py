@@ -0,0 +1,156 @@
+"""Búsqueda indexada de trabajadores por nombre, apellidos y RUT.
+
+Cada `Trabajador` se descompone en términos normalizados (sin acentos y en
+minúsculas) guardados en `TerminoBusqueda`. Una consulta se resuelve con
+búsquedas por prefijo sobre ese índice (`termino LIKE 'sof%'`) y se ordena
+por relevancia: coincidencia exacta de término vale más que un prefijo.
+
+También resuelve el autocompletado de usuarios sin trabajador
+(`usuarios_sin_trabajador`) por prefijo de username o email.
+"""
+import re
+import unicodedata
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+
+from .models import TerminoBusqueda, Trabajador
+
+MAX_TERMINO = TerminoBusqueda._meta.get_field('termino').max_length
+_NO_ALFANUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Quita acentos y pasa a minúsculas: "Sofía Núñez" → "sofia nunez"."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def terminos_consulta(q):
+    """Términos de una consulta: cada palabra sin signos ("12.345.678-5" → "123456785")."""
+    terminos = []
+    for palabra in normalizar(q).split():
+        termino = _NO_ALFANUM.sub('', palabra)[:MAX_TERMINO]
+        if termino and termino not in terminos:
+            terminos.append(termino)
+    return terminos
+
+
+def terminos_trabajador(nombres, apellidos, rut):
+    """Conjunto de términos indexados para los datos de un trabajador.
+
+    Incluye cada palabra completa sin signos y también sus partes, para que
+    "Pérez-Cotapos" se encuentre tanto por "perezcotapos" como por "cotapos".
+    """
+    terminos = set()
+    for texto in (nombres, apellidos, rut):
+        for palabra in normalizar(texto).split():
+            terminos.add(_NO_ALFANUM.sub('', palabra))
+            terminos.update(_NO_ALFANUM.split(palabra))
+    return {t[:MAX_TERMINO] for t in terminos if t}
+
+
+def indexar_trabajador(trabajador):
+    """Sincroniza los términos de `trabajador` aplicando solo las diferencias."""
+    deseados = terminos_trabajador(trabajador.nombres, trabajador.apellidos, trabajador.rut)
+    actuales = set(
+        TerminoBusqueda.objects.filter(trabajador=trabajador).values_list('termino', flat=True)
+    )
+    sobrantes = actuales - deseados
+    if sobrantes:
+        TerminoBusqueda.objects.filter(trabajador=trabajador, termino__in=sobrantes).delete()
+    nuevos = deseados - actuales
+    if nuevos:
+        TerminoBusqueda.objects.bulk_create(
+            [TerminoBusqueda(trabajador=trabajador, termino=t) for t in nuevos],
+            ignore_conflicts=True,
+        )
+
+
+def reindexar(queryset=None, batch_size=2000):
+    """Reconstruye el índice para `queryset` (todos por defecto) por lotes.
+
+    Pensado para cargas masivas que no disparan señales (`bulk_create`,
+    `update`). Devuelve la cantidad de trabajadores procesados.
+    """
+    if queryset is None:
+        queryset = Trabajador.objects.all()
+    filas = queryset.order_by().values_list('id', 'nombres', 'apellidos', 'rut')
+    procesados = 0
+    lote = []
+    for fila in filas.iterator(chunk_size=batch_size):
+        lote.append(fila)
+        if len(lote) >= batch_size:
+            indexar_lote(lote)
+            procesados += len(lote)
+            lote = []
+    if lote:
+        indexar_lote(lote)
+        procesados += len(lote)
+    return procesados
+
+
+def indexar_lote(filas):
+    """Reemplaza los términos de varios trabajadores a partir de tuplas
+    `(id, nombres, apellidos, rut)`, con un DELETE y un `bulk_create`."""
+    ids = [f[0] for f in filas]
+    TerminoBusqueda.objects.filter(trabajador_id__in=ids).delete()
+    TerminoBusqueda.objects.bulk_create([
+        TerminoBusqueda(trabajador_id=pk, termino=t)
+        for pk, nombres, apellidos, rut in filas
+        for t in terminos_trabajador(nombres, apellidos, rut)
+    ])
+
+
+def buscar_trabajadores(queryset, q):
+    """Filtra `queryset` a los trabajadores que contienen todos los términos de `q`.
+
+    Cada término se resuelve por prefijo contra el índice y se anota
+    `relevancia` (2 por término exacto, 1 por prefijo) para ordenar.
+    """
+    terminos = terminos_consulta(q)
+    if not terminos:
+        return queryset
+    for t in terminos:
+        queryset = queryset.filter(
+            pk__in=TerminoBusqueda.objects.filter(termino__startswith=t).values('trabajador_id')
+        )
+    puntaje = (
+        TerminoBusqueda.objects
+        .filter(trabajador=OuterRef('pk'))
+        .filter(reduce(or_, [Q(termino__startswith=t) for t in terminos]))
+        .values('trabajador')
+        .annotate(total=Sum(Case(
+            When(termino__in=terminos, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )))
+        .values('total')
+    )
+    return queryset.annotate(relevancia=Subquery(puntaje, output_field=IntegerField()))
+
+
+def usuarios_sin_trabajador(q, limite=10):
+    """Hasta `limite` usuarios sin `Trabajador` cuyo username o email empieza con `q`.
+
+    Una consulta por columna, cada una por su índice (`LIKE 'q%'` con
+    `LIMIT`), y se mezclan en Python; `q` vacío no devuelve nada para no
+    recorrer la tabla completa. Devuelve dicts `{'id', 'username', 'email'}`
+    ordenados por username.
+    """
+    q = (q or '').strip()
+    if not q:
+        return []
+    libres = get_user_model().objects.filter(trabajador__isnull=True).order_by()
+    encontrados = {}
+    for campo in ('username', 'email'):
+        filas = (
+            libres.filter(**{f'{campo}__istartswith': q})
+            .order_by(campo)
+            .values('id', 'username', 'email')[:limite]
+        )
+        for fila in filas:
+            encontrados.setdefault(fila['id'], fila)
+    return sorted(encontrados.values(), key=lambda u: u['username'].lower())[:limite]
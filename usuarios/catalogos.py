@@ -0,0 +1,128 @@
+"""Caché en memoria de los catálogos Área, Departamento y Cargo.
+
+Los catálogos cambian pocas veces al mes pero se leen en cada listado y
+formulario. Cada proceso guarda en memoria las listas ordenadas y los
+mapas id → objeto, junto con la versión con que se cargaron. La versión
+vive en la caché de Django y se cambia (tras el commit) ante cualquier
+escritura de catálogo (ver `usuarios.signals`); al detectar otra versión
+el proceso recarga con tres consultas.
+
+Con `LocMemCache` la versión es local a cada proceso, por lo que además
+se recarga tras `USUARIOS_CATALOGOS_TTL` segundos como máximo. Por lo
+mismo, lo que se publica hacia afuera (ETag) es la huella de los datos
+cargados (`huella_catalogos`) y no la versión.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Area, Cargo, Departamento
+from .replicas import en_primaria
+
+VERSION_KEY = 'usuarios:catalogos:version'
+
+_lock = threading.Lock()
+# (versión, instante de carga, datos); se reemplaza completa para lecturas sin bloqueo
+_memoria = (None, 0.0, None)
+
+
+def _ttl():
+    return getattr(settings, 'USUARIOS_CATALOGOS_TTL', 60)
+
+
+def version_catalogos():
+    """Versión vigente de los catálogos (se crea si no existe)."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidar_catalogos():
+    """Publica una nueva versión cuando la transacción en curso confirme."""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, time.time_ns(), None))
+
+
+def _cargar():
+    areas = list(Area.objects.order_by('nombre'))
+    areas_por_id = {a.pk: a for a in areas}
+    departamentos = list(Departamento.objects.con_area().order_by('nombre'))
+    cargos = list(Cargo.objects.order_by('nombre'))
+    por_area = {}
+    for d in departamentos:
+        por_area.setdefault(d.area_id, []).append(d)
+    huella = hashlib.sha1(repr((
+        [(a.pk, a.nombre) for a in areas],
+        [(d.pk, d.nombre, d.area_id) for d in departamentos],
+        [(c.pk, c.nombre) for c in cargos],
+    )).encode()).hexdigest()
+    return {
+        'huella': huella,
+        'areas': areas,
+        'departamentos': departamentos,
+        'departamentos_por_area': por_area,
+        'cargos': cargos,
+        'por_id': {
+            'areas': areas_por_id,
+            'departamentos': {d.pk: d for d in departamentos},
+            'cargos': {c.pk: c for c in cargos},
+        },
+    }
+
+
+def _vigente(memoria, version):
+    cargada, cargado, datos = memoria
+    return datos is not None and cargada == version and time.monotonic() - cargado < _ttl()
+
+
+def catalogos():
+    """Datos de catálogo vigentes para este proceso (recarga si cambió la versión)."""
+    global _memoria
+    version = version_catalogos()
+    memoria = _memoria
+    if _vigente(memoria, version):
+        return memoria[2]
+    with _lock:
+        if not _vigente(_memoria, version):
+            # Desde la primaria: datos de la réplica podrían ser anteriores a la versión
+            with en_primaria():
+                _memoria = (version, time.monotonic(), _cargar())
+        return _memoria[2]
+
+
+def huella_catalogos():
+    """Hash de ids y nombres de los catálogos cargados: igual en todo proceso con los mismos datos."""
+    return catalogos()['huella']
+
+
+def areas():
+    return catalogos()['areas']
+
+
+def departamentos():
+    return catalogos()['departamentos']
+
+
+def cargos():
+    return catalogos()['cargos']
+
+
+def departamentos_de_area(area_id):
+    """Departamentos del área indicada, ordenados por nombre (lista vacía si no hay)."""
+    return catalogos()['departamentos_por_area'].get(area_id, [])
+
+
+def obtener(catalogo, pk):
+    """Objeto del catálogo (`'areas'`, `'departamentos'`, `'cargos'`) por id, o `None`."""
+    return catalogos()['por_id'][catalogo].get(pk)
+
+
+def nombres_por_id(catalogo):
+    """Mapa id → nombre del catálogo indicado."""
+    return {pk: obj.nombre for pk, obj in catalogos()['por_id'][catalogo].items()}
+
@@ -0,0 +1,54 @@
+"""Métricas de conexiones a la base de datos del proceso actual.
+
+Cuenta por alias las conexiones abiertas contra el servidor (`creadas`:
+cada una paga handshake y autenticación), y con el backend
+`usuarios.db.mysql_pool` además las tomadas del pool ya abiertas
+(`reutilizadas`), las cerradas por fallar la verificación o superar su
+vida máxima (`descartadas`), los requests que esperaron un cupo
+(`esperas`) y los que no lo obtuvieron a tiempo (`agotadas`).
+
+Sin pool y con `CONN_MAX_AGE=0`, `creadas` crece uno por request; con
+conexiones persistentes debería quedar cerca de la cantidad de hilos.
+Cada worker (proceso) lleva sus propias cuentas. Ver el comando
+`bench_conexiones` y la entrada `conn` de `Server-Timing`.
+"""
+import os
+import threading
+from collections import Counter, defaultdict
+
+from .instrumentacion import registro_actual
+
+EVENTOS = ('creadas', 'reutilizadas', 'descartadas', 'esperas', 'agotadas')
+
+_metricas = defaultdict(Counter)
+_lock = threading.Lock()
+
+
+def registrar(alias, evento, n=1):
+    with _lock:
+        _metricas[alias][evento] += n
+
+
+def conexion_abierta(connection):
+    """Cuenta una conexión nueva (receptor de `connection_created`, ver `signals`)."""
+    # Las reutilizadas del pool ya se contaron al tomarlas
+    if getattr(connection, 'conexion_reutilizada', False):
+        return
+    registrar(connection.alias, 'creadas')
+    registro = registro_actual()
+    if registro is not None:
+        registro.conexiones += 1
+
+
+def metricas_conexiones():
+    """`{'pid', 'alias': {alias: {evento: n}}, 'pools': {...}}` del proceso actual."""
+    from .db.pool import estado_pools
+
+    with _lock:
+        por_alias = {alias: {e: c[e] for e in EVENTOS} for alias, c in _metricas.items()}
+    return {'pid': os.getpid(), 'alias': por_alias, 'pools': estado_pools()}
+
+
+def reiniciar_metricas():
+    with _lock:
+        _metricas.clear()
@@ -0,0 +1,131 @@
+"""Contadores materializados de la organización.
+
+Guardan en `ContadorOrganizacion` el total de usuarios, trabajadores,
+áreas, departamentos y cargos. Cada contador se reparte en
+`USUARIOS_CONTADORES_FRAGMENTOS` filas (fragmentos) que se suman al leer:
+cada proceso/hilo ajusta siempre el mismo fragmento con
+`UPDATE ... SET total = total ± 1`, así las altas concurrentes no se
+encolan tras el bloqueo de una sola fila y una transacción nunca toma dos
+fragmentos del mismo contador (sin interbloqueos).
+
+Las señales `post_save`/`post_delete` ajustan después del INSERT/DELETE:
+solo si la escritura ocurre dentro de `transaction.atomic()` (como
+`importacion.insertar_lote`) el ajuste comparte su transacción; en
+autocommit es otra sentencia y una falla entre ambas deja un desvío.
+`reconciliar` recalcula los valores reales para reparar esos desvíos y
+los de cargas con `bulk_create`, `QuerySet.update` o SQL manual.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Area, Cargo, ContadorOrganizacion, Departamento, Trabajador
+
+
+def modelos_contados():
+    """Nombre de contador → modelo contado."""
+    return {
+        'usuarios': get_user_model(),
+        'trabajadores': Trabajador,
+        'areas': Area,
+        'departamentos': Departamento,
+        'cargos': Cargo,
+    }
+
+
+def nombre_contador(model):
+    """Nombre del contador asociado a `model` o `None` si no se cuenta."""
+    for nombre, contado in modelos_contados().items():
+        if contado is model:
+            return nombre
+    return None
+
+
+def fragmentos():
+    """Cantidad de filas por contador (`USUARIOS_CONTADORES_FRAGMENTOS`, por defecto 8)."""
+    return max(1, getattr(settings, 'USUARIOS_CONTADORES_FRAGMENTOS', 8))
+
+
+def _fragmento_propio():
+    # Fijo por proceso e hilo: la transacción en curso siempre toca la misma fila
+    return hash((os.getpid(), threading.get_ident())) % fragmentos()
+
+
+def ajustar(nombre, delta):
+    """Suma `delta` al contador `nombre` de forma atómica en la base de datos.
+
+    Usa el fragmento de este proceso/hilo; si aún no existe (se crean con
+    `reconciliar`) usa el fragmento 0.
+    """
+    contador = ContadorOrganizacion.objects.filter(nombre=nombre)
+    fragmento = _fragmento_propio()
+    if not contador.filter(fragmento=fragmento).update(total=F('total') + delta) and fragmento:
+        contador.filter(fragmento=0).update(total=F('total') + delta)
+
+
+def _sumas():
+    return ContadorOrganizacion.objects.values('nombre').annotate(suma=Sum('total')).values_list('nombre', 'suma')
+
+
+def totales_organizacion():
+    """Todos los totales en una consulta, con claves `total_<nombre>` para las plantillas.
+
+    Si falta algún contador (instalación nueva) se reconcilia una vez.
+    """
+    totales = dict(_sumas())
+    if set(totales) != set(modelos_contados()):
+        totales = {nombre: real for nombre, (_, real) in reconciliar().items()}
+    return {f'total_{nombre}': max(0, total) for nombre, total in totales.items()}
+
+
+async def atotales_organizacion():
+    """Versión async de `totales_organizacion` para las vistas JSON bajo ASGI.
+
+    Si falta algún contador, cuenta cada modelo con `acount()`, uno tras
+    otro: el ORM async ejecuta las consultas de a una en el hilo de la
+    conexión, así que lanzarlas a la vez no las paraleliza (sin
+    reconciliar: lo hace la vista sync o `reconcile_counters`).
+    """
+    totales = {nombre: total async for nombre, total in _sumas()}
+    modelos = modelos_contados()
+    if set(totales) != set(modelos):
+        totales = {nombre: await model.objects.acount() for nombre, model in modelos.items()}
+    return {f'total_{nombre}': max(0, total) for nombre, total in totales.items()}
+
+
+def reconciliar(dry_run=False):
+    """Recalcula cada contador con `COUNT(*)` y corrige los desvíos.
+
+    Devuelve `{nombre: (valor_guardado, valor_real)}` (guardado: suma de
+    los fragmentos). Cada contador se corrige en una transacción corta con
+    bloqueo de sus fragmentos: el total real queda en el fragmento 0, el
+    resto en 0, y se crean los fragmentos que falten.
+    """
+    resultado = {}
+    numeros = range(fragmentos())
+    for nombre, model in modelos_contados().items():
+        with transaction.atomic():
+            filas = {
+                c.fragmento: c
+                for c in ContadorOrganizacion.objects.select_for_update().filter(nombre=nombre)
+            }
+            real = model._default_manager.count()
+            guardado = sum(c.total for c in filas.values()) if filas else None
+            resultado[nombre] = (guardado, real)
+            if dry_run:
+                continue
+            if guardado != real:
+                ContadorOrganizacion.objects.filter(nombre=nombre, fragmento__gt=0).update(total=0)
+                if 0 in filas:
+                    ContadorOrganizacion.objects.filter(pk=filas[0].pk).update(total=real)
+            faltantes = [
+                ContadorOrganizacion(nombre=nombre, fragmento=n, total=real if n == 0 else 0)
+                for n in numeros if n not in filas
+            ]
+            if faltantes:
+                ContadorOrganizacion.objects.bulk_create(faltantes, ignore_conflicts=True)
+    return resultado
@@ -0,0 +1,23 @@
+"""Backend MySQL con pool de conexiones por proceso (ver `usuarios.db.pool`).
+
+    DATABASES['default'] = {
+        'ENGINE': 'usuarios.db.mysql_pool',
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': {'max_size': 10, 'timeout': 10, 'max_lifetime': 600}, ...},
+        ...
+    }
+"""
+from django.db.backends.mysql.base import Database
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from ..pool import ConexionesEnPoolMixin
+
+
+class DatabaseWrapper(ConexionesEnPoolMixin, MySQLDatabaseWrapper):
+    def conexion_usable(self, conexion):
+        try:
+            conexion.ping()
+        except Database.Error:
+            return False
+        return True
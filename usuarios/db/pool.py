@@ -0,0 +1,174 @@
+"""Pool de conexiones por proceso para backends sin pool propio (MySQL).
+
+Django abre una conexión por hilo y la cierra según `CONN_MAX_AGE`. Con
+servidores de hilos (gunicorn `--threads`, runserver) eso puede significar
+tantas conexiones como hilos por proceso. `ConexionesEnPoolMixin` reemplaza
+la apertura y el cierre físicos: `get_new_connection` toma una conexión
+abierta del pool (o abre una si hay cupo) y `_close` la devuelve en vez de
+cerrarla. Como máximo `max_size` conexiones están en uso a la vez por
+proceso; un hilo más espera hasta `timeout` segundos por un cupo.
+
+Se configura en `OPTIONS['pool']` del alias (igual que el pool de
+PostgreSQL de Django): `{'max_size': 10, 'timeout': 10, 'max_lifetime': 600}`.
+Usar con `CONN_MAX_AGE=0` para que cada request devuelva su conexión al
+terminar. Ver el backend `usuarios.db.mysql_pool`.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+from ..conexiones import registrar
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolConexiones:
+    """Conexiones abiertas reutilizables de un alias, con un máximo en uso a la vez."""
+
+    def __init__(self, alias, max_size=10, timeout=10, max_lifetime=600):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.en_uso = 0
+        self._cupos = threading.BoundedSemaphore(max_size)
+        self._libres = deque()  # (conexión, abierta_en)
+        self._lock = threading.Lock()
+
+    def tomar(self, conectar, usable=None):
+        """`(conexión, abierta_en, reutilizada)`; abre una nueva con `conectar()` si no hay libres.
+
+        `usable(conexión)` verifica una conexión libre antes de entregarla;
+        las que fallan o superan `max_lifetime` se cierran y se descartan.
+        """
+        if not self._cupos.acquire(blocking=False):
+            registrar(self.alias, 'esperas')
+            if not self._cupos.acquire(timeout=self.timeout):
+                registrar(self.alias, 'agotadas')
+                raise OperationalError(
+                    f"Pool de conexiones '{self.alias}' agotado: {self.max_size} en uso "
+                    f"tras {self.timeout}s de espera"
+                )
+        try:
+            while True:
+                with self._lock:
+                    libre = self._libres.pop() if self._libres else None
+                if libre is None:
+                    conexion = conectar()
+                    abierta_en = time.monotonic()
+                    reutilizada = False
+                    break
+                conexion, abierta_en = libre
+                vencida = self.max_lifetime and time.monotonic() - abierta_en > self.max_lifetime
+                if not vencida and (usable is None or usable(conexion)):
+                    reutilizada = True
+                    registrar(self.alias, 'reutilizadas')
+                    break
+                registrar(self.alias, 'descartadas')
+                _cerrar(conexion)
+        except BaseException:
+            self._cupos.release()
+            raise
+        with self._lock:
+            self.en_uso += 1
+        return conexion, abierta_en, reutilizada
+
+    def devolver(self, conexion, abierta_en, reutilizable=True):
+        """Libera el cupo; la conexión vuelve al pool o se cierra si no es reutilizable."""
+        try:
+            if reutilizable:
+                with self._lock:
+                    self._libres.append((conexion, abierta_en))
+            else:
+                registrar(self.alias, 'descartadas')
+                _cerrar(conexion)
+        finally:
+            with self._lock:
+                self.en_uso -= 1
+            self._cupos.release()
+
+    def cerrar_libres(self):
+        """Cierra las conexiones libres (p. ej. al apagar el proceso)."""
+        with self._lock:
+            libres, self._libres = list(self._libres), deque()
+        for conexion, _ in libres:
+            _cerrar(conexion)
+
+    def estado(self):
+        with self._lock:
+            return {'max_size': self.max_size, 'en_uso': self.en_uso, 'libres': len(self._libres)}
+
+
+def _cerrar(conexion):
+    try:
+        conexion.close()
+    except Exception:  # conexión ya rota: no hay nada que cerrar
+        pass
+
+
+def pool_de(alias, opciones):
+    """Pool del alias para el proceso actual (uno nuevo tras un fork)."""
+    clave = (os.getpid(), alias)
+    with _pools_lock:
+        pool = _pools.get(clave)
+        if pool is None:
+            pool = _pools[clave] = PoolConexiones(alias, **opciones)
+        return pool
+
+
+def estado_pools():
+    """`{alias: {'max_size', 'en_uso', 'libres'}}` de los pools del proceso actual."""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (dueno, _), pool in _pools.items() if dueno == pid]
+    return {pool.alias: pool.estado() for pool in pools}
+
+
+class ConexionesEnPoolMixin:
+    """Mixin para un `DatabaseWrapper`: abre y cierra conexiones a través de `PoolConexiones`.
+
+    Debe ir antes del `DatabaseWrapper` del backend en las bases de la clase.
+    Las subclases pueden redefinir `conexion_usable(conexion)` (por defecto
+    siempre usable); solo se consulta con `CONN_HEALTH_CHECKS` activo.
+    """
+
+    # Lo consulta el receptor de `connection_created` para no contarla como nueva
+    conexion_reutilizada = False
+
+    def _opciones_pool(self):
+        return self.settings_dict['OPTIONS'].get('pool') or {}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)  # no es un parámetro del driver
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = pool_de(self.alias, self._opciones_pool())
+        usable = self.conexion_usable if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        conexion, self._abierta_en, self.conexion_reutilizada = pool.tomar(
+            lambda: super(ConexionesEnPoolMixin, self).get_new_connection(conn_params), usable
+        )
+        return conexion
+
+    def conexion_usable(self, conexion):
+        return True
+
+    def _close(self):
+        conexion = self.connection
+        if conexion is None:
+            return
+        pool = pool_de(self.alias, self._opciones_pool())
+        # Con errores o cerrada dentro de una transacción no se confía en su estado
+        reutilizable = not self.errors_occurred and not self.in_atomic_block
+        if reutilizable:
+            try:
+                # Termina cualquier transacción implícita antes de prestarla a otro hilo
+                conexion.rollback()
+            except Exception:
+                reutilizable = False
+        pool.devolver(conexion, self._abierta_en, reutilizable)
@@ -0,0 +1,148 @@
+"""Estadísticas por área y por cargo para `lista_areas` y `lista_cargos`.
+
+Los trabajadores se cuentan con una sola consulta agrupada por dimensión
+(`GROUP BY area_id` o `GROUP BY cargo_id`, que recorre los índices
+`usuarios_trab_area_*` / `usuarios_trab_cargo_*`), con el desglose por sexo
+y por tramo de antigüedad como `COUNT` filtrados en la misma pasada, desde
+la base de lectura del request (`alias_lectura`, como `usuarios.facetas`). Los
+departamentos por área salen de la caché de catálogos. Así no se unen
+dos relaciones a la vez (filas multiplicadas por área) ni se cuenta en
+cada carga de página.
+
+El resultado se cachea con la generación de `usuarios.facetas`, que ya
+cambia ante cualquier escritura de `Trabajador` o de catálogo (señales y
+cargas masivas), y con la fecha del día por los tramos de antigüedad.
+Los listados filtran, ordenan y paginan en memoria sobre el catálogo
+cacheado: ordenar por cantidad no consulta la base.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import catalogos
+from .facetas import generacion
+from .models import Trabajador
+from .replicas import alias_lectura
+
+CACHE_PREFIX = 'usuarios:estadisticas'
+
+# dimensión → columna agrupada
+DIMENSIONES = {'area': 'area_id', 'cargo': 'cargo_id'}
+# Tramos de antigüedad: (clave, años desde, años hasta)
+TRAMOS_ANTIGUEDAD = (
+    ('menos_1', 0, 1),
+    ('de_1_a_5', 1, 5),
+    ('mas_de_5', 5, None),
+)
+SEXOS = [valor for valor, _ in Trabajador._meta.get_field('sexo').choices]
+
+
+def _timeout():
+    # Misma vigencia que los conteos de facetas
+    return getattr(settings, 'USUARIOS_FACETAS_TIMEOUT', 300)
+
+
+def _hace_anios(hoy, anios):
+    try:
+        return hoy.replace(year=hoy.year - anios)
+    except ValueError:  # 29 de febrero
+        return hoy.replace(year=hoy.year - anios, day=28)
+
+
+def _filtro_tramo(hoy, desde, hasta):
+    filtro = Q(fecha_ingreso__lte=_hace_anios(hoy, desde))
+    if hasta is not None:
+        filtro &= Q(fecha_ingreso__gt=_hace_anios(hoy, hasta))
+    return filtro
+
+
+def _contar(columna, hoy, alias):
+    agregados = {'total': Count('id')}
+    agregados.update({f'sexo_{valor}': Count('id', filter=Q(sexo=valor)) for valor in SEXOS})
+    agregados.update({
+        f'tramo_{clave}': Count('id', filter=_filtro_tramo(hoy, desde, hasta))
+        for clave, desde, hasta in TRAMOS_ANTIGUEDAD
+    })
+    filas = (
+        Trabajador.objects.using(alias).filter(**{f'{columna}__isnull': False})
+        .order_by().values(columna).annotate(**agregados)
+    )
+    return {
+        fila[columna]: {
+            'total': fila['total'],
+            'por_sexo': {valor: fila[f'sexo_{valor}'] for valor in SEXOS},
+            'antiguedad': {clave: fila[f'tramo_{clave}'] for clave, _, _ in TRAMOS_ANTIGUEDAD},
+        }
+        for fila in filas
+    }
+
+
+def estadisticas(dimension):
+    """`{id: {'total', 'por_sexo', 'antiguedad'}}` de trabajadores por `dimension` ('area' o 'cargo')."""
+    hoy = date.today()
+    key = f'{CACHE_PREFIX}:{generacion()}:{dimension}:{hoy.isoformat()}'
+    datos = cache.get(key)
+    if datos is None:
+        # Base de lectura del request, como los conteos de facetas
+        datos = _contar(DIMENSIONES[dimension], hoy, alias_lectura(Trabajador))
+        cache.set(key, datos, _timeout())
+    return datos
+
+
+def _vacias():
+    return {
+        'total': 0,
+        'por_sexo': dict.fromkeys(SEXOS, 0),
+        'antiguedad': {clave: 0 for clave, _, _ in TRAMOS_ANTIGUEDAD},
+    }
+
+
+def filas_areas():
+    """Áreas (orden por nombre) con `num_departamentos`, `num_trabajadores` y desgloses."""
+    por_area = estadisticas('area')
+    filas = []
+    for area in catalogos.areas():
+        stats = por_area.get(area.pk) or _vacias()
+        filas.append({
+            'id': area.pk,
+            'nombre': area.nombre,
+            'num_departamentos': len(catalogos.departamentos_de_area(area.pk)),
+            'num_trabajadores': stats['total'],
+            'por_sexo': stats['por_sexo'],
+            'antiguedad': stats['antiguedad'],
+        })
+    return filas
+
+
+def filas_cargos():
+    """Cargos (orden por nombre) con `num_trabajadores` y desgloses."""
+    por_cargo = estadisticas('cargo')
+    filas = []
+    for cargo in catalogos.cargos():
+        stats = por_cargo.get(cargo.pk) or _vacias()
+        filas.append({
+            'id': cargo.pk,
+            'nombre': cargo.nombre,
+            'num_trabajadores': stats['total'],
+            'por_sexo': stats['por_sexo'],
+            'antiguedad': stats['antiguedad'],
+        })
+    return filas
+
+
+def ordenar_filas(filas, order, columnas):
+    """Ordena filas ya ordenadas por nombre según `order` (`<clave>_asc`/`<clave>_desc`).
+
+    `columnas` mapea la clave del orden a la columna (`{'emp': 'num_trabajadores'}`).
+    El orden es estable: a igual conteo se mantiene el orden por nombre de la base.
+    """
+    clave, _, sentido = order.rpartition('_')
+    if clave == 'name':
+        return filas[::-1] if sentido == 'desc' else filas
+    columna = columnas.get(clave)
+    if columna is None or sentido not in ('asc', 'desc'):
+        return filas
+    signo = -1 if sentido == 'desc' else 1
+    return sorted(filas, key=lambda fila: signo * fila[columna])
@@ -0,0 +1,59 @@
+"""Exportación en streaming del listado filtrado de trabajadores.
+
+Las filas se leen por lotes (keyset) como diccionarios de `.values()` con
+los nombres de área, departamento, cargo y usuario ya unidos por JOIN, y
+se escriben al vuelo en CSV o NDJSON, de modo que la memoria no depende
+del tamaño de la exportación.
+"""
+import csv
+import json
+
+from .paginacion import iterar_por_lotes
+
+# (encabezado, lookup de `.values()`)
+COLUMNAS = [
+    ('id', 'id'),
+    ('rut', 'rut'),
+    ('nombres', 'nombres'),
+    ('apellidos', 'apellidos'),
+    ('sexo', 'sexo'),
+    ('fecha_ingreso', 'fecha_ingreso'),
+    ('area', 'area__nombre'),
+    ('departamento', 'departamento__nombre'),
+    ('cargo', 'cargo__nombre'),
+    ('usuario', 'user__username'),
+    ('email', 'user__email'),
+    ('telefono', 'telefono'),
+    ('direccion', 'direccion'),
+]
+TAMANO_LOTE = 2000
+
+
+class _Eco:
+    """Pseudo-archivo para `csv.writer`: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def filas_exportacion(queryset, ordering, batch_size=TAMANO_LOTE):
+    """Itera las filas del queryset filtrado como diccionarios `encabezado → valor`."""
+    lookups = [lookup for _, lookup in COLUMNAS]
+    extra = [o.lstrip('-') for o in ordering if o.lstrip('-') not in lookups]
+    filas = iterar_por_lotes(queryset.values(*lookups, *extra), ordering, batch_size)
+    for fila in filas:
+        yield {encabezado: fila[lookup] for encabezado, lookup in COLUMNAS}
+
+
+def generar_csv(filas):
+    """Genera líneas CSV (con BOM UTF-8 para que Excel respete los acentos)."""
+    writer = csv.writer(_Eco())
+    yield '\ufeff' + writer.writerow([encabezado for encabezado, _ in COLUMNAS])
+    for fila in filas:
+        yield writer.writerow(['' if v is None else v for v in fila.values()])
+
+
+def generar_ndjson(filas):
+    """Genera un objeto JSON por línea."""
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False, default=str) + '\n'
@@ -0,0 +1,116 @@
+"""Conteos por faceta (área, departamento, cargo, sexo) del listado de trabajadores.
+
+Para cada dimensión se cuenta con una consulta agrupada
+(`GROUP BY area_id`, etc.) aplicando todos los filtros activos salvo el
+de la propia dimensión, de modo que cada opción muestra cuántos
+resultados daría al elegirla. Son cuatro consultas por combinación de
+filtros.
+
+Los conteos se cachean por clave de filtros normalizada. La caché se
+invalida cambiando una generación global ante altas, bajas y cambios de
+los campos filtrables de `Trabajador` (`Trabajador.CAMPOS_FACETAS`; señales
+y cargas masivas), igual que `usuarios.roles`.
+
+Se cuenta desde la base de lectura del request (`alias_lectura`): la
+réplica en los listados, salvo que el request o el usuario haya escrito
+hace poco (ver `usuarios.replicas`), en cuyo caso se cuenta en la
+primaria y se ven los propios cambios. Un conteo de la réplica con demora
+puede quedar en la caché hasta el siguiente cambio o `USUARIOS_FACETAS_TIMEOUT`.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import catalogos
+from .busqueda import terminos_consulta
+from .filtros import filtrar_trabajadores
+from .models import Trabajador
+from .replicas import alias_lectura
+from .rut import limpiar_rut
+
+CACHE_PREFIX = 'usuarios:facetas'
+GEN_KEY = f'{CACHE_PREFIX}:gen'
+
+# faceta → (clave en `filtros`, columna agrupada)
+DIMENSIONES = {
+    'area': ('area', 'area_id'),
+    'depto': ('depto', 'departamento_id'),
+    'cargo': ('cargo', 'cargo_id'),
+    'sexo': ('sexo', 'sexo'),
+}
+
+
+def _timeout():
+    return getattr(settings, 'USUARIOS_FACETAS_TIMEOUT', 300)
+
+
+def generacion():
+    """Generación vigente de los datos derivados de `Trabajador` (ver `invalidar_facetas`)."""
+    gen = cache.get(GEN_KEY)
+    if gen is None:
+        cache.add(GEN_KEY, time.time_ns(), None)
+        gen = cache.get(GEN_KEY)
+    return gen
+
+
+def invalidar_facetas():
+    """Descarta todos los conteos cuando la transacción en curso confirme."""
+    transaction.on_commit(lambda: cache.set(GEN_KEY, time.time_ns(), None))
+
+
+def clave_filtros(filtros):
+    """Clave estable de los filtros que afectan los conteos (el orden no influye)."""
+    normalizados = {
+        'q': terminos_consulta(filtros['q']),
+        'rut': limpiar_rut(filtros['rut']),
+        **{clave: filtros[clave] for clave, _ in DIMENSIONES.values()},
+    }
+    return hashlib.md5(json.dumps(normalizados, sort_keys=True).encode()).hexdigest()
+
+
+def _contar(filtros, alias):
+    conteos = {}
+    for faceta, (clave, columna) in DIMENSIONES.items():
+        # Cada faceta ignora su propio filtro para mostrar las alternativas
+        qs = filtrar_trabajadores(Trabajador.objects.using(alias), {**filtros, clave: '', 'order': 'name_asc'})
+        filas = qs.order_by().values_list(columna).annotate(total=Count('id'))
+        conteos[faceta] = {valor: total for valor, total in filas if valor is not None}
+    return conteos
+
+
+def conteos_facetas(filtros):
+    """`{faceta: {valor: total}}` para los filtros dados (ver `leer_filtros_trabajadores`)."""
+    key = f'{CACHE_PREFIX}:{generacion()}:{clave_filtros(filtros)}'
+    conteos = cache.get(key)
+    if conteos is None:
+        # Réplica en vistas `@lectura_en_replica`; primaria si el request o el usuario escribió
+        conteos = _contar(filtros, alias_lectura(Trabajador))
+        cache.set(key, conteos, _timeout())
+    return conteos
+
+
+def opciones_facetas(filtros):
+    """Opciones de cada filtro con su conteo: `{faceta: [{'id', 'nombre', 'total'}]}`."""
+    conteos = conteos_facetas(filtros)
+    catalogo = {
+        'area': catalogos.areas(),
+        'depto': catalogos.departamentos(),
+        'cargo': catalogos.cargos(),
+    }
+    opciones = {
+        faceta: [
+            {'id': obj.pk, 'nombre': obj.nombre, 'total': conteos[faceta].get(obj.pk, 0)}
+            for obj in objetos
+        ]
+        for faceta, objetos in catalogo.items()
+    }
+    opciones['sexo'] = [
+        {'id': valor, 'nombre': nombre, 'total': conteos['sexo'].get(valor, 0)}
+        for valor, nombre in Trabajador._meta.get_field('sexo').choices
+    ]
+    return opciones
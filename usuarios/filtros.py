@@ -0,0 +1,69 @@
+"""Lectura y aplicación de los filtros del listado de trabajadores.
+
+Compartido por `lista_trabajadores`, la API REST y las exportaciones para
+que todos interpreten los mismos parámetros GET (`q`, `rut`, `area`,
+`cargo`, `depto`, `sexo`, `order`) de la misma forma.
+"""
+from .busqueda import buscar_trabajadores
+from .rut import filtrar_por_rut
+
+# Orden: el último campo (id) desempata y hace estable el cursor
+ORDEN_TRABAJADORES = {
+    'name_asc': ['apellidos', 'nombres', 'id'],
+    'name_desc': ['-apellidos', '-nombres', '-id'],
+    'date_asc': ['fecha_ingreso', 'id'],
+    'date_desc': ['-fecha_ingreso', '-id'],
+    'relevance': ['-relevancia', 'apellidos', 'nombres', 'id'],
+}
+SEXOS = ('M', 'F', 'O')
+
+
+def _id(valor):
+    """Devuelve el id si es numérico; cualquier otro valor se ignora."""
+    valor = (valor or '').strip()
+    return valor if valor.isdigit() else ''
+
+
+def leer_filtros_trabajadores(params):
+    """Normaliza los parámetros GET del listado en un diccionario de filtros."""
+    filtros = {
+        'q': params.get('q', '').strip(),
+        'rut': params.get('rut', '').strip(),
+        'area': _id(params.get('area')),
+        'cargo': _id(params.get('cargo')),
+        'depto': _id(params.get('depto')),
+        'sexo': params.get('sexo', '').strip(),
+        'order': params.get('order', 'name_asc'),
+    }
+    if filtros['sexo'] not in SEXOS:
+        filtros['sexo'] = ''
+    if filtros['order'] not in ORDEN_TRABAJADORES or (filtros['order'] == 'relevance' and not filtros['q']):
+        filtros['order'] = 'name_asc'
+    return filtros
+
+
+def hay_filtros(filtros):
+    """True si algún filtro (distinto del orden) está activo."""
+    return any(v for k, v in filtros.items() if k != 'order')
+
+
+def filtrar_trabajadores(queryset, filtros):
+    """Aplica los filtros y el orden de `filtros` a un queryset de `Trabajador`."""
+    if filtros['q']:
+        queryset = buscar_trabajadores(queryset, filtros['q'])
+    if filtros['rut']:
+        queryset = filtrar_por_rut(queryset, filtros['rut'])
+    if filtros['area']:
+        queryset = queryset.filter(area_id=filtros['area'])
+    if filtros['cargo']:
+        queryset = queryset.filter(cargo_id=filtros['cargo'])
+    if filtros['depto']:
+        queryset = queryset.filter(departamento_id=filtros['depto'])
+    if filtros['sexo']:
+        queryset = queryset.filter(sexo=filtros['sexo'])
+    return queryset.order_by(*orden_trabajadores(filtros))
+
+
+def orden_trabajadores(filtros):
+    """Lista de campos de orden correspondiente a `filtros['order']`."""
+    return ORDEN_TRABAJADORES[filtros['order']]
@@ -1,14 +1,177 @@
 """Formularios para creación y edición de entidades de la app Usuarios."""
 from django import forms
+from django.db import transaction
 from django.forms import inlineformset_factory
+from django.forms.models import BaseInlineFormSet, ModelChoiceIterator
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.urls import reverse
+from django.utils.functional import cached_property
 from .models import Area, Departamento, Cargo, Trabajador
 from datetime import date
 from .models import Trabajador, ContactoEmergencia, CargaFamiliar
+from .rut import validar_rut
+from .catalogos import catalogos, departamentos_de_area, obtener
 
-class TrabajadorCreateForm(forms.ModelForm):
+
+class CatalogoChoiceIterator(ModelChoiceIterator):
+    """Itera las opciones desde la caché de catálogos en lugar del queryset."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in catalogos()[self.field.catalogo]:
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(catalogos()[self.field.catalogo]) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(catalogos()[self.field.catalogo])
+
+
+class CatalogoChoiceField(forms.ModelChoiceField):
+    """`ModelChoiceField` que renderiza y valida contra la caché de catálogos.
+
+    No consulta la base de datos ni al mostrar las opciones ni al validar
+    el id enviado.
+    """
+    iterator = CatalogoChoiceIterator
+    modelos = {'areas': Area, 'departamentos': Departamento, 'cargos': Cargo}
+
+    def __init__(self, catalogo, **kwargs):
+        self.catalogo = catalogo
+        super().__init__(queryset=self.modelos[catalogo].objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        self.validate_no_null_characters(value)
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            obj = obtener(self.catalogo, int(value))
+        except (TypeError, ValueError):
+            obj = None
+        if obj is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return obj
+
+class DepartamentosDelAreaIterator(CatalogoChoiceIterator):
+    """Solo los departamentos del área elegida en el formulario."""
+
+    def _departamentos(self):
+        return departamentos_de_area(self.field.area_id) if self.field.area_id else []
+
+    def __iter__(self):
+        yield ("", self.field.empty_label if self.field.area_id else 'Elige primero un área')
+        for obj in self._departamentos():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self._departamentos()) + 1
+
+    def __bool__(self):
+        return True
+
+
+class DepartamentoChoiceField(CatalogoChoiceField):
+    """Departamento que se carga según el área: el HTML solo trae los del área elegida.
+
+    Al cambiar el área, `departamentos_por_area.js` pide las opciones a
+    `api_catalogo_departamentos`. Valida por id contra la caché de catálogos;
+    la pertenencia al área la revisa `DepartamentoDelAreaMixin.clean`.
+    """
+    iterator = DepartamentosDelAreaIterator
+
+    def __init__(self, **kwargs):
+        self.area_id = None
+        super().__init__('departamentos', **kwargs)
+        self.queryset = Departamento.objects.con_area()
+
+    def label_from_instance(self, obj):
+        return obj.nombre
+
+
+class DepartamentoDelAreaMixin:
+    """Formularios con `area` y `departamento` dependientes (ver `DepartamentoChoiceField`)."""
+
+    def preparar_departamento(self):
+        area = self.data.get(self.add_prefix('area')) if self.is_bound else (
+            self.initial.get('area') or getattr(getattr(self, 'instance', None), 'area_id', None)
+        )
+        try:
+            area_id = int(getattr(area, 'pk', area))
+        except (TypeError, ValueError):
+            area_id = None
+        campo = self.fields['departamento']
+        campo.area_id = area_id
+        campo.widget.attrs.update({
+            'data-departamentos-url': reverse('usuarios:api_catalogo_departamentos'),
+            'data-area': self['area'].auto_id,
+        })
+
+    def clean(self):
+        cleaned = super().clean()
+        area = cleaned.get('area')
+        departamento = cleaned.get('departamento')
+        if area and departamento and departamento.area_id != area.id:
+            self.add_error('departamento', 'El departamento no pertenece al área seleccionada.')
+        return cleaned
+
+
+class RutValidadoMixin:
+    """Valida el dígito verificador de `rut` solo si el formulario lo cambia.
+
+    Hay trabajadores con RUT heredado de DV inválido (`rut_normalizado` en
+    NULL): editar el resto de su perfil no exige corregirlo, pero un RUT
+    nuevo o modificado debe ser válido.
+    """
+
+    def clean_rut(self):
+        rut = self.cleaned_data.get('rut')
+        if 'rut' in self.changed_data:
+            validar_rut(rut)
+        return rut
+
+
+class BuscarUsuarioWidget(forms.Widget):
+    """Id oculto más un buscador que consulta `api_usuarios_sin_trabajador`."""
+    template_name = 'usuarios/widgets/buscar_usuario.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        etiqueta = ''
+        if str(value or '').isdigit():
+            # Una consulta por el usuario ya elegido (al re-mostrar el formulario con errores)
+            etiqueta = get_user_model().objects.filter(pk=value).values_list('username', flat=True).first() or ''
+        context['widget'].update({'url': reverse('usuarios:api_usuarios_sin_trabajador'), 'etiqueta': etiqueta})
+        return context
+
+
+class UsuarioSinTrabajadorField(forms.ModelChoiceField):
+    """Usuario aún no vinculado a un `Trabajador`, elegido por id.
+
+    No genera la lista completa de usuarios libres como opciones: el widget
+    busca por prefijo y al validar se consulta solo el id enviado.
+    """
+    widget = BuscarUsuarioWidget
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=get_user_model().objects.filter(trabajador__isnull=True), **kwargs)
+
+
+class TrabajadorCreateForm(RutValidadoMixin, DepartamentoDelAreaMixin, forms.ModelForm):
     """Formulario de alta administrativa de `Trabajador`."""
+    user = UsuarioSinTrabajadorField(label='Usuario')
+    area = CatalogoChoiceField('areas', required=False)
+    departamento = DepartamentoChoiceField(required=False)
+    cargo = CatalogoChoiceField('cargos', required=False)
+
     class Meta:
         model = Trabajador
         fields = [
@@ -18,11 +181,9 @@ class TrabajadorCreateForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Solo usuarios que no estén ya vinculados a un Trabajador
-        UserModel = get_user_model()
-        self.fields['user'].queryset = UserModel.objects.filter(trabajador__isnull=True).order_by('username')
+        self.preparar_departamento()
 
-class TrabajadorPersonalForm(forms.ModelForm):
+class TrabajadorPersonalForm(RutValidadoMixin, forms.ModelForm):
     """Formulario para que el propio trabajador edite datos personales."""
     class Meta:
         model = Trabajador
@@ -40,10 +201,100 @@ class CargaFamiliarForm(forms.ModelForm):
         model = CargaFamiliar
         fields = ['nombre', 'parentesco', 'fecha_nacimiento']
 
+class FilaCargadaField(forms.ModelChoiceField):
+    """Campo oculto `id` de un formset: valida contra las filas ya cargadas.
+
+    El `ModelChoiceField` de Django hace un `get()` por formulario; este
+    busca el id en las filas que el formset ya leyó en una sola consulta.
+    """
+
+    def __init__(self, formset, **kwargs):
+        self.formset = formset
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        self.validate_no_null_characters(value)
+        if isinstance(value, self.queryset.model):
+            return value
+        try:
+            obj = self.formset.filas_por_pk.get(self.queryset.model._meta.pk.to_python(value))
+        except forms.ValidationError:
+            obj = None
+        if obj is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return obj
+
+
+class CambiosEnBloqueFormSet(BaseInlineFormSet):
+    """Formset en línea que guarda solo las diferencias, en bloque.
+
+    Compara cada formulario con la fila cargada y aplica los cambios con
+    un `bulk_create` (nuevos), un `bulk_update` (modificados, solo las
+    columnas cambiadas) y un `DELETE ... IN` (marcados para borrar), en una
+    transacción. Los formularios sin cambios no generan consultas. Como
+    `bulk_create`, no dispara señales `pre_save`/`post_save`.
+    """
+
+    @cached_property
+    def filas_por_pk(self):
+        """`{pk: fila}` de las filas cargadas (`get_queryset` ya está en memoria)."""
+        return {obj.pk: obj for obj in self.get_queryset()}
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        campo = form.fields[self._pk_field.name]
+        form.fields[self._pk_field.name] = FilaCargadaField(
+            self, queryset=campo.queryset, initial=campo.initial, required=False, widget=campo.widget
+        )
+
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+        nuevos, modificados, borrados, columnas = [], [], [], set()
+        for form in self.initial_forms:
+            obj = form.instance
+            if obj.pk is None:
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                borrados.append(obj)
+            elif form.has_changed():
+                modificados.append((form.save(commit=False), form.changed_data))
+                columnas.update(form.changed_data)
+        for form in self.extra_forms:
+            if not form.has_changed() or (self.can_delete and self._should_delete_form(form)):
+                continue
+            obj = form.save(commit=False)
+            setattr(obj, self.fk.name, self.instance)
+            nuevos.append(obj)
+
+        if nuevos or modificados or borrados:
+            manager = self.model._default_manager
+            with transaction.atomic():
+                if borrados:
+                    manager.filter(
+                        **{self.fk.name: self.instance}, pk__in=[obj.pk for obj in borrados]
+                    ).delete()
+                if modificados:
+                    manager.bulk_update([obj for obj, _ in modificados], sorted(columnas))
+                if nuevos:
+                    manager.bulk_create(nuevos)
+
+        self.new_objects = nuevos
+        self.changed_objects = modificados
+        self.deleted_objects = borrados
+        return nuevos + [obj for obj, _ in modificados]
+
+
 # Formset para gestionar múltiples contactos con un mismo trabajador
 ContactoFormSet = inlineformset_factory(
     Trabajador, ContactoEmergencia,
-    form=ContactoEmergenciaForm, extra=1, can_delete=True
+    form=ContactoEmergenciaForm, formset=CambiosEnBloqueFormSet, extra=1, can_delete=True
 )
 
 
@@ -71,15 +322,15 @@ class UsuarioCreateForm(UserCreationForm):
         return email
 
 
-class UsuarioSignupForm(UsuarioCreateForm):
+class UsuarioSignupForm(DepartamentoDelAreaMixin, UsuarioCreateForm):
     nombres = forms.CharField(max_length=120)
     apellidos = forms.CharField(max_length=120)
     sexo = forms.ChoiceField(choices=Trabajador._meta.get_field('sexo').choices)
-    rut = forms.CharField(max_length=12, required=False)
+    rut = forms.CharField(max_length=12, required=False, validators=[validar_rut])
     fecha_ingreso = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
-    area = forms.ModelChoiceField(queryset=Area.objects.all(), required=False)
-    departamento = forms.ModelChoiceField(queryset=Departamento.objects.all(), required=False)
-    cargo = forms.ModelChoiceField(queryset=Cargo.objects.all(), required=False)
+    area = CatalogoChoiceField('areas', required=False)
+    departamento = DepartamentoChoiceField(required=False)
+    cargo = CatalogoChoiceField('cargos', required=False)
 
     class Meta(UsuarioCreateForm.Meta):
         fields = (
@@ -95,17 +346,21 @@ class UsuarioSignupForm(UsuarioCreateForm):
             attrs = getattr(widget, 'attrs', {})
             attrs.update({'class': 'form-control'})
             widget.attrs = attrs
+        self.preparar_departamento()
 
-    def clean(self):
-        cleaned = super().clean()
-        area = cleaned.get('area')
-        departamento = cleaned.get('departamento')
-        if area and departamento and departamento.area_id != area.id:
-            self.add_error('departamento', 'El departamento no pertenece al área seleccionada.')
-        return cleaned
+class ImportarTrabajadoresForm(forms.Form):
+    """Carga de un archivo CSV/XLSX para la importación masiva de trabajadores."""
+    archivo = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}))
+    dry_run = forms.BooleanField(required=False, label='Solo validar (no insertar)')
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Formato no soportado: usa .csv o .xlsx.')
+        return archivo
 
 # Formset para gestionar múltiples cargas familiares
 CargaFormSet = inlineformset_factory(
     Trabajador, CargaFamiliar,
-    form=CargaFamiliarForm, extra=1, can_delete=True
+    form=CargaFamiliarForm, formset=CambiosEnBloqueFormSet, extra=1, can_delete=True
 )
@@ -0,0 +1,452 @@
+"""Importación masiva de trabajadores desde CSV o XLSX.
+
+Cada fila crea un `User` (grupo Trabajador), su `Trabajador` y,
+opcionalmente, un contacto de emergencia y una carga familiar. Las filas
+se validan contra los catálogos en memoria (`usuarios.catalogos`) y se
+insertan con `bulk_create` en lotes, cada lote en su propia transacción.
+Las filas con errores no se insertan y se informan en el reporte.
+
+Como `bulk_create` no dispara señales, el índice de búsqueda, los
+contadores y los conteos por faceta se actualizan explícitamente por lote.
+"""
+import csv
+import io
+from datetime import date, datetime
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, connection, transaction
+from django.db.models.functions import Lower
+
+from . import catalogos
+from .busqueda import indexar_lote, normalizar
+from .contadores import ajustar
+from .facetas import invalidar_facetas
+from .models import CargaFamiliar, ContactoEmergencia, Trabajador
+from .roles import TRABAJADOR
+from .rut import normalizar_rut, validar_rut
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # XLSX es opcional
+    load_workbook = None
+
+COLUMNAS = [
+    'username', 'email', 'nombres', 'apellidos', 'rut', 'sexo', 'fecha_ingreso',
+    'area', 'departamento', 'cargo', 'telefono', 'direccion',
+    'contacto_nombre', 'contacto_parentesco', 'contacto_telefono',
+    'carga_nombre', 'carga_parentesco', 'carga_fecha_nacimiento',
+]
+OBLIGATORIAS = ('username', 'email', 'nombres', 'apellidos')
+SEXOS = {'m': 'M', 'masculino': 'M', 'f': 'F', 'femenino': 'F', 'o': 'O', 'otro': 'O'}
+FORMATOS_FECHA = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+TAMANO_LOTE = 1000
+
+
+class ErrorArchivo(Exception):
+    """El archivo no se puede leer (formato no soportado, sin encabezados...)."""
+
+
+class ResultadoImportacion:
+    """Resumen de una importación: filas leídas, creadas y errores por fila."""
+
+    def __init__(self):
+        self.leidas = 0
+        self.creadas = 0
+        self.errores = []  # (fila, campo, mensaje)
+
+    def error(self, fila, campo, mensaje):
+        self.errores.append((fila, campo, mensaje))
+
+    @property
+    def filas_con_error(self):
+        return len({fila for fila, _, _ in self.errores})
+
+
+# ------------------------------------------------------------------
+# Lectura
+# ------------------------------------------------------------------
+
+def _clave(valor):
+    """Nombre comparable: sin acentos, minúsculas y espacios simples."""
+    return ' '.join(normalizar(str(valor or '')).split())
+
+
+def _encabezado(valor):
+    return _clave(valor).replace(' ', '_')
+
+
+def _leer_csv(archivo):
+    if isinstance(archivo, (bytes, bytearray)):
+        archivo = io.BytesIO(archivo)
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.reader(texto, dialecto)
+    encabezados = next(lector, None)
+    if not encabezados:
+        raise ErrorArchivo('El archivo está vacío.')
+    encabezados = [_encabezado(h) for h in encabezados]
+    for valores in lector:
+        if any(v.strip() for v in valores):
+            yield dict(zip(encabezados, valores))
+        else:
+            yield None
+
+
+def _leer_xlsx(archivo):
+    if load_workbook is None:
+        raise ErrorArchivo('Para importar XLSX instala openpyxl (pip install openpyxl) o usa CSV.')
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = next(filas, None)
+        if not encabezados:
+            raise ErrorArchivo('El archivo está vacío.')
+        encabezados = [_encabezado(h) for h in encabezados]
+        for valores in filas:
+            if any(v not in (None, '') for v in valores):
+                yield {h: ('' if v is None else v) for h, v in zip(encabezados, valores)}
+            else:
+                yield None
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """Itera las filas de `archivo` (binario) como diccionarios columna → valor.
+
+    El formato se deduce de la extensión de `nombre`. Las filas vacías se
+    entregan como `None` para conservar la numeración del reporte.
+    """
+    nombre = (nombre or '').lower()
+    if nombre.endswith('.xlsx'):
+        return _leer_xlsx(archivo)
+    if nombre.endswith('.csv') or nombre.endswith('.txt'):
+        return _leer_csv(archivo)
+    raise ErrorArchivo('Formato no soportado: usa .csv o .xlsx.')
+
+
+# ------------------------------------------------------------------
+# Validación
+# ------------------------------------------------------------------
+
+def texto_celda(fila, columna):
+    """Valor de `columna` como texto recortado (enteros de Excel sin `.0`)."""
+    valor = fila.get(columna)
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    valor = str(valor or '').strip()
+    if not valor:
+        return None
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(valor)
+
+
+class _Catalogo:
+    """Mapas nombre normalizado → id de los catálogos, construidos una vez."""
+
+    def __init__(self):
+        datos = catalogos.catalogos()
+        self.areas = {_clave(a.nombre): a.pk for a in datos['areas']}
+        self.cargos = {_clave(c.nombre): c.pk for c in datos['cargos']}
+        self.departamentos = {}  # (area_id, nombre) → id
+        self.departamentos_por_nombre = {}  # nombre → [(id, area_id)]
+        for d in datos['departamentos']:
+            clave = _clave(d.nombre)
+            self.departamentos[(d.area_id, clave)] = d.pk
+            self.departamentos_por_nombre.setdefault(clave, []).append((d.pk, d.area_id))
+
+
+@lru_cache(maxsize=None)
+def _largos_maximos():
+    """Columna → `max_length` del campo donde se guarda."""
+    User = get_user_model()
+    destinos = {
+        'username': (User, 'username'),
+        'email': (User, 'email'),
+        'nombres': (Trabajador, 'nombres'),
+        'apellidos': (Trabajador, 'apellidos'),
+        'rut': (Trabajador, 'rut'),
+        'telefono': (Trabajador, 'telefono'),
+        'direccion': (Trabajador, 'direccion'),
+        'contacto_nombre': (ContactoEmergencia, 'nombre'),
+        'contacto_parentesco': (ContactoEmergencia, 'parentesco'),
+        'contacto_telefono': (ContactoEmergencia, 'telefono'),
+        'carga_nombre': (CargaFamiliar, 'nombre'),
+        'carga_parentesco': (CargaFamiliar, 'parentesco'),
+    }
+    return {columna: modelo._meta.get_field(campo).max_length for columna, (modelo, campo) in destinos.items()}
+
+
+def validar_largos(numero, datos, resultado):
+    """Registra las columnas de `datos` más largas que su campo (MySQL estricto las rechaza)."""
+    for columna, largo in _largos_maximos().items():
+        valor = datos.get(columna)
+        if valor and len(valor) > largo:
+            resultado.error(numero, columna, f'Máximo {largo} caracteres (tiene {len(valor)}).')
+
+
+def _validar(numero, fila, catalogo, resultado):
+    """Convierte una fila en los kwargs de cada modelo o registra sus errores."""
+    errores_previos = len(resultado.errores)
+    datos = {c: texto_celda(fila, c) for c in COLUMNAS if c not in ('fecha_ingreso', 'carga_fecha_nacimiento')}
+
+    for campo in OBLIGATORIAS:
+        if not datos[campo]:
+            resultado.error(numero, campo, 'Campo obligatorio.')
+    validar_largos(numero, datos, resultado)
+    if datos['email']:
+        try:
+            validate_email(datos['email'])
+        except ValidationError:
+            resultado.error(numero, 'email', 'Email inválido.')
+
+    sexo = SEXOS.get(datos['sexo'].lower() or 'o')
+    if sexo is None:
+        resultado.error(numero, 'sexo', 'Usa M, F u O.')
+
+    if datos['rut']:
+        try:
+            validar_rut(datos['rut'])
+        except ValidationError as exc:
+            resultado.error(numero, 'rut', exc.messages[0])
+
+    fechas = {}
+    for campo in ('fecha_ingreso', 'carga_fecha_nacimiento'):
+        try:
+            fechas[campo] = _fecha(fila.get(campo))
+        except ValueError:
+            resultado.error(numero, campo, 'Fecha inválida (usa AAAA-MM-DD o DD-MM-AAAA).')
+
+    area_id = depto_id = cargo_id = None
+    if datos['area']:
+        area_id = catalogo.areas.get(_clave(datos['area']))
+        if area_id is None:
+            resultado.error(numero, 'area', f"Área inexistente: {datos['area']}.")
+    if datos['cargo']:
+        cargo_id = catalogo.cargos.get(_clave(datos['cargo']))
+        if cargo_id is None:
+            resultado.error(numero, 'cargo', f"Cargo inexistente: {datos['cargo']}.")
+    if datos['departamento']:
+        clave = _clave(datos['departamento'])
+        candidatos = catalogo.departamentos_por_nombre.get(clave, [])
+        if not candidatos:
+            resultado.error(numero, 'departamento', f"Departamento inexistente: {datos['departamento']}.")
+        elif area_id is not None:
+            depto_id = catalogo.departamentos.get((area_id, clave))
+            if depto_id is None:
+                resultado.error(numero, 'departamento', 'El departamento no pertenece al área seleccionada.')
+        elif not datos['area']:
+            if len(candidatos) > 1:
+                resultado.error(numero, 'departamento', 'Departamento ambiguo: indica el área.')
+            else:
+                depto_id, area_id = candidatos[0]
+
+    if datos['contacto_nombre'] and not (datos['contacto_parentesco'] and datos['contacto_telefono']):
+        resultado.error(numero, 'contacto_nombre', 'El contacto requiere parentesco y teléfono.')
+    if datos['carga_nombre'] and not datos['carga_parentesco']:
+        resultado.error(numero, 'carga_nombre', 'La carga requiere parentesco.')
+
+    if len(resultado.errores) > errores_previos:
+        return None
+    return {
+        'numero': numero,
+        'username': datos['username'],
+        'email': datos['email'],
+        'trabajador': {
+            'nombres': datos['nombres'],
+            'apellidos': datos['apellidos'],
+            'rut': datos['rut'] or None,
+            'rut_normalizado': normalizar_rut(datos['rut']),
+            'sexo': sexo,
+            'fecha_ingreso': fechas['fecha_ingreso'] or date.today(),
+            'area_id': area_id,
+            'departamento_id': depto_id,
+            'cargo_id': cargo_id,
+            'telefono': datos['telefono'],
+            'direccion': datos['direccion'],
+        },
+        'contactos': [{
+            'nombre': datos['contacto_nombre'],
+            'parentesco': datos['contacto_parentesco'],
+            'telefono': datos['contacto_telefono'],
+        }] if datos['contacto_nombre'] else [],
+        'cargas': [{
+            'nombre': datos['carga_nombre'],
+            'parentesco': datos['carga_parentesco'],
+            'fecha_nacimiento': fechas['carga_fecha_nacimiento'],
+        }] if datos['carga_nombre'] else [],
+    }
+
+
+def _usados(campo, valores):
+    """Valores de `campo` de `User` ya usados entre `valores`, en minúsculas.
+
+    La colación de MySQL ya ignora mayúsculas y así `IN` aprovecha el índice
+    (único en username, `0008` en email); en otros motores se compara `LOWER()`.
+    """
+    User = get_user_model()
+    valores = [v for v in valores if v]
+    if not valores:
+        return set()
+    if connection.vendor == 'mysql':
+        usados = User.objects.filter(**{f'{campo}__in': valores}).values_list(campo, flat=True)
+    else:
+        usados = (
+            User.objects.annotate(minuscula=Lower(campo))
+            .filter(minuscula__in=[v.lower() for v in valores]).values_list(campo, flat=True)
+        )
+    return {u.lower() for u in usados}
+
+
+def descartar_existentes(lote, resultado):
+    """Quita del lote las filas cuyo usuario o email ya existe en la base (sin distinguir mayúsculas)."""
+    usernames = _usados('username', [f['username'] for f in lote])
+    emails = _usados('email', [f['email'] for f in lote])
+    validas = []
+    for fila in lote:
+        if fila['username'].lower() in usernames:
+            resultado.error(fila['numero'], 'username', 'Ya existe un usuario con este nombre.')
+        elif fila['email'] and fila['email'].lower() in emails:
+            resultado.error(fila['numero'], 'email', 'Ya existe un usuario con este email.')
+        else:
+            validas.append(fila)
+    return validas
+
+
+# ------------------------------------------------------------------
+# Inserción
+# ------------------------------------------------------------------
+
+def insertar_lote(lote, password_hash, grupo, indexar=True):
+    """Inserta un lote de filas ya validadas en una transacción y devuelve cuántas creó.
+
+    Cada fila es un diccionario con `username`, `email`, `trabajador`
+    (kwargs del modelo) y las listas `contactos` y `cargas`; opcionalmente
+    `password` (hash propio en vez de `password_hash`) y `grupos` (ids de
+    grupo en vez de `grupo`). También lo usan `seed_scale` para generar
+    datos de volumen y `usuarios.aprovisionamiento`.
+    """
+    User = get_user_model()
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(username=f['username'], email=f['email'], password=f.get('password', password_hash))
+            for f in lote
+        ])
+        # MySQL no devuelve los ids de bulk_create: se leen por username
+        user_ids = dict(
+            User.objects.filter(username__in=[f['username'] for f in lote]).values_list('username', 'id')
+        )
+        Trabajador.objects.bulk_create([
+            Trabajador(user_id=user_ids[f['username']], **f['trabajador']) for f in lote
+        ])
+        trabajador_ids = dict(
+            Trabajador.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id')
+        )
+        por_defecto = [grupo.pk] if grupo is not None else []
+        contactos, cargas, membresias = [], [], []
+        for f in lote:
+            user_id = user_ids[f['username']]
+            trabajador_id = trabajador_ids[user_id]
+            contactos.extend(ContactoEmergencia(trabajador_id=trabajador_id, **c) for c in f['contactos'])
+            cargas.extend(CargaFamiliar(trabajador_id=trabajador_id, **c) for c in f['cargas'])
+            membresias.extend(
+                User.groups.through(user_id=user_id, group_id=gid) for gid in f.get('grupos', por_defecto)
+            )
+        User.groups.through.objects.bulk_create(membresias)
+        ContactoEmergencia.objects.bulk_create(contactos)
+        CargaFamiliar.objects.bulk_create(cargas)
+        if indexar:
+            indexar_lote([
+                (trabajador_ids[user_ids[f['username']]], f['trabajador']['nombres'],
+                 f['trabajador']['apellidos'], f['trabajador']['rut'])
+                for f in lote
+            ])
+        ajustar('usuarios', len(lote))
+        ajustar('trabajadores', len(lote))
+        invalidar_facetas()
+    return len(lote)
+
+
+def importar_trabajadores(filas, batch_size=TAMANO_LOTE, dry_run=False, password=None):
+    """Valida e importa `filas` (ver `leer_filas`) y devuelve un `ResultadoImportacion`.
+
+    Sin `password` los usuarios quedan con contraseña inutilizable (deben
+    definirla con "olvidé mi contraseña" o un administrador); con
+    `password` se usa un único hash compartido. En ambos casos el hash se
+    calcula una sola vez por importación. Con `dry_run` solo se valida.
+    """
+    resultado = ResultadoImportacion()
+    catalogo = _Catalogo()
+    password_hash = make_password(password or None)
+    grupo = None if dry_run else Group.objects.get_or_create(name=TRABAJADOR)[0]
+    vistos_username, vistos_email = set(), set()
+    lote = []
+
+    def procesar(lote):
+        validas = descartar_existentes(lote, resultado)
+        if dry_run or not validas:
+            return len(validas)
+        try:
+            return insertar_lote(validas, password_hash, grupo)
+        except DatabaseError as exc:
+            # El lote se revirtió completo; los lotes anteriores quedan confirmados
+            for f in validas:
+                resultado.error(f['numero'], '', f'Lote no insertado: {exc}')
+            return 0
+
+    # La fila 1 es el encabezado
+    for numero, fila in enumerate(filas, start=2):
+        if fila is None:
+            continue
+        resultado.leidas += 1
+        datos = _validar(numero, fila, catalogo, resultado)
+        if datos is None:
+            continue
+        # Sin distinguir mayúsculas, como la colación de MySQL
+        if datos['username'].lower() in vistos_username:
+            resultado.error(numero, 'username', 'Usuario repetido en el archivo.')
+            continue
+        if datos['email'].lower() in vistos_email:
+            resultado.error(numero, 'email', 'Email repetido en el archivo.')
+            continue
+        vistos_username.add(datos['username'].lower())
+        vistos_email.add(datos['email'].lower())
+        lote.append(datos)
+        if len(lote) >= batch_size:
+            resultado.creadas += procesar(lote)
+            lote = []
+    if lote:
+        resultado.creadas += procesar(lote)
+    resultado.errores.sort(key=lambda e: e[0])
+    return resultado
+
+
+def escribir_reporte(resultado, destino):
+    """Escribe los errores de `resultado` como CSV (fila, campo, mensaje) en `destino`."""
+    writer = csv.writer(destino)
+    writer.writerow(['fila', 'campo', 'mensaje'])
+    writer.writerows(resultado.errores)
@@ -0,0 +1,184 @@
+"""Instrumentación de SQL y tiempos por request.
+
+`RegistroSQL` se instala con `connection.execute_wrapper` y acumula, con
+costo mínimo por consulta, la cantidad de consultas, el tiempo SQL, las
+consultas duplicadas (mismo SQL y parámetros) y las formas repetidas
+(mismo SQL con distintos parámetros, típico de un N+1). El análisis de
+formas se hace una sola vez al final, sobre los SQL distintos.
+
+La usan `InstrumentacionMiddleware` (cabecera `Server-Timing` y log de
+requests lentos) y `usuarios.benchmark`. El tiempo de plantillas lo suman
+`render_medido` (vistas de la app) y `medir_template_response`
+(`TemplateResponse`), sin parchar el backend de plantillas.
+"""
+import contextvars
+import re
+import time
+from collections import Counter
+from collections.abc import Mapping
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.shortcuts import render
+
+# Listas IN (...) y VALUES (...) de largo variable se agrupan en una misma forma
+_LISTA = re.compile(r'\((?:%s, )*%s\)')
+
+_actual = contextvars.ContextVar('usuarios_registro_sql', default=None)
+
+
+def _clave_parametros(params):
+    # Parámetros con nombre (`%(x)s`): `tuple(dict)` guardaría solo las claves
+    if isinstance(params, Mapping):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+class RegistroSQL:
+    """`execute_wrapper` que cuenta consultas, tiempo SQL, duplicados y formas.
+
+    Duplicados y formas guardan a lo más `max_distintas` SQL y combinaciones
+    de SQL y parámetros distintas (un import o un request patológico no
+    acumula memoria sin límite); pasado el tope solo se siguen contando las
+    ya vistas y `truncado` queda en True. Con `max_distintas=0` solo se
+    cuentan consultas y tiempo.
+    """
+
+    def __init__(self, max_distintas=1000):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.plantillas = 0.0  # segundos renderizando plantillas
+        self.conexiones = 0  # conexiones abiertas contra la base (ver `usuarios.conexiones`)
+        self.secciones = {}  # nombre → (consultas, segundos SQL), ver `seccion`
+        self.max_distintas = max_distintas
+        self.truncado = False  # duplicados y formas son parciales
+        self._sql = Counter()
+        self._exactas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+            if self.max_distintas:
+                self._anotar(self._sql, sql)
+                if not many and params is not None:
+                    try:
+                        self._anotar(self._exactas, (sql, _clave_parametros(params)))
+                    except TypeError:  # parámetros no hashables
+                        pass
+
+    def _anotar(self, contador, clave):
+        if clave in contador or len(contador) < self.max_distintas:
+            contador[clave] += 1
+        else:
+            self.truncado = True
+
+    @property
+    def duplicadas(self):
+        """Consultas idénticas (SQL y parámetros) ejecutadas más de una vez, sin contar la primera."""
+        return sum(n - 1 for n in self._exactas.values() if n > 1)
+
+    def formas_repetidas(self, minimo=5):
+        """`[(forma, veces)]` de SQL repetido al menos `minimo` veces (posibles N+1)."""
+        formas = Counter()
+        for sql, n in self._sql.items():
+            formas[_LISTA.sub('(...)', sql)] += n
+        return [(forma, n) for forma, n in formas.most_common() if n >= minimo]
+
+
+def registro_actual():
+    """`RegistroSQL` del request en curso, o `None` fuera de `registrar_sql`."""
+    return _actual.get()
+
+
+@contextmanager
+def registrar_sql(registro=None):
+    """Instala `registro` (o uno nuevo) en todas las conexiones durante el bloque."""
+    registro = registro or RegistroSQL()
+    token = _actual.set(registro)
+    try:
+        with _instalar(registro):
+            yield registro
+    finally:
+        _actual.reset(token)
+
+
+@contextmanager
+def seccion(nombre):
+    """Anota en el registro en curso las consultas y el tiempo SQL del bloque como `nombre`.
+
+    El middleware las publica en `Server-Timing` y en el log de requests lentos.
+    """
+    registro = _actual.get()
+    if registro is None:
+        yield
+        return
+    consultas, segundos = registro.consultas, registro.segundos
+    try:
+        yield
+    finally:
+        registro.secciones[nombre] = (registro.consultas - consultas, registro.segundos - segundos)
+
+
+def _instalar(registro):
+    stack = ExitStack()
+    for conexion in connections.all():
+        stack.enter_context(conexion.execute_wrapper(registro))
+    return stack
+
+
+@asynccontextmanager
+async def aregistrar_sql(registro=None):
+    """Versión async de `registrar_sql` para middleware bajo ASGI.
+
+    Las conexiones son por hilo y el ORM async consulta desde el hilo de
+    `sync_to_async` del request: el registro se instala y se retira ahí.
+    """
+    registro = registro or RegistroSQL()
+    token = _actual.set(registro)
+    try:
+        stack = await sync_to_async(_instalar)(registro)
+        try:
+            yield registro
+        finally:
+            await sync_to_async(stack.close)()
+    finally:
+        _actual.reset(token)
+
+
+def render_medido(request, template_name, context=None, **kwargs):
+    """`django.shortcuts.render` que suma el tiempo de render al registro en curso.
+
+    Las vistas de la app renderizan con esta función; las plantillas que
+    incluye (widgets de formularios, `{% include %}`) quedan dentro del tiempo.
+    """
+    inicio = time.perf_counter()
+    try:
+        return render(request, template_name, context, **kwargs)
+    finally:
+        registro = _actual.get()
+        if registro is not None:
+            registro.plantillas += time.perf_counter() - inicio
+
+
+def medir_template_response(response):
+    """Suma al registro en curso el render diferido de un `TemplateResponse`.
+
+    Para `process_template_response`: Django renderiza la respuesta justo
+    después y llama a sus post-render callbacks al terminar (vistas de
+    `django.contrib.auth`, respuestas de DRF).
+    """
+    registro = _actual.get()
+    if registro is None:
+        return response
+    inicio = time.perf_counter()
+
+    def sumar(_response):
+        registro.plantillas += time.perf_counter() - inicio
+
+    response.add_post_render_callback(sumar)
+    return response
@@ -0,0 +1,63 @@
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from usuarios.aprovisionamiento import TAMANO_LOTE, aprovisionar_usuarios, enviar_invitaciones
+from usuarios.importacion import ErrorArchivo, escribir_reporte, leer_filas
+
+
+class Command(BaseCommand):
+    help = "Crea cuentas de usuario en bloque desde un CSV o XLSX (hash en paralelo o invitaciones sin contraseña)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del .csv o .xlsx (username, email, password, grupo, nombres, apellidos)")
+        parser.add_argument('--grupo', default=None, help="Grupo existente para las filas sin columna grupo")
+        parser.add_argument('--invitar', action='store_true',
+                            help="Ignora las contraseñas: cuentas con contraseña inutilizable y enlace de invitación")
+        parser.add_argument('--invitaciones', default=None, help="Ruta del CSV de enlaces (username, email, url)")
+        parser.add_argument('--url-base', default='http://localhost:8000', help="Dominio de los enlaces de invitación")
+        parser.add_argument('--enviar', action='store_true', help="Envía cada invitación por correo")
+        parser.add_argument('--procesos', type=int, default=None, help="Procesos para hashear (por defecto, uno por CPU)")
+        parser.add_argument('--batch-size', type=int, default=TAMANO_LOTE)
+        parser.add_argument('--reporte', default=None, help="Ruta del CSV de errores por fila")
+        parser.add_argument('--dry-run', action='store_true', help="Solo valida, no crea")
+
+    def handle(self, *args, **opts):
+        if (opts['invitaciones'] or opts['enviar']) and not opts['invitar']:
+            raise CommandError("--invitaciones y --enviar requieren --invitar")
+        try:
+            with open(opts['archivo'], 'rb') as archivo:
+                resultado = aprovisionar_usuarios(
+                    leer_filas(archivo, opts['archivo']),
+                    grupo=opts['grupo'],
+                    invitar=opts['invitar'],
+                    procesos=opts['procesos'],
+                    batch_size=opts['batch_size'],
+                    dry_run=opts['dry_run'],
+                )
+        except (OSError, ErrorArchivo) as exc:
+            raise CommandError(str(exc))
+
+        if opts['reporte']:
+            with open(opts['reporte'], 'w', newline='', encoding='utf-8') as destino:
+                escribir_reporte(resultado, destino)
+        else:
+            for fila, campo, mensaje in resultado.errores[:50]:
+                self.stdout.write(self.style.WARNING(f"Fila {fila} [{campo}]: {mensaje}"))
+            if len(resultado.errores) > 50:
+                self.stdout.write(f"... {len(resultado.errores) - 50} errores más (usa --reporte)")
+
+        url_base = opts['url_base'].rstrip('/')
+        if opts['invitaciones']:
+            with open(opts['invitaciones'], 'w', newline='', encoding='utf-8') as destino:
+                writer = csv.writer(destino)
+                writer.writerow(['username', 'email', 'url'])
+                writer.writerows((u, e, f"{url_base}{ruta}") for u, e, ruta in resultado.invitaciones)
+        if opts['enviar'] and resultado.invitaciones:
+            enviadas = enviar_invitaciones(resultado.invitaciones, url_base, settings.DEFAULT_FROM_EMAIL)
+            self.stdout.write(f"Invitaciones enviadas: {enviadas}")
+
+        accion = "válidas" if opts['dry_run'] else "creadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"Filas leídas={resultado.leidas} {accion}={resultado.creadas} con errores={resultado.filas_con_error}"
+        ))
@@ -0,0 +1,134 @@
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from usuarios.benchmark import usuarios_por_rol
+
+
+class Command(BaseCommand):
+    help = ("Compara requests/s de las vistas JSON por la pila WSGI (hilos, como gunicorn --threads) "
+            "y ASGI (asyncio, como uvicorn) sobre una base de prueba sembrada")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rutas', default='api_dashboard,api_trabajadores', help="Rutas de usuarios.urls, separadas por coma")
+        parser.add_argument('--requests', type=int, default=300, help="Requests por ruta y pila")
+        parser.add_argument('--concurrencia', type=int, default=16, help="Requests simultáneos (hilos WSGI / tareas ASGI)")
+        parser.add_argument('--workers', type=int, default=1000, help="Trabajadores sembrados con seed_scale")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--salida', default=None, help="Archivo JSON de resultados")
+
+    def handle(self, *args, **opts):
+        rutas = [r.strip() for r in opts['rutas'].split(',') if r.strip()]
+        total = max(1, opts['requests'])
+        concurrencia = max(1, opts['concurrencia'])
+
+        # Base de datos de prueba aparte: nunca se siembra la base real
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            call_command('seed_scale', workers=opts['workers'], seed=opts['seed'], stdout=io.StringIO())
+            client = Client()
+            client.force_login(usuarios_por_rol()['rrhh'])
+            cookie = f"sessionid={client.cookies['sessionid'].value}"
+            resultados = {}
+            for ruta in rutas:
+                path = reverse(f'usuarios:{ruta}')
+                resultados[ruta] = {
+                    'wsgi': self._resumen(self._wsgi(path, cookie, total, concurrencia)),
+                    'asgi': self._resumen(asyncio.run(self._asgi(path, cookie, total, concurrencia))),
+                }
+                for pila, r in resultados[ruta].items():
+                    self.stdout.write(
+                        f"{ruta:<18} {pila}: {r['rps']:>8.1f} req/s  p50 {r['p50_ms']:.1f} ms  "
+                        f"p95 {r['p95_ms']:.1f} ms  estados {r['estados']}"
+                    )
+        finally:
+            connections.close_all()
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if opts['salida']:
+            with open(opts['salida'], 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS("Medición completada"))
+
+    def _wsgi(self, path, cookie, total, concurrencia):
+        handler = WSGIHandler()
+
+        def uno(_):
+            environ = {'PATH_INFO': path, 'HTTP_COOKIE': cookie, 'SERVER_NAME': 'testserver'}
+            setup_testing_defaults(environ)
+            estado = []
+            inicio = time.perf_counter()
+            respuesta = handler(environ, lambda status, headers: estado.append(status))
+            for _ in respuesta:
+                pass
+            respuesta.close()
+            return time.perf_counter() - inicio, int(estado[0].split()[0])
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            muestras = list(pool.map(uno, range(total)))
+        return muestras, time.perf_counter() - inicio
+
+    async def _asgi(self, path, cookie, total, concurrencia):
+        handler = ASGIHandler()
+        cupos = asyncio.Semaphore(concurrencia)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+
+        async def uno():
+            async with cupos:
+                estado = []
+                cuerpo_enviado = False
+                terminado = asyncio.Event()
+
+                async def receive():
+                    nonlocal cuerpo_enviado
+                    if not cuerpo_enviado:
+                        cuerpo_enviado = True
+                        return {'type': 'http.request', 'body': b'', 'more_body': False}
+                    # Como un servidor: el cliente "se desconecta" al recibir la respuesta
+                    await terminado.wait()
+                    return {'type': 'http.disconnect'}
+
+                async def send(mensaje):
+                    if mensaje['type'] == 'http.response.start':
+                        estado.append(mensaje['status'])
+                    elif mensaje['type'] == 'http.response.body' and not mensaje.get('more_body'):
+                        terminado.set()
+
+                inicio = time.perf_counter()
+                await handler(dict(scope), receive, send)
+                return time.perf_counter() - inicio, estado[0]
+
+        inicio = time.perf_counter()
+        muestras = await asyncio.gather(*(uno() for _ in range(total)))
+        return muestras, time.perf_counter() - inicio
+
+    def _resumen(self, medicion):
+        muestras, segundos = medicion
+        latencias = sorted(m[0] * 1000 for m in muestras)
+        return {
+            'rps': round(len(muestras) / segundos, 1),
+            'p50_ms': round(statistics.median(latencias), 2),
+            'p95_ms': round(latencias[int(len(latencias) * 0.95) - 1 if len(latencias) > 1 else 0], 2),
+            'estados': sorted({m[1] for m in muestras}),
+        }
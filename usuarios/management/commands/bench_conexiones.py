@@ -0,0 +1,67 @@
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import DatabaseError, connections
+from usuarios.conexiones import metricas_conexiones, reiniciar_metricas
+
+
+class Command(BaseCommand):
+    help = ("Simula requests concurrentes (una consulta cada uno) con el ciclo de conexiones de Django "
+            "y reporta conexiones creadas, reutilizadas y esperas del pool según la configuración actual")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests simulados en total")
+        parser.add_argument('--hilos', type=int, default=8, help="Hilos concurrentes (como gunicorn --threads)")
+        parser.add_argument('--database', default='default', help="Alias de la base a medir")
+
+    def handle(self, *args, **opts):
+        alias = opts['database']
+        hilos = max(1, opts['hilos'])
+        total = max(1, opts['requests'])
+        ajustes = connections[alias].settings_dict
+        self.stdout.write(
+            f"{ajustes['ENGINE']} · CONN_MAX_AGE={ajustes['CONN_MAX_AGE']} · "
+            f"CONN_HEALTH_CHECKS={ajustes['CONN_HEALTH_CHECKS']} · pool={ajustes['OPTIONS'].get('pool')}"
+        )
+
+        pendientes = iter(range(total))
+        lock = threading.Lock()
+        errores = []
+
+        def trabajar():
+            try:
+                while True:
+                    with lock:
+                        if next(pendientes, None) is None:
+                            return
+                    # Mismo ciclo que un request real: close_old_connections al inicio y al final
+                    request_started.send(sender=self.__class__)
+                    try:
+                        with connections[alias].cursor() as cursor:
+                            cursor.execute('SELECT 1')
+                    except DatabaseError as exc:
+                        errores.append(str(exc))
+                    finally:
+                        request_finished.send(sender=self.__class__)
+            finally:
+                connections.close_all()
+
+        reiniciar_metricas()
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=trabajar) for _ in range(hilos)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        segundos = time.perf_counter() - inicio
+
+        metricas = metricas_conexiones()['alias'].get(alias, {})
+        self.stdout.write(f"requests: {total} en {segundos:.2f}s ({total / segundos:.0f}/s), {hilos} hilos")
+        for evento, n in metricas.items():
+            self.stdout.write(f"{evento}: {n}")
+        self.stdout.write(f"conexiones creadas por request: {metricas.get('creadas', 0) / total:.3f}")
+        if errores:
+            self.stdout.write(self.style.WARNING(f"{len(errores)} errores; primero: {errores[0]}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Medición completada"))
@@ -0,0 +1,81 @@
+import io
+import json
+from datetime import datetime
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from usuarios.benchmark import excesos_presupuesto, medir_vistas, regresiones
+from usuarios.models import Trabajador
+
+class Command(BaseCommand):
+    help = ("Mide latencia p50/p95, consultas y tiempo SQL de cada vista de usuarios.urls por rol, "
+            "con datos de 1k/10k/100k trabajadores en una base de prueba")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help="Tamaños de datos (trabajadores), separados por coma")
+        parser.add_argument('--repeticiones', type=int, default=10, help="Requests por vista y rol")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--salida', default='bench_views.json', help="Archivo JSON de resultados")
+        parser.add_argument('--baseline', default=None, help="JSON de una ejecución anterior para comparar")
+        parser.add_argument('--tolerancia', type=float, default=0.25, help="Aumento de p95 tolerado (fracción)")
+        parser.add_argument('--fallar-regresion', action='store_true', help="También falla si hay regresiones frente a la línea base")
+
+    def handle(self, *args, **opts):
+        try:
+            sizes = sorted({int(s) for s in opts['sizes'].split(',') if s.strip()})
+        except ValueError:
+            raise CommandError("--sizes debe ser una lista de enteros, p. ej. 1000,10000")
+        base = None
+        if opts['baseline']:
+            with open(opts['baseline'], encoding='utf-8') as f:
+                base = json.load(f)
+
+        # Base de datos de prueba aparte: nunca se siembra la base real
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            salida = {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'motor': connection.vendor,
+                'repeticiones': opts['repeticiones'],
+                'tamanos': {},
+            }
+            for size in sizes:
+                faltan = size - Trabajador.objects.count()
+                if faltan > 0:
+                    self.stdout.write(f"Sembrando {faltan} trabajadores (total {size})...")
+                    call_command('seed_scale', workers=faltan, seed=opts['seed'], stdout=io.StringIO())
+                self.stdout.write(f"Midiendo vistas con {size} trabajadores...")
+                salida['tamanos'][str(size)] = medir_vistas(repeticiones=max(1, opts['repeticiones']))
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        with open(opts['salida'], 'w', encoding='utf-8') as f:
+            json.dump(salida, f, indent=2, ensure_ascii=False)
+
+        fallas = []
+        for size, resultados in salida['tamanos'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{size} trabajadores"))
+            for ruta, por_rol in resultados.items():
+                for rol, m in por_rol.items():
+                    self.stdout.write(
+                        f"  {ruta:<24} {rol:<13} {m['status']} p50={m['p50_ms']}ms p95={m['p95_ms']}ms "
+                        f"consultas={m['consultas']} sql={m['sql_ms']}ms"
+                    )
+            for ruta, rol, consultas, presupuesto in excesos_presupuesto(resultados):
+                fallas.append(f"[{size}] {ruta} ({rol}): {consultas} consultas, presupuesto {presupuesto}")
+            if base and size in base.get('tamanos', {}):
+                for ruta, rol, metrica, antes, ahora in regresiones(resultados, base['tamanos'][size], opts['tolerancia']):
+                    mensaje = f"[{size}] {ruta} ({rol}): {metrica} {antes} → {ahora}"
+                    self.stdout.write(self.style.WARNING(f"Regresión {mensaje}"))
+                    if opts['fallar_regresion']:
+                        fallas.append(mensaje)
+
+        self.stdout.write(f"Resultados en {opts['salida']}")
+        if fallas:
+            raise CommandError("Vistas fuera de presupuesto:\n" + "\n".join(fallas))
+        self.stdout.write(self.style.SUCCESS("Todas las vistas dentro de su presupuesto de consultas"))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from usuarios.filtros import ORDEN_TRABAJADORES, filtrar_trabajadores, leer_filtros_trabajadores
+from usuarios.models import Trabajador
+from usuarios.paginacion import despues_de
+
+# Texto del plan que indica un ordenamiento fuera de índice, por motor
+ORDEN_SIN_INDICE = {
+    'mysql': 'Using filesort',
+    'sqlite': 'USE TEMP B-TREE FOR ORDER BY',
+    'postgresql': 'Sort Key',
+}
+
+class Command(BaseCommand):
+    help = ("Ejecuta EXPLAIN de la consulta de lista_trabajadores para cada orden y filtro "
+            "y verifica que el orden salga de un índice (sin filesort)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help="Imprime el plan completo de cada consulta")
+
+    def handle(self, *args, **opts):
+        marcador = ORDEN_SIN_INDICE.get(connection.vendor)
+        if marcador is None:
+            raise CommandError(f"Motor no soportado: {connection.vendor}")
+        muestra = Trabajador.objects.exclude(area=None).exclude(cargo=None).exclude(departamento=None).first()
+        if muestra is None:
+            raise CommandError("Se necesita al menos un trabajador con área, cargo y departamento (ver seed_scale)")
+
+        casos = {
+            'sin filtros': {},
+            'area': {'area': str(muestra.area_id)},
+            'cargo': {'cargo': str(muestra.cargo_id)},
+            'depto': {'depto': str(muestra.departamento_id)},
+            'sexo': {'sexo': muestra.sexo},
+        }
+        con_filesort = []
+        for orden in ORDEN_TRABAJADORES:
+            if orden == 'relevance':
+                # Orden calculado (puntaje de búsqueda): no puede salir de un índice
+                self.stdout.write(f"{orden:<10} (omitido: orden por puntaje calculado, requiere ?q=)")
+                continue
+            for caso, params in casos.items():
+                filtros = leer_filtros_trabajadores({**params, 'order': orden})
+                qs = filtrar_trabajadores(
+                    Trabajador.objects.select_related('area', 'departamento', 'cargo', 'user'), filtros
+                )
+                paginas = {'primera página': qs[:11]}
+                siguiente = despues_de(qs, ORDEN_TRABAJADORES[orden], muestra)
+                if siguiente is not None:
+                    paginas['cursor'] = siguiente[:11]
+                for pagina, consulta in paginas.items():
+                    plan = consulta.explain()
+                    ok = marcador not in plan
+                    estado = self.style.SUCCESS('índice') if ok else self.style.ERROR('FILESORT')
+                    self.stdout.write(f"{orden:<10} {caso:<12} {pagina:<15} {estado}")
+                    if opts['verbose_plan'] or not ok:
+                        self.stdout.write(plan)
+                    if not ok:
+                        con_filesort.append(f"{orden} / {caso} / {pagina}")
+
+        if con_filesort:
+            raise CommandError("Ordenamientos sin índice:\n" + "\n".join(con_filesort))
+        self.stdout.write(self.style.SUCCESS("Todos los órdenes del listado se resuelven con índice"))
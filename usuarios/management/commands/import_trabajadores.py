@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from usuarios.importacion import ErrorArchivo, escribir_reporte, importar_trabajadores, leer_filas
+
+class Command(BaseCommand):
+    help = "Importa trabajadores (usuario, trabajador, contacto y carga) desde un CSV o XLSX por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo .csv o .xlsx")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default=None, help="Contraseña común inicial (por defecto, inutilizable)")
+        parser.add_argument('--reporte', default=None, help="Ruta del CSV de errores por fila")
+        parser.add_argument('--dry-run', action='store_true', help="Solo valida, no inserta")
+
+    def handle(self, *args, **opts):
+        try:
+            with open(opts['archivo'], 'rb') as archivo:
+                resultado = importar_trabajadores(
+                    leer_filas(archivo, opts['archivo']),
+                    batch_size=max(1, opts['batch_size']),
+                    dry_run=opts['dry_run'],
+                    password=opts['password'],
+                )
+        except (OSError, ErrorArchivo) as exc:
+            raise CommandError(str(exc))
+
+        if opts['reporte']:
+            with open(opts['reporte'], 'w', newline='', encoding='utf-8') as destino:
+                escribir_reporte(resultado, destino)
+        else:
+            for fila, campo, mensaje in resultado.errores[:50]:
+                self.stdout.write(self.style.WARNING(f"Fila {fila} [{campo}]: {mensaje}"))
+            if len(resultado.errores) > 50:
+                self.stdout.write(f"... {len(resultado.errores) - 50} errores más (usa --reporte)")
+
+        accion = "válidas" if opts['dry_run'] else "creadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"Filas leídas={resultado.leidas} {accion}={resultado.creadas} con errores={resultado.filas_con_error}"
+        ))
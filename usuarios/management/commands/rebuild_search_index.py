@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from usuarios.busqueda import reindexar
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de Trabajadores (nombres, apellidos y RUT)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        total = reindexar(batch_size=max(1, opts['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido: {total} trabajadores"))
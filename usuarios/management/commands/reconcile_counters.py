@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from usuarios.contadores import reconciliar
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores materializados (usuarios, trabajadores, áreas, departamentos, cargos) y corrige desvíos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', default=False)
+
+    def handle(self, *args, **opts):
+        dry_run = opts['dry_run']
+        for nombre, (guardado, real) in reconciliar(dry_run=dry_run).items():
+            if guardado == real:
+                self.stdout.write(f"{nombre}: {real} (sin cambios)")
+            elif dry_run:
+                self.stdout.write(self.style.WARNING(f"{nombre}: guardado={guardado} real={real} (dry-run)"))
+            else:
+                self.stdout.write(self.style.WARNING(f"{nombre}: {guardado} → {real} corregido"))
+        self.stdout.write(self.style.SUCCESS("Contadores reconciliados" if not dry_run else "Revisión de contadores completada"))
@@ -0,0 +1,104 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from usuarios.busqueda import indexar_lote
+from usuarios.contadores import ajustar
+from usuarios.facetas import invalidar_facetas
+from usuarios.models import Trabajador
+
+# (regla, filas a reparar, valores) — cada regla es un UPDATE ... WHERE por tramo de ids
+REGLAS = [
+    ('nombres vacíos', Q(nombres=''), {'nombres': 'SinNombre'}),
+    ('apellidos vacíos', Q(apellidos=''), {'apellidos': 'SinApellido'}),
+    ('sexo inválido', ~Q(sexo__in=['M', 'F', 'O']), {'sexo': 'O'}),
+    ('rut vacío', Q(rut='') | Q(rut__isnull=True, rut_normalizado__isnull=False), {'rut': None, 'rut_normalizado': None}),
+    ('fecha_ingreso nula', Q(fecha_ingreso__isnull=True), None),  # se completa con la fecha del día
+]
+# Reglas que cambian términos indexados para la búsqueda
+REGLAS_INDEXADAS = {'nombres vacíos', 'apellidos vacíos'}
+SIN_TRABAJADOR = 'usuarios sin trabajador'
+
+
+class Command(BaseCommand):
+    help = "Sanea Trabajador con UPDATE condicionales por tramos de ids existentes y crea los Trabajador faltantes en bloque"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Ids por tramo (una transacción corta por tramo)")
+        parser.add_argument('--dry-run', action='store_true', default=False, help="Solo cuenta las filas por regla")
+
+    def handle(self, *args, **opts):
+        chunk = max(1, opts['chunk_size'])
+        dry_run = opts['dry_run']
+        conteo = {SIN_TRABAJADOR: 0, **{nombre: 0 for nombre, _, _ in REGLAS}}
+        try:
+            self._sanear(chunk, dry_run, conteo)
+        finally:
+            # Una sola invalidación de facetas y estadísticas, y solo si algo cambió
+            if not dry_run and any(conteo.values()):
+                invalidar_facetas()
+
+        for nombre, total in conteo.items():
+            self.stdout.write(f"{nombre}: {total}{' (dry-run)' if dry_run else ''}")
+        self.stdout.write(self.style.SUCCESS("Revisión completada (dry-run)" if dry_run else "Saneo completado"))
+
+    def _sanear(self, chunk, dry_run, conteo):
+        hoy = date.today()
+        User = get_user_model()
+        for tramo in self._tramos(User.objects.all(), chunk):
+            faltantes = tramo.filter(trabajador__isnull=True)
+            if dry_run:
+                conteo[SIN_TRABAJADOR] += faltantes.count()
+                continue
+            with transaction.atomic():
+                usuarios = list(faltantes.values_list('id', 'username'))
+                if not usuarios:
+                    continue
+                Trabajador.objects.bulk_create([
+                    Trabajador(user_id=uid, nombres=username, apellidos='Demo', sexo='O', fecha_ingreso=hoy)
+                    for uid, username in usuarios
+                ])
+                # bulk_create no dispara señales: índice y contador a mano
+                indexar_lote(list(
+                    Trabajador.objects.filter(user_id__in=[uid for uid, _ in usuarios])
+                    .values_list('id', 'nombres', 'apellidos', 'rut')
+                ))
+                ajustar('trabajadores', len(usuarios))
+                conteo[SIN_TRABAJADOR] += len(usuarios)
+
+        for tramo in self._tramos(Trabajador.objects.all(), chunk):
+            if dry_run:
+                for nombre, filtro, _ in REGLAS:
+                    conteo[nombre] += tramo.filter(filtro).count()
+                continue
+            with transaction.atomic():
+                reindexar = set()
+                for nombre, filtro, valores in REGLAS:
+                    afectados = tramo.filter(filtro)
+                    if nombre in REGLAS_INDEXADAS:
+                        ids = list(afectados.values_list('id', flat=True))
+                        reindexar.update(ids)
+                        afectados = Trabajador.objects.filter(pk__in=ids)
+                    conteo[nombre] += afectados.update(**(valores or {'fecha_ingreso': hoy}))
+                if reindexar:
+                    indexar_lote(list(
+                        Trabajador.objects.filter(pk__in=reindexar)
+                        .values_list('id', 'nombres', 'apellidos', 'rut')
+                    ))
+
+    def _tramos(self, queryset, chunk):
+        """Subconjuntos de `queryset` de a lo más `chunk` ids consecutivos existentes.
+
+        Cada límite sale del índice de la clave primaria (`OFFSET chunk` desde
+        el inicio del tramo), así los huecos en los ids no producen tramos vacíos.
+        """
+        ids = queryset.order_by('pk').values_list('pk', flat=True)
+        desde = ids.first()
+        while desde is not None:
+            siguiente = list(ids.filter(pk__gte=desde)[chunk:chunk + 1])
+            if not siguiente:
+                yield queryset.filter(pk__gte=desde)
+                return
+            yield queryset.filter(pk__gte=desde, pk__lt=siguiente[0])
+            desde = siguiente[0]
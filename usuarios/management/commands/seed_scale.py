@@ -0,0 +1,144 @@
+import random
+import re
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from usuarios.importacion import insertar_lote
+from usuarios.models import Area, Departamento, Cargo
+from usuarios.roles import TRABAJADOR
+from usuarios.rut import calcular_dv, normalizar_rut
+
+AREAS = {
+    'Operaciones': ['Bodega', 'Despacho', 'Transporte', 'Mantención', 'Calidad'],
+    'Comercial': ['Ventas', 'Postventa', 'Marketing', 'Atención a Clientes'],
+    'Finanzas': ['Contabilidad', 'Tesorería', 'Cobranza', 'Control de Gestión'],
+    'TI': ['Desarrollo', 'Infraestructura', 'Soporte', 'Seguridad'],
+    'RR.HH.': ['Gestión', 'Remuneraciones', 'Selección', 'Capacitación'],
+    'Logística': ['Compras', 'Inventario', 'Distribución'],
+    'Legal': ['Contratos', 'Cumplimiento'],
+    'Gerencia': ['Dirección', 'Planificación'],
+}
+CARGOS = [
+    'Operario', 'Auxiliar', 'Administrativo', 'Vendedor', 'Ejecutivo', 'Analista', 'Técnico',
+    'Supervisor', 'Desarrollador', 'Contador', 'Abogado', 'Jefe de Área', 'Jefe RR.HH.',
+    'Subgerente', 'Gerente', 'Administrador',
+]
+NOMBRES_F = ['María', 'Sofía', 'Isidora', 'Josefa', 'Catalina', 'Valentina', 'Fernanda', 'Constanza',
+             'Javiera', 'Antonia', 'Camila', 'Francisca', 'Daniela', 'Carolina', 'Paula', 'Ana']
+NOMBRES_M = ['José', 'Juan', 'Benjamín', 'Vicente', 'Matías', 'Agustín', 'Tomás', 'Diego',
+             'Cristóbal', 'Sebastián', 'Felipe', 'Nicolás', 'Martín', 'Pablo', 'Luis', 'Carlos']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva', 'Martínez',
+             'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández', 'Torres', 'Araya',
+             'Flores', 'Espinoza', 'Valenzuela', 'Castillo', 'Tapia', 'Reyes', 'Gutiérrez', 'Castro',
+             'Pizarro', 'Álvarez', 'Vásquez', 'Sánchez', 'Fernández', 'Ramírez', 'Carrasco', 'Gómez',
+             'Cortés', 'Herrera', 'Núñez', 'Jara', 'Vergara', 'Rivera', 'Figueroa']
+CALLES = ['Av. Libertador B. O\'Higgins', 'Av. Providencia', 'Los Carrera', 'Prat', 'Colón',
+          'Manuel Montt', 'San Martín', 'Freire', 'Baquedano', 'Independencia']
+PARENTESCOS_CONTACTO = ['Madre', 'Padre', 'Cónyuge', 'Hermano(a)', 'Pareja', 'Amigo(a)']
+PARENTESCOS_CARGA = ['Hijo(a)', 'Hijo(a)', 'Hijo(a)', 'Cónyuge', 'Madre', 'Padre']
+# Fecha fija para que las fechas generadas no dependan del día de ejecución
+FECHA_BASE = date(2025, 1, 1)
+
+
+class Command(BaseCommand):
+    help = "Genera datos deterministas de volumen (catálogos, usuarios, trabajadores, contactos y cargas) con bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=10000, help="Cantidad de trabajadores a crear")
+        parser.add_argument('--seed', type=int, default=42, help="Semilla para datos reproducibles")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='scale', help="Prefijo de los usernames generados")
+        parser.add_argument('--password', default='demo123', help="Contraseña común (se calcula un solo hash)")
+        parser.add_argument('--sin-indice', action='store_true',
+                            help="No indexa la búsqueda (ejecutar rebuild_search_index después)")
+
+    def handle(self, *args, **opts):
+        total = max(0, opts['workers'])
+        batch_size = max(1, opts['batch_size'])
+        prefix = opts['prefix']
+
+        # Catálogos: pocas filas, con get_or_create para que las señales mantengan caché y contadores
+        deptos_por_area = []
+        for area_nombre, deptos in AREAS.items():
+            area, _ = Area.objects.get_or_create(nombre=area_nombre)
+            ids = [Departamento.objects.get_or_create(nombre=d, area=area)[0].pk for d in deptos]
+            deptos_por_area.append((area.pk, ids))
+        cargo_ids = [Cargo.objects.get_or_create(nombre=c)[0].pk for c in CARGOS]
+        grupo, _ = Group.objects.get_or_create(name=TRABAJADOR)
+
+        # Pesos tipo Zipf: pocas áreas y cargos concentran la mayoría de trabajadores
+        pesos_area = [1 / (k + 1) for k in range(len(deptos_por_area))]
+        pesos_cargo = [1 / (k + 1) for k in range(len(cargo_ids))]
+        password_hash = make_password(opts['password'])
+
+        # Continúa la numeración si ya existen usuarios con el prefijo
+        User = get_user_model()
+        ultimo = (
+            User.objects.filter(username__startswith=prefix, username__regex=rf'^{re.escape(prefix)}[0-9]{{8}}$')
+            .order_by('-username').values_list('username', flat=True).first()
+        )
+        inicio = int(ultimo[len(prefix):]) + 1 if ultimo else 0
+
+        creados = 0
+        for desde in range(inicio, inicio + total, batch_size):
+            hasta = min(desde + batch_size, inicio + total)
+            # Un generador por trabajador: el i-ésimo sale igual para una semilla, sin
+            # importar el tamaño de lote ni cuántos usuarios existían antes
+            lote = [
+                self._fila(random.Random(f"{opts['seed']}:{i}"), i, prefix, deptos_por_area, pesos_area,
+                           cargo_ids, pesos_cargo)
+                for i in range(desde, hasta)
+            ]
+            creados += insertar_lote(lote, password_hash, grupo, indexar=not opts['sin_indice'])
+            self.stdout.write(f"  {creados}/{total} trabajadores")
+
+        self.stdout.write(self.style.SUCCESS(f"seed_scale listo: {creados} trabajadores creados (prefijo '{prefix}')"))
+
+    def _fila(self, rng, i, prefix, deptos_por_area, pesos_area, cargo_ids, pesos_cargo):
+        username = f"{prefix}{i:08d}"
+        sexo = rng.choices('FMO', weights=(48, 50, 2))[0]
+        nombres = f"{rng.choice(NOMBRES_F if sexo == 'F' else NOMBRES_M)} {rng.choice(NOMBRES_F if sexo == 'F' else NOMBRES_M)}"
+        apellidos = f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+        # Cuerpo de RUT único por índice (7919 es primo con el rango)
+        cuerpo = 5_000_000 + (i * 7919) % 20_000_000
+        rut = f"{cuerpo}-{calcular_dv(cuerpo)}"
+        area_id, deptos = rng.choices(deptos_por_area, weights=pesos_area)[0]
+        # Antigüedad sesgada hacia ingresos recientes (hasta 30 años)
+        fecha_ingreso = FECHA_BASE - timedelta(days=int(rng.triangular(0, 365 * 30, 0)))
+        contactos = [
+            {
+                'nombre': f"{rng.choice(NOMBRES_F + NOMBRES_M)} {rng.choice(APELLIDOS)}",
+                'parentesco': rng.choice(PARENTESCOS_CONTACTO),
+                'telefono': f"+569{rng.randrange(10**7, 10**8)}",
+            }
+            for _ in range(rng.choices((0, 1, 2), weights=(20, 60, 20))[0])
+        ]
+        cargas = [
+            {
+                'nombre': f"{rng.choice(NOMBRES_F + NOMBRES_M)} {apellidos.split()[0]}",
+                'parentesco': rng.choice(PARENTESCOS_CARGA),
+                'fecha_nacimiento': FECHA_BASE - timedelta(days=rng.randrange(365, 365 * 25)),
+            }
+            for _ in range(rng.choices((0, 1, 2, 3), weights=(40, 30, 20, 10))[0])
+        ]
+        return {
+            'username': username,
+            'email': f"{username}@ejemplo.cl",
+            'trabajador': {
+                'nombres': nombres,
+                'apellidos': apellidos,
+                'rut': rut,
+                'rut_normalizado': normalizar_rut(rut),
+                'sexo': sexo,
+                'fecha_ingreso': fecha_ingreso,
+                'area_id': area_id,
+                'departamento_id': rng.choice(deptos),
+                'cargo_id': rng.choices(cargo_ids, weights=pesos_cargo)[0],
+                'telefono': f"+569{rng.randrange(10**7, 10**8)}",
+                'direccion': f"{rng.choice(CALLES)} {rng.randrange(1, 9999)}",
+            },
+            'contactos': contactos,
+            'cargas': cargas,
+        }
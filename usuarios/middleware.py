@@ -0,0 +1,167 @@
+"""Middleware de la app Usuarios."""
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .instrumentacion import RegistroSQL, aregistrar_sql, medir_template_response, registrar_sql
+from .replicas import afijar_primaria, estado_request, fijar_primaria
+from .roles import roles_de
+
+logger = logging.getLogger('usuarios.rendimiento')
+
+
+class _SyncAsyncMiddleware:
+    """Base para middleware que funciona tanto bajo WSGI como ASGI.
+
+    Con vistas async bajo ASGI, un middleware solo sync obligaría a Django a
+    pasar cada request a un hilo. Las subclases implementan `__call__`
+    (sync) y `__acall__` (async).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.procesar(request)
+
+
+class RolesMiddleware(_SyncAsyncMiddleware):
+    """Adjunta `request.roles`: conjunto inmutable de grupos del usuario.
+
+    Se resuelve de forma perezosa la primera vez que se usa y queda
+    cacheado para el resto del request (ver `usuarios.roles`). Debe ir
+    después de `AuthenticationMiddleware`.
+    """
+
+    def procesar(self, request):
+        request.roles = SimpleLazyObject(lambda: roles_de(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # En vistas async no se usa `request.roles` (consultaría la base)
+        request.roles = SimpleLazyObject(lambda: roles_de(request.user))
+        return await self.get_response(request)
+
+
+class ReplicaMiddleware(_SyncAsyncMiddleware):
+    """Estado de lectura en réplica por request (ver `usuarios.replicas`).
+
+    Si el request escribió en la base, deja en la sesión del usuario la
+    marca para leer de la primaria durante `USUARIOS_REPLICA_PIN_SEGUNDOS`.
+    Debe ir después de `AuthenticationMiddleware`.
+    """
+
+    def procesar(self, request):
+        with estado_request() as estado:
+            response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        # Sin réplica no hay demora que cubrir: no se escribe la sesión
+        if estado.requiere_fijar and user is not None and user.is_authenticated:
+            fijar_primaria(request)
+        return response
+
+    async def __acall__(self, request):
+        with estado_request() as estado:
+            response = await self.get_response(request)
+        if estado.requiere_fijar and hasattr(request, 'auser') and (await request.auser()).is_authenticated:
+            await afijar_primaria(request)
+        return response
+
+
+class InstrumentacionMiddleware(_SyncAsyncMiddleware):
+    """Mide SQL, plantillas y tiempo total de cada request.
+
+    Agrega la cabecera `Server-Timing` (`db`, `template`, `view`, `conn`
+    si el request abrió conexiones nuevas a la base y una entrada por cada
+    `instrumentacion.seccion`) y, si el
+    request supera `USUARIOS_SLOW_REQUEST_MS`, escribe una línea JSON en el
+    logger `usuarios.rendimiento` con consultas, duplicados y formas SQL
+    repetidas (posibles N+1). Debe ir al inicio de `MIDDLEWARE` para
+    incluir las consultas de sesión y autenticación.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.activo = getattr(settings, 'USUARIOS_INSTRUMENTACION', True)
+        self.server_timing = getattr(settings, 'USUARIOS_SERVER_TIMING', True)
+        self.lento_ms = getattr(settings, 'USUARIOS_SLOW_REQUEST_MS', 500)
+        self.minimo_repeticiones = getattr(settings, 'USUARIOS_N_MAS_1_MIN', 5)
+        self.max_distintas = getattr(settings, 'USUARIOS_SQL_DISTINTAS_MAX', 1000)
+
+    def procesar(self, request):
+        if not self.activo:
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        with registrar_sql(RegistroSQL(self.max_distintas)) as registro:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        user = getattr(request, 'user', None) if total_ms >= self.lento_ms else None
+        return self._informar(request, response, registro, total_ms, user)
+
+    async def __acall__(self, request):
+        if not self.activo:
+            return await self.get_response(request)
+
+        inicio = time.perf_counter()
+        async with aregistrar_sql(RegistroSQL(self.max_distintas)) as registro:
+            response = await self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        user = None
+        if total_ms >= self.lento_ms and hasattr(request, 'auser'):
+            user = await request.auser()
+        return self._informar(request, response, registro, total_ms, user)
+
+    def process_template_response(self, request, response):
+        # Respuestas con render diferido; las vistas de la app usan `render_medido`
+        if self.activo:
+            medir_template_response(response)
+        return response
+
+    def _informar(self, request, response, registro, total_ms, user):
+        db_ms = registro.segundos * 1000
+        plantillas_ms = registro.plantillas * 1000
+
+        if self.server_timing:
+            server_timing = (
+                f'db;dur={db_ms:.1f};desc="{registro.consultas} consultas", '
+                f'template;dur={plantillas_ms:.1f}, view;dur={total_ms:.1f}'
+            )
+            if registro.conexiones:
+                server_timing += f', conn;desc="{registro.conexiones} nuevas"'
+            for nombre, (consultas, segundos) in registro.secciones.items():
+                server_timing += f', {nombre};dur={segundos * 1000:.1f};desc="{consultas} consultas"'
+            response['Server-Timing'] = server_timing
+        if total_ms >= self.lento_ms:
+            logger.warning(json.dumps({
+                'evento': 'request_lento',
+                'metodo': request.method,
+                'ruta': request.path,
+                'estado': response.status_code,
+                'usuario': user.pk if user is not None and user.is_authenticated else None,
+                'total_ms': round(total_ms, 1),
+                'db_ms': round(db_ms, 1),
+                'template_ms': round(plantillas_ms, 1),
+                'consultas': registro.consultas,
+                'duplicadas': registro.duplicadas,
+                'detalle_truncado': registro.truncado,
+                'conexiones_nuevas': registro.conexiones,
+                'secciones': {nombre: consultas for nombre, (consultas, _) in registro.secciones.items()},
+                'formas_repetidas': [
+                    {'sql': forma[:300], 'veces': n}
+                    for forma, n in registro.formas_repetidas(self.minimo_repeticiones)[:5]
+                ],
+            }, ensure_ascii=False))
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:00
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia congelada de `usuarios.busqueda.terminos_trabajador`: la migración no
+# debe cambiar de comportamiento si el código de la app cambia después.
+MAX_TERMINO = 60
+_NO_ALFANUM = re.compile(r'[^0-9a-z]+')
+
+
+def terminos_trabajador(nombres, apellidos, rut):
+    terminos = set()
+    for texto in (nombres, apellidos, rut):
+        texto = unicodedata.normalize('NFKD', texto or '')
+        texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+        for palabra in texto.split():
+            terminos.add(_NO_ALFANUM.sub('', palabra))
+            terminos.update(_NO_ALFANUM.split(palabra))
+    return {t[:MAX_TERMINO] for t in terminos if t}
+
+
+def poblar_indice(apps, schema_editor):
+    """Construye el índice de búsqueda para los trabajadores existentes."""
+    Trabajador = apps.get_model('usuarios', 'Trabajador')
+    TerminoBusqueda = apps.get_model('usuarios', 'TerminoBusqueda')
+    lote = []
+    filas = Trabajador.objects.order_by().values_list('id', 'nombres', 'apellidos', 'rut')
+    for pk, nombres, apellidos, rut in filas.iterator(chunk_size=2000):
+        lote.extend(
+            TerminoBusqueda(trabajador_id=pk, termino=t)
+            for t in terminos_trabajador(nombres, apellidos, rut)
+        )
+        if len(lote) >= 5000:
+            TerminoBusqueda.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        TerminoBusqueda.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_customuser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=60)),
+                ('trabajador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to='usuarios.trabajador')),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda',
+                'verbose_name_plural': 'Términos de búsqueda',
+                'indexes': [models.Index(fields=['termino', 'trabajador'], name='usuarios_termino_trab_idx')],
+                'unique_together': {('trabajador', 'termino')},
+            },
+        ),
+        migrations.RunPython(poblar_indice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:30
+
+import re
+
+from django.db import migrations, models
+
+# Copia congelada de `usuarios.rut.normalizar_rut`: la migración no debe
+# cambiar de comportamiento si el código de la app cambia después.
+_NO_RUT = re.compile(r'[^0-9K]+')
+
+
+def calcular_dv(cuerpo):
+    total = 0
+    factor = 2
+    for d in reversed(cuerpo):
+        total += int(d) * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - (total % 11)
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+def normalizar_rut(valor):
+    limpio = _NO_RUT.sub('', (valor or '').upper())
+    if len(limpio) < 2:
+        return None
+    cuerpo, dv = limpio[:-1].lstrip('0'), limpio[-1]
+    if not cuerpo or not cuerpo.isdigit() or len(cuerpo) > 8 or calcular_dv(cuerpo) != dv:
+        return None
+    return cuerpo + dv
+
+
+def normalizar_ruts(apps, schema_editor):
+    """Rellena `rut_normalizado` y deja en NULL los RUT vacíos o de relleno ("SIN-RUT")."""
+    Trabajador = apps.get_model('usuarios', 'Trabajador')
+    Trabajador.objects.filter(rut__in=['', 'SIN-RUT']).update(rut=None)
+    lote = []
+    filas = Trabajador.objects.filter(rut__isnull=False).only('id', 'rut').order_by('id')
+    for t in filas.iterator(chunk_size=2000):
+        t.rut_normalizado = normalizar_rut(t.rut)
+        if t.rut_normalizado:
+            lote.append(t)
+        if len(lote) >= 2000:
+            Trabajador.objects.bulk_update(lote, ['rut_normalizado'])
+            lote = []
+    if lote:
+        Trabajador.objects.bulk_update(lote, ['rut_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0004_terminobusqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajador',
+            name='rut_normalizado',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=9, null=True),
+        ),
+        migrations.AlterField(
+            model_name='trabajador',
+            name='rut',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.RunPython(normalizar_ruts, migrations.RunPython.noop),
+    ]
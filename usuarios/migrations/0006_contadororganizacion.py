@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def poblar_contadores(apps, schema_editor):
+    """Inicializa los contadores con los totales actuales."""
+    ContadorOrganizacion = apps.get_model('usuarios', 'ContadorOrganizacion')
+    app_label, model_name = settings.AUTH_USER_MODEL.split('.')
+    modelos = {
+        'usuarios': apps.get_model(app_label, model_name),
+        'trabajadores': apps.get_model('usuarios', 'Trabajador'),
+        'areas': apps.get_model('usuarios', 'Area'),
+        'departamentos': apps.get_model('usuarios', 'Departamento'),
+        'cargos': apps.get_model('usuarios', 'Cargo'),
+    }
+    for nombre, model in modelos.items():
+        ContadorOrganizacion.objects.update_or_create(
+            nombre=nombre, defaults={'total': model.objects.count()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('usuarios', '0005_trabajador_rut_normalizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorOrganizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=40, unique=True)),
+                ('total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de organización',
+                'verbose_name_plural': 'Contadores de organización',
+            },
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0006_contadororganizacion'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='trabajador',
+            options={'verbose_name': 'Trabajador', 'verbose_name_plural': 'Trabajadores'},
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['apellidos', 'nombres', 'id'], name='usuarios_trab_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['fecha_ingreso', 'id'], name='usuarios_trab_ingreso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['area', 'apellidos', 'nombres', 'id'], name='usuarios_trab_area_nom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['area', 'fecha_ingreso', 'id'], name='usuarios_trab_area_ing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['cargo', 'apellidos', 'nombres', 'id'], name='usuarios_trab_cargo_nom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['cargo', 'fecha_ingreso', 'id'], name='usuarios_trab_cargo_ing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['departamento', 'apellidos', 'nombres', 'id'], name='usuarios_trab_depto_nom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['departamento', 'fecha_ingreso', 'id'], name='usuarios_trab_depto_ing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['sexo', 'apellidos', 'nombres', 'id'], name='usuarios_trab_sexo_nom_idx'),
+        ),
+    ]
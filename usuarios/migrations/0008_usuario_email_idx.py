@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+# auth.User no declara índice en email; se agrega aquí para la búsqueda por prefijo
+# del autocompletado de usuarios (username ya tiene su índice único).
+#
+# Solo cambia el esquema, no el estado de migraciones: las operaciones de estado
+# de una migración (`AddIndex`, `state_operations` de `RunSQL`) solo alcanzan a
+# los modelos de su propia app, y `auth.User` es de `auth`. Tampoco se usa
+# `RunSQL`: borrar un índice es `DROP INDEX ... ON tabla` en MySQL y `DROP INDEX`
+# en SQLite, mientras `schema_editor` genera el SQL de cada motor. Consecuencias:
+# `makemigrations` no lo conoce y una migración de `auth` que reconstruya
+# `auth_user` en SQLite lo perdería; `UsuariosSinTrabajadorTests` comprueba que
+# exista.
+INDICE = models.Index(fields=['email'], name='usuarios_user_email_idx')
+
+
+def _user_model(apps):
+    app_label, model_name = settings.AUTH_USER_MODEL.split('.')
+    return apps.get_model(app_label, model_name)
+
+
+def crear_indice(apps, schema_editor):
+    schema_editor.add_index(_user_model(apps), INDICE)
+
+
+def borrar_indice(apps, schema_editor):
+    schema_editor.remove_index(_user_model(apps), INDICE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('usuarios', '0007_trabajador_indices_orden'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0008_usuario_email_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(fields=['sexo', 'fecha_ingreso', 'id'], name='usuarios_trab_sexo_ing_idx'),
+        ),
+    ]
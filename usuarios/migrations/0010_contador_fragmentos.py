@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Las filas existentes quedan como fragmento 0 de su contador
+
+    dependencies = [
+        ('usuarios', '0009_trabajador_sexo_ingreso_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contadororganizacion',
+            name='fragmento',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='contadororganizacion',
+            name='nombre',
+            field=models.CharField(max_length=40),
+        ),
+        migrations.AddConstraint(
+            model_name='contadororganizacion',
+            constraint=models.UniqueConstraint(fields=('nombre', 'fragmento'), name='usuarios_contador_fragmento_uniq'),
+        ),
+    ]
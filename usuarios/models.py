@@ -8,6 +8,7 @@ predeterminados para facilitar listados.
 """
 from django.db import models
 from django.conf import settings
+from .rut import normalizar_rut
 
 # Create your models here.
 # ==============================
@@ -31,6 +32,16 @@ class Area(models.Model):
         return self.nombre
 
 
+class DepartamentoQuerySet(models.QuerySet):
+    def con_area(self):
+        """Une `area` en la misma consulta: `__str__` la usa y sin esto consulta una vez por fila.
+
+        Usar en todo lo que muestre departamentos (selects, admin, listados).
+        No se aplica por defecto porque choca con `.only()` de la API.
+        """
+        return self.select_related('area')
+
+
 class Departamento(models.Model):
     """Subunidad dentro de un `Area`.
 
@@ -39,6 +50,8 @@ class Departamento(models.Model):
     nombre = models.CharField(max_length=100)
     area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name='departamentos')
 
+    objects = DepartamentoQuerySet.as_manager()
+
     class Meta:
         unique_together = ('nombre', 'area')
         verbose_name = "Departamento"
@@ -81,8 +94,11 @@ class Trabajador(models.Model):
 
     nombres = models.CharField(max_length=120)
     apellidos = models.CharField(max_length=120)
-    # Campo RUT (opcional), indexado para búsquedas
-    rut = models.CharField(max_length=12, null=True, blank=True, db_index=True)
+    # Campo RUT (opcional) tal como se ingresó; los formularios validan el
+    # dígito verificador al ingresarlo o cambiarlo (`forms.RutValidadoMixin`)
+    rut = models.CharField(max_length=12, null=True, blank=True)
+    # RUT normalizado (cuerpo + DV, p. ej. "12345678K"), indexado para búsquedas
+    rut_normalizado = models.CharField(max_length=9, null=True, blank=True, editable=False, db_index=True)
     sexo = models.CharField(
         max_length=20,
         choices=[('M', 'Masculino'), ('F', 'Femenino'), ('O', 'Otro')]
@@ -97,11 +113,72 @@ class Trabajador(models.Model):
     class Meta:
         verbose_name = "Trabajador"
         verbose_name_plural = "Trabajadores"
-        ordering = ['apellidos', 'nombres']
+        # Sin `ordering` por defecto: cada listado ordena explícitamente
+        # (ver `usuarios.filtros.ORDEN_TRABAJADORES`) y los conteos,
+        # subconsultas y exportaciones no arrastran un ORDER BY.
+        # Índices compuestos para filtro + orden del listado (el id final
+        # desempata y sirve al cursor); ver comando `explain_trabajadores`.
+        indexes = [
+            models.Index(fields=['apellidos', 'nombres', 'id'], name='usuarios_trab_nombre_idx'),
+            models.Index(fields=['fecha_ingreso', 'id'], name='usuarios_trab_ingreso_idx'),
+            models.Index(fields=['area', 'apellidos', 'nombres', 'id'], name='usuarios_trab_area_nom_idx'),
+            models.Index(fields=['area', 'fecha_ingreso', 'id'], name='usuarios_trab_area_ing_idx'),
+            models.Index(fields=['cargo', 'apellidos', 'nombres', 'id'], name='usuarios_trab_cargo_nom_idx'),
+            models.Index(fields=['cargo', 'fecha_ingreso', 'id'], name='usuarios_trab_cargo_ing_idx'),
+            models.Index(fields=['departamento', 'apellidos', 'nombres', 'id'], name='usuarios_trab_depto_nom_idx'),
+            models.Index(fields=['departamento', 'fecha_ingreso', 'id'], name='usuarios_trab_depto_ing_idx'),
+            models.Index(fields=['sexo', 'apellidos', 'nombres', 'id'], name='usuarios_trab_sexo_nom_idx'),
+            models.Index(fields=['sexo', 'fecha_ingreso', 'id'], name='usuarios_trab_sexo_ing_idx'),
+        ]
+
+    # Campos que filtran o agrupan los conteos por faceta y las estadísticas
+    # (ver `usuarios.signals.invalidar_conteos_facetas`)
+    CAMPOS_FACETAS = (
+        'area', 'departamento', 'cargo', 'sexo', 'fecha_ingreso', 'nombres', 'apellidos', 'rut_normalizado',
+    )
 
     def __str__(self):
         return f"{self.nombres} {self.apellidos}"
 
+    def _campos_guardados(self, update_fields):
+        if update_fields is None:
+            return self.CAMPOS_FACETAS
+        return [
+            nombre for nombre in self.CAMPOS_FACETAS
+            if nombre in update_fields or self._meta.get_field(nombre).attname in update_fields
+        ]
+
+    def facetas_cambiadas(self, update_fields=None, using=None):
+        """True si el guardado cambia algún campo de `CAMPOS_FACETAS` (o es un alta).
+
+        Con `update_fields` sin campos de facetas no consulta; si no, lee los
+        valores guardados de esos campos con una consulta por pk. Se llama en
+        `pre_save` (ver `usuarios.signals.detectar_cambio_facetas`).
+        """
+        campos = self._campos_guardados(update_fields)
+        if not campos:
+            return False
+        if self._state.adding or self.pk is None:
+            return True
+        attnames = [self._meta.get_field(nombre).attname for nombre in campos]
+        guardados = (
+            type(self)._base_manager.using(using or self._state.db)
+            .filter(pk=self.pk).values_list(*attnames).first()
+        )
+        if guardados is None:
+            return True
+        return any(getattr(self, attname) != valor for attname, valor in zip(attnames, guardados))
+
+    def save(self, *args, **kwargs):
+        # RUT vacío se guarda como NULL y la columna normalizada se mantiene sincronizada
+        if not (self.rut or '').strip():
+            self.rut = None
+        self.rut_normalizado = normalizar_rut(self.rut)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'rut' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'rut_normalizado'}
+        super().save(*args, **kwargs)
+
 
 class ContactoEmergencia(models.Model):
     """Contacto de emergencia asociado a un `Trabajador`."""
@@ -132,3 +209,46 @@ class CargaFamiliar(models.Model):
     def __str__(self):
         return f"{self.nombre} - {self.parentesco}"
 
+
+
+class TerminoBusqueda(models.Model):
+    """Término normalizado (sin acentos, minúsculas) de un `Trabajador`.
+
+    Índice invertido sobre nombres, apellidos y RUT que permite búsquedas
+    por prefijo con índice en lugar de `LIKE '%...%'`. Se mantiene desde
+    las señales de `Trabajador` (ver `usuarios.busqueda`).
+    """
+    trabajador = models.ForeignKey(Trabajador, on_delete=models.CASCADE, related_name='terminos_busqueda')
+    termino = models.CharField(max_length=60)
+
+    class Meta:
+        unique_together = ('trabajador', 'termino')
+        indexes = [models.Index(fields=['termino', 'trabajador'], name='usuarios_termino_trab_idx')]
+        verbose_name = "Término de búsqueda"
+        verbose_name_plural = "Términos de búsqueda"
+
+    def __str__(self):
+        return self.termino
+
+
+class ContadorOrganizacion(models.Model):
+    """Total materializado de filas de un modelo del sistema.
+
+    Evita `COUNT(*)` en cada request del dashboard y los listados. Se
+    mantiene con señales `post_save`/`post_delete` y se repara con el
+    comando `reconcile_counters` (ver `usuarios.contadores`). Cada
+    contador ocupa varias filas (`fragmento`) cuya suma es el total.
+    """
+    nombre = models.CharField(max_length=40)
+    fragmento = models.PositiveSmallIntegerField(default=0)
+    total = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Contador de organización"
+        verbose_name_plural = "Contadores de organización"
+        constraints = [
+            models.UniqueConstraint(fields=['nombre', 'fragmento'], name='usuarios_contador_fragmento_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre}[{self.fragmento}]: {self.total}"
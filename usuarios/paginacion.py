@@ -0,0 +1,223 @@
+"""Paginación por cursor (keyset) para listados grandes.
+
+En lugar de LIMIT/OFFSET + COUNT, cada página se obtiene filtrando por las
+columnas del orden activo a partir de la última (o primera) fila vista, de
+modo que el costo no crece con la profundidad de la página. Los cursores
+son tokens firmados y opacos para el cliente.
+
+Se asume la semántica de MySQL/SQLite: NULL ordena primero en ASC y
+último en DESC.
+"""
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+CURSOR_SALT = 'usuarios.paginacion.cursor'
+
+
+class CursorPage:
+    """Página de resultados compatible con las plantillas de listados.
+
+    Expone la misma interfaz mínima que `django.core.paginator.Page`
+    (`object_list`, `has_next`, `has_previous`, `start_index`) y agrega
+    los tokens `next_cursor`/`prev_cursor`.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None, start_index=1):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self._start_index = start_index
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def start_index(self):
+        return self._start_index if self.object_list else 0
+
+    def end_index(self):
+        return self._start_index + len(self.object_list) - 1 if self.object_list else 0
+
+
+def _parse_ordering(ordering):
+    """Convierte `['-apellidos', 'id']` en `[('apellidos', True), ('id', False)]`."""
+    return [(o.lstrip('-'), o.startswith('-')) for o in ordering]
+
+
+def _field(model, name):
+    """Campo del modelo o `None` si `name` es una anotación (p. ej. `relevancia`)."""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _serialize(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _valor(obj, name):
+    """Valor de la columna `name` en una instancia o en un dict de `.values()`."""
+    return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+
+def encode_cursor(ordering, obj, direction, start_index):
+    """Genera el token opaco que apunta a `obj` dentro de `ordering`."""
+    values = [_serialize(_valor(obj, name)) for name, _ in _parse_ordering(ordering)]
+    payload = {'o': list(ordering), 'v': values, 'd': direction, 'n': start_index}
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(model, ordering, token):
+    """Devuelve `(valores, dirección, start_index)` o `None` si el token no es válido.
+
+    Un cursor emitido para otro orden, alterado o de un formato anterior
+    (sin alguno de los campos actuales) se ignora: se vuelve a la primera
+    página.
+    """
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+        if payload['o'] != list(ordering) or payload['d'] not in ('next', 'prev'):
+            return None
+        cols = _parse_ordering(ordering)
+        if len(payload['v']) != len(cols):
+            return None
+        values = []
+        for (name, _), v in zip(cols, payload['v']):
+            field = _field(model, name)
+            values.append(field.to_python(v) if field is not None else v)
+        start_index = int(payload['n'])
+        if start_index < 1:
+            return None
+        return values, payload['d'], start_index
+    except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError):
+        return None
+
+
+def _after(name, value, descending, nullable):
+    """Condición "estrictamente después de `value`" para una columna, o `None` si es imposible."""
+    if not descending:
+        if value is None:
+            return Q(**{f'{name}__isnull': False})
+        return Q(**{f'{name}__gt': value})
+    if value is None:
+        return None
+    cond = Q(**{f'{name}__lt': value})
+    if nullable:
+        cond |= Q(**{f'{name}__isnull': True})
+    return cond
+
+
+def _equal(name, value):
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+def _keyset_filter(model, cols, values):
+    """Construye `(c1 > v1) OR (c1 = v1 AND c2 > v2) OR ...` respetando la dirección de cada columna."""
+    clauses = []
+    prefix = Q()
+    for (name, descending), value in zip(cols, values):
+        field = _field(model, name)
+        nullable = field is None or field.null
+        step = _after(name, value, descending, nullable)
+        if step is not None:
+            clauses.append(prefix & step)
+        prefix &= _equal(name, value)
+    if not clauses:
+        return None
+    return reduce(or_, clauses)
+
+
+def paginar_por_cursor(queryset, ordering, cursor=None, per_page=10):
+    """Obtiene una página de `queryset` ordenada por `ordering` a partir de `cursor`.
+
+    `ordering` debe terminar en una columna única (p. ej. `id`) para que el
+    orden sea total. Sin cursor válido se devuelve la primera página.
+    """
+    model = queryset.model
+    cols = _parse_ordering(ordering)
+    decoded = decode_cursor(model, ordering, cursor)
+
+    if decoded is None:
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(ordering, rows[-1], 'next', 1 + per_page) if has_more else None
+        return CursorPage(rows, next_cursor=next_cursor, start_index=1)
+
+    values, direction, start_index = decoded
+    if direction == 'next':
+        cond = _keyset_filter(model, cols, values)
+        qs = queryset.order_by(*ordering)
+    else:
+        reversed_cols = [(name, not desc) for name, desc in cols]
+        cond = _keyset_filter(model, reversed_cols, values)
+        qs = queryset.order_by(*[('-' if not desc else '') + name for name, desc in cols])
+    rows = list(qs.filter(cond)[:per_page + 1]) if cond is not None else []
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == 'next':
+        has_next, has_previous = has_more, True
+    else:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+        if not has_more:
+            start_index = 1
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(ordering, rows[-1], 'next', start_index + len(rows))
+    if rows and has_previous:
+        prev_cursor = encode_cursor(ordering, rows[0], 'prev', max(1, start_index - per_page))
+    return CursorPage(rows, next_cursor=next_cursor, prev_cursor=prev_cursor, start_index=start_index)
+
+
+
+def iterar_por_lotes(queryset, ordering, batch_size=2000):
+    """Recorre todo `queryset` en lotes de `batch_size` filas usando keyset.
+
+    A diferencia de `.iterator()`, no depende de cursores del lado del
+    servidor (el backend MySQL de Django trae el resultado completo al
+    cliente), así que la memoria queda acotada en cualquier motor. Acepta
+    querysets de instancias o de `.values()` que incluyan las columnas de
+    `ordering`.
+    """
+    lote_qs = queryset.order_by(*ordering)
+    while True:
+        lote = list(lote_qs[:batch_size])
+        yield from lote
+        if len(lote) < batch_size:
+            return
+        lote_qs = despues_de(queryset, ordering, lote[-1])
+        if lote_qs is None:
+            return
+
+
+def despues_de(queryset, ordering, fila):
+    """`queryset` ordenado por `ordering` a partir de la fila siguiente a `fila`.
+
+    Devuelve `None` si no puede haber filas posteriores.
+    """
+    cols = _parse_ordering(ordering)
+    cond = _keyset_filter(queryset.model, cols, [_valor(fila, name) for name, _ in cols])
+    if cond is None:
+        return None
+    return queryset.order_by(*ordering).filter(cond)
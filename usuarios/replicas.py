@@ -0,0 +1,190 @@
+"""Lecturas en réplica con consistencia "leer lo propio escrito".
+
+`ReplicaRouter` (en `DATABASE_ROUTERS`) envía a la base `replica` las
+lecturas de modelos de esta app y de `auth` hechas dentro de una vista
+marcada con `@lectura_en_replica` (listados, exportación, dashboard y APIs
+de lectura, incluidos los viewsets de `usuarios.api`) en requests
+GET/HEAD. Todo lo demás va a `default`: escrituras, sesiones, el usuario
+autenticado (se carga antes de la vista), vistas sin marcar y lecturas
+dentro de `transaction.atomic`. Las respuestas en streaming se consultan
+después de que la vista retorna: fijan su queryset con `alias_lectura`.
+
+Tras una escritura el request queda fijado a la primaria, y
+`ReplicaMiddleware` guarda en la sesión hasta cuándo seguir leyendo de la
+primaria (`USUARIOS_REPLICA_PIN_SEGUNDOS`, por la demora de replicación),
+de modo que quien acaba de guardar su perfil no lo vea desactualizado.
+
+Los llenados de las cachés de catálogos y roles leen siempre de la primaria
+con `en_primaria()`: un dato viejo de la réplica quedaría cacheado bajo la
+versión nueva. Los conteos de facetas y estadísticas, agregados caros, leen
+de `alias_lectura()`: la réplica salvo que el request o el usuario haya
+escrito.
+
+Sin alias `replica` en `DATABASES` el router no interviene.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+REPLICA = 'replica'
+SESION_PRIMARIA_HASTA = 'usuarios_primaria_hasta'
+METODOS_SEGUROS = ('GET', 'HEAD')
+# Apps cuyos modelos se pueden leer de la réplica (las sesiones, nunca)
+APPS_REPLICA = {'usuarios', 'auth'}
+
+
+class EstadoReplica:
+    """Estado del request en curso: si puede leer de la réplica y si ya escribió."""
+
+    def __init__(self):
+        self.replica = False
+        self.escribio = False
+
+    @property
+    def requiere_fijar(self):
+        """True si el request escribió y hay réplica: queda una demora de replicación que cubrir."""
+        return self.escribio and replica_configurada()
+
+
+_estado = contextvars.ContextVar('usuarios_replica', default=None)
+_forzar_primaria = contextvars.ContextVar('usuarios_forzar_primaria', default=False)
+
+
+def replica_configurada():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_segundos():
+    return getattr(settings, 'USUARIOS_REPLICA_PIN_SEGUNDOS', 10)
+
+
+@contextmanager
+def estado_request():
+    """Instala un `EstadoReplica` nuevo durante el bloque (lo usa `ReplicaMiddleware`)."""
+    estado = EstadoReplica()
+    token = _estado.set(estado)
+    try:
+        yield estado
+    finally:
+        _estado.reset(token)
+
+
+@contextmanager
+def en_primaria():
+    """Las lecturas del bloque van a `default` aunque la vista use la réplica."""
+    token = _forzar_primaria.set(True)
+    try:
+        yield
+    finally:
+        _forzar_primaria.reset(token)
+
+
+def fijar_primaria(request):
+    """Marca en la sesión que `request.user` debe leer de la primaria por un tiempo."""
+    request.session[SESION_PRIMARIA_HASTA] = time.time() + _pin_segundos()
+
+
+async def afijar_primaria(request):
+    """Versión async de `fijar_primaria`."""
+    await request.session.aset(SESION_PRIMARIA_HASTA, time.time() + _pin_segundos())
+
+
+def fijado_a_primaria(request):
+    """True si el usuario escribió hace menos de `USUARIOS_REPLICA_PIN_SEGUNDOS`."""
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(SESION_PRIMARIA_HASTA, 0) > time.time()
+
+
+async def afijado_a_primaria(request):
+    """Versión async de `fijado_a_primaria`."""
+    session = getattr(request, 'session', None)
+    return session is not None and await session.aget(SESION_PRIMARIA_HASTA, 0) > time.time()
+
+
+def _admite_replica(request):
+    return _estado.get() is not None and replica_configurada() and request.method in METODOS_SEGUROS
+
+
+def _cargar_usuario(request):
+    # `request.user` es perezoso: se resuelve aquí, desde la primaria
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated
+
+
+def alias_lectura(model):
+    """Base desde la que se leería `model` en este punto del request.
+
+    Para consultas que se ejecutan cuando la vista ya retornó (respuestas en
+    streaming): `queryset.using(alias_lectura(model))` conserva la réplica.
+    """
+    return router.db_for_read(model) or DEFAULT_DB_ALIAS
+
+
+def lectura_en_replica(view):
+    """Permite que las lecturas GET/HEAD de la vista (sync o async) vayan a la réplica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _awrapped(request, *args, **kwargs):
+            if not _admite_replica(request) or await afijado_a_primaria(request):
+                return await view(request, *args, **kwargs)
+            if hasattr(request, 'auser'):
+                await request.auser()
+            estado = _estado.get()
+            estado.replica = True
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                estado.replica = False
+        return _awrapped
+
+    @wraps(view)
+    def _wrapped(request, *args, **kwargs):
+        if not _admite_replica(request) or fijado_a_primaria(request):
+            return view(request, *args, **kwargs)
+        _cargar_usuario(request)
+        estado = _estado.get()
+        estado.replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            estado.replica = False
+    return _wrapped
+
+
+class ReplicaRouter:
+    """Router de lecturas a `replica` según el estado del request (ver módulo)."""
+
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if (
+            estado is None
+            or not estado.replica
+            or estado.escribio
+            or _forzar_primaria.get()
+            or model._meta.app_label not in APPS_REPLICA
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS if estado is not None else None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            # El resto del request lee de la primaria
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplica tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación
+        if db == REPLICA:
+            return False
+        return None
@@ -0,0 +1,90 @@
+"""Resolución de roles (grupos) del usuario con caché.
+
+Los nombres de grupo de un usuario se cargan una sola vez por request
+(se guardan en la instancia de `User`) y además se cachean entre requests
+en el backend de caché, con clave por id de usuario. La caché se invalida
+desde las señales `m2m_changed` de `User.groups` y al renombrar o borrar
+un `Group` (ver `usuarios.signals`).
+
+Con varios procesos conviene un backend de caché compartido (Memcached o
+Redis); con `LocMemCache` cada proceso confía en el tiempo de expiración
+`USUARIOS_ROLES_CACHE_TIMEOUT` (segundos).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .replicas import en_primaria
+
+ADMINISTRADOR = 'Administrador'
+JEFE_RRHH = 'Jefe RR.HH.'
+TRABAJADOR = 'Trabajador'
+
+CACHE_PREFIX = 'usuarios:roles'
+GEN_KEY = f'{CACHE_PREFIX}:gen'
+
+
+def _timeout():
+    return getattr(settings, 'USUARIOS_ROLES_CACHE_TIMEOUT', 300)
+
+
+def _generacion():
+    """Generación global de la caché; cambiarla invalida todas las entradas."""
+    gen = cache.get(GEN_KEY)
+    if gen is None:
+        cache.add(GEN_KEY, time.time_ns(), None)
+        gen = cache.get(GEN_KEY)
+    return gen
+
+
+def _key(user_id, gen=None):
+    return f'{CACHE_PREFIX}:{gen or _generacion()}:{user_id}'
+
+
+def roles_de(user):
+    """`frozenset` con los nombres de grupo de `user` (vacío si es anónimo)."""
+    if not getattr(user, 'is_authenticated', False):
+        return frozenset()
+    roles = getattr(user, '_roles_cache', None)
+    if roles is not None:
+        return roles
+    key = _key(user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        with en_primaria():
+            roles = frozenset(user.groups.values_list('name', flat=True))
+        cache.set(key, roles, _timeout())
+    user._roles_cache = roles
+    return roles
+
+
+def tiene_rol(user, *nombres):
+    """True si `user` es superusuario o pertenece a alguno de los grupos `nombres`."""
+    if getattr(user, 'is_superuser', False):
+        return True
+    return not roles_de(user).isdisjoint(nombres)
+
+
+def permisos_usuario(user):
+    """Banderas de permisos usadas por vistas y plantillas para mostrar acciones."""
+    return {
+        'can_view_users': tiene_rol(user, ADMINISTRADOR),
+        'can_view_trabajadores': tiene_rol(user, JEFE_RRHH, ADMINISTRADOR),
+        'can_create_trabajador': tiene_rol(user, JEFE_RRHH),
+        'can_create_usuario': tiene_rol(user, ADMINISTRADOR),
+        'can_manage_catalog': tiene_rol(user, ADMINISTRADOR),
+    }
+
+
+def invalidar_roles(user_ids):
+    """Descarta la caché de roles de los usuarios indicados."""
+    user_ids = list(user_ids or [])
+    if user_ids:
+        gen = _generacion()
+        cache.delete_many([_key(pk, gen) for pk in user_ids])
+
+
+def invalidar_todos_los_roles():
+    """Invalida la caché de todos los usuarios (p. ej. al renombrar un grupo)."""
+    cache.set(GEN_KEY, time.time_ns(), None)
@@ -0,0 +1,77 @@
+"""Utilidades para el RUT chileno.
+
+El RUT se guarda tal como lo ingresa el usuario en `Trabajador.rut` y en
+forma normalizada (cuerpo sin ceros a la izquierda + dígito verificador en
+mayúscula, p. ej. "12345678K") en `Trabajador.rut_normalizado`, que es la
+columna indexada usada para búsquedas exactas y por prefijo.
+"""
+import re
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+_NO_RUT = re.compile(r'[^0-9K]+')
+
+
+def limpiar_rut(valor):
+    """Quita puntos, guion y espacios: " 12.345.678-k " → "12345678K"."""
+    return _NO_RUT.sub('', (valor or '').upper())
+
+
+def calcular_dv(cuerpo):
+    """Dígito verificador (módulo 11) para el cuerpo numérico de un RUT."""
+    total = 0
+    factor = 2
+    for d in reversed(str(cuerpo)):
+        total += int(d) * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - (total % 11)
+    if resto == 11:
+        return '0'
+    if resto == 10:
+        return 'K'
+    return str(resto)
+
+
+def normalizar_rut(valor):
+    """Devuelve el RUT normalizado o `None` si está vacío o su DV no es válido."""
+    limpio = limpiar_rut(valor)
+    if len(limpio) < 2:
+        return None
+    cuerpo, dv = limpio[:-1].lstrip('0'), limpio[-1]
+    if not cuerpo or not cuerpo.isdigit() or len(cuerpo) > 8:
+        return None
+    if calcular_dv(cuerpo) != dv:
+        return None
+    return cuerpo + dv
+
+
+def formatear_rut(normalizado):
+    """Formato de despliegue: "12345678K" → "12.345.678-K"."""
+    if not normalizado:
+        return ''
+    cuerpo, dv = normalizado[:-1], normalizado[-1]
+    return f"{int(cuerpo):,}".replace(',', '.') + f"-{dv}"
+
+
+def validar_rut(valor):
+    """Validador de formularios/modelos: acepta vacío o un RUT con DV correcto."""
+    if valor and normalizar_rut(valor) is None:
+        raise ValidationError('RUT inválido: revise el número y el dígito verificador.')
+
+
+def filtrar_por_rut(queryset, valor):
+    """Filtra por `rut_normalizado` con coincidencia exacta o por prefijo.
+
+    Ambas condiciones usan el índice de la columna: un RUT completo y válido
+    se busca exacto (o como prefijo, por si es un cuerpo sin DV) y cualquier
+    otro fragmento solo como prefijo.
+    """
+    limpio = limpiar_rut(valor).lstrip('0')
+    if not limpio:
+        return queryset
+    normalizado = normalizar_rut(limpio)
+    cond = Q(rut_normalizado__startswith=limpio)
+    if normalizado:
+        cond |= Q(rut_normalizado=normalizado)
+    return queryset.filter(cond)
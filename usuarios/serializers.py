@@ -0,0 +1,85 @@
+"""Serializadores de la API REST (solo lectura) de la app Usuarios.
+
+Todos admiten *sparse fieldsets*: si la vista pasa `fields` en el contexto
+solo se serializan esos campos. `Meta.requisitos` indica qué columnas,
+`select_related` y `prefetch_related` necesita cada campo, para que la
+vista cargue únicamente lo pedido (ver `usuarios.api`).
+"""
+from rest_framework import serializers
+
+from .models import Area, CargaFamiliar, Cargo, ContactoEmergencia, Departamento, Trabajador
+
+
+class CamposDinamicosSerializer(serializers.ModelSerializer):
+    """`ModelSerializer` que descarta los campos no pedidos en `context['fields']`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        pedidos = self.context.get('fields')
+        if pedidos:
+            for nombre in set(self.fields) - set(pedidos):
+                self.fields.pop(nombre)
+
+
+class AreaSerializer(CamposDinamicosSerializer):
+    class Meta:
+        model = Area
+        fields = ['id', 'nombre']
+        requisitos = {}
+
+
+class DepartamentoSerializer(CamposDinamicosSerializer):
+    area_nombre = serializers.CharField(source='area.nombre', read_only=True)
+
+    class Meta:
+        model = Departamento
+        fields = ['id', 'nombre', 'area', 'area_nombre']
+        requisitos = {
+            'area_nombre': {'only': ['area', 'area__nombre'], 'select': ['area']},
+        }
+
+
+class CargoSerializer(CamposDinamicosSerializer):
+    class Meta:
+        model = Cargo
+        fields = ['id', 'nombre']
+        requisitos = {}
+
+
+class ContactoEmergenciaSerializer(CamposDinamicosSerializer):
+    class Meta:
+        model = ContactoEmergencia
+        fields = ['id', 'trabajador', 'nombre', 'parentesco', 'telefono']
+        requisitos = {}
+
+
+class CargaFamiliarSerializer(CamposDinamicosSerializer):
+    class Meta:
+        model = CargaFamiliar
+        fields = ['id', 'trabajador', 'nombre', 'parentesco', 'fecha_nacimiento']
+        requisitos = {}
+
+
+class TrabajadorSerializer(CamposDinamicosSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+    area_nombre = serializers.CharField(source='area.nombre', read_only=True, default=None)
+    departamento_nombre = serializers.CharField(source='departamento.nombre', read_only=True, default=None)
+    cargo_nombre = serializers.CharField(source='cargo.nombre', read_only=True, default=None)
+    contactos_emergencia = ContactoEmergenciaSerializer(many=True, read_only=True)
+    cargas_familiares = CargaFamiliarSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Trabajador
+        fields = [
+            'id', 'user', 'username', 'nombres', 'apellidos', 'rut', 'sexo', 'fecha_ingreso',
+            'area', 'area_nombre', 'departamento', 'departamento_nombre', 'cargo', 'cargo_nombre',
+            'telefono', 'direccion', 'contactos_emergencia', 'cargas_familiares',
+        ]
+        requisitos = {
+            'username': {'only': ['user', 'user__username'], 'select': ['user']},
+            'area_nombre': {'only': ['area', 'area__nombre'], 'select': ['area']},
+            'departamento_nombre': {'only': ['departamento', 'departamento__nombre'], 'select': ['departamento']},
+            'cargo_nombre': {'only': ['cargo', 'cargo__nombre'], 'select': ['cargo']},
+            'contactos_emergencia': {'prefetch': ['contactos_emergencia']},
+            'cargas_familiares': {'prefetch': ['cargas_familiares']},
+        }
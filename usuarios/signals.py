@@ -0,0 +1,111 @@
+"""Señales de la app Usuarios.
+
+Mantienen sincronizadas las estructuras derivadas de los modelos
+(índice de búsqueda, caché de roles, contadores, catálogos, facetas) cuando se guardan registros por el
+ORM, y cuentan las conexiones a la base. Se conectan en `UsuariosConfig.ready`.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .busqueda import indexar_trabajador
+from .catalogos import invalidar_catalogos
+from .conexiones import conexion_abierta
+from .contadores import ajustar, modelos_contados, nombre_contador
+from .facetas import invalidar_facetas
+from .models import Area, Cargo, Departamento, Trabajador
+from .roles import invalidar_roles, invalidar_todos_los_roles
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Trabajador)
+def actualizar_indice_busqueda(sender, instance, raw=False, **kwargs):
+    """Reindexa nombres, apellidos y RUT del trabajador guardado."""
+    if raw:
+        return
+    indexar_trabajador(instance)
+
+
+@receiver(pre_save, sender=Trabajador)
+def detectar_cambio_facetas(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Anota si el guardado cambia campos de facetas, comparando con la fila guardada."""
+    instance._facetas_cambiadas = raw or instance.facetas_cambiadas(update_fields, using)
+
+
+@receiver(post_save, sender=Trabajador)
+def invalidar_conteos_facetas(sender, instance, created=False, **kwargs):
+    """Las altas y los cambios de área, sexo, nombres, etc. cambian los conteos por faceta.
+
+    Guardar solo teléfono o dirección no descarta la caché de conteos,
+    que es global (ver `Trabajador.CAMPOS_FACETAS`).
+    """
+    if created or instance.__dict__.pop('_facetas_cambiadas', True):
+        invalidar_facetas()
+
+
+@receiver(post_delete, sender=Trabajador)
+def invalidar_conteos_facetas_baja(sender, instance, **kwargs):
+    """Una baja de trabajador cambia los conteos por faceta."""
+    invalidar_facetas()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_cache_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """Descarta la caché de roles de los usuarios cuyos grupos cambiaron."""
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if not reverse:
+        # user.groups.add/remove/clear/set
+        instance.__dict__.pop('_roles_cache', None)
+        invalidar_roles([instance.pk])
+    elif action == 'pre_clear':
+        # group.user_set.clear(): aún se conocen los miembros
+        invalidar_roles(instance.user_set.values_list('pk', flat=True))
+    elif pk_set:
+        invalidar_roles(pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidar_roles_por_grupo(sender, instance, created=False, **kwargs):
+    """Un grupo renombrado o eliminado afecta a todos sus miembros."""
+    if not created:
+        invalidar_todos_los_roles()
+
+
+def incrementar_contador(sender, instance, created=False, **kwargs):
+    """Suma 1 al contador del modelo al crear un registro."""
+    if created:
+        ajustar(nombre_contador(sender), 1)
+
+
+def decrementar_contador(sender, instance, **kwargs):
+    """Resta 1 al contador del modelo al eliminar un registro."""
+    ajustar(nombre_contador(sender), -1)
+
+
+for _nombre, _model in modelos_contados().items():
+    post_save.connect(incrementar_contador, sender=_model, dispatch_uid=f'contador_post_save_{_nombre}')
+    post_delete.connect(decrementar_contador, sender=_model, dispatch_uid=f'contador_post_delete_{_nombre}')
+
+
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+@receiver(post_save, sender=Departamento)
+@receiver(post_delete, sender=Departamento)
+@receiver(post_save, sender=Cargo)
+@receiver(post_delete, sender=Cargo)
+def invalidar_cache_catalogos(sender, instance, **kwargs):
+    """Cualquier alta, cambio o baja de catálogo publica una nueva versión."""
+    invalidar_catalogos()
+    # Borrar un catálogo deja en NULL la FK de sus trabajadores sin señales de Trabajador
+    invalidar_facetas()
+
+
+@receiver(connection_created)
+def contar_conexion(sender, connection, **kwargs):
+    """Métricas de conexiones abiertas por proceso (ver `usuarios.conexiones`)."""
+    conexion_abierta(connection)
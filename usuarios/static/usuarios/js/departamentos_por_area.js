@@ -0,0 +1,27 @@
+// Carga los departamentos del área elegida (select con data-departamentos-url y data-area)
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('select[data-departamentos-url]').forEach((depto) => {
+    const area = document.getElementById(depto.dataset.area);
+    if (!area) return;
+    const cache = {};
+
+    const pintar = (departamentos, vacio) => {
+      const actual = depto.value;
+      depto.replaceChildren(new Option(vacio, ''));
+      departamentos.forEach((d) => depto.add(new Option(d.nombre, d.id)));
+      depto.value = departamentos.some((d) => String(d.id) === actual) ? actual : '';
+    };
+
+    area.addEventListener('change', () => {
+      const id = area.value;
+      if (!id) { pintar([], 'Elige primero un área'); return; }
+      if (cache[id]) { pintar(cache[id], '---------'); return; }
+      fetch(`${depto.dataset.departamentosUrl}?area=${encodeURIComponent(id)}`, { headers: { Accept: 'application/json' } })
+        .then((r) => (r.ok ? r.json() : { departamentos: [] }))
+        .then((data) => {
+          cache[id] = data.departamentos;
+          if (area.value === id) pintar(cache[id], '---------');
+        });
+    });
+  });
+});
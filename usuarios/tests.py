@@ -1,3 +1,1382 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import json
+import itertools
+import tempfile
+from datetime import date
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import DataError, OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+
+from .benchmark import excesos_presupuesto, medir_vistas
+from . import aprovisionamiento, contadores, estadisticas, facetas, importacion
+from .aprovisionamiento import aprovisionar_usuarios
+from .conexiones import metricas_conexiones, reiniciar_metricas
+from .db.pool import ConexionesEnPoolMixin, PoolConexiones, pool_de
+from .busqueda import buscar_trabajadores, terminos_consulta, usuarios_sin_trabajador
+from .exportacion import COLUMNAS as COLUMNAS_EXPORTACION, filas_exportacion
+from .filtros import ORDEN_TRABAJADORES, leer_filtros_trabajadores
+from .forms import ContactoFormSet, TrabajadorCreateForm, TrabajadorPersonalForm, UsuarioSignupForm
+from .importacion import ResultadoImportacion, importar_trabajadores
+from .instrumentacion import RegistroSQL, medir_template_response, registrar_sql, render_medido
+from .models import Area, Cargo, ContactoEmergencia, ContadorOrganizacion, Departamento, TerminoBusqueda, Trabajador
+from .paginacion import CURSOR_SALT, paginar_por_cursor
+from .replicas import SESION_PRIMARIA_HASTA, lectura_en_replica, replica_configurada
+from .roles import ADMINISTRADOR, JEFE_RRHH, roles_de
+from .rut import calcular_dv, filtrar_por_rut, formatear_rut, normalizar_rut, validar_rut
 
 # Create your tests here.
+
+
+@lectura_en_replica
+def vista_bases_de_lectura(request):
+    """Base elegida para leer `Area` antes y, con `?escribir=1`, después de escribir.
+
+    Con `?agregados=1` calcula además facetas y estadísticas al final.
+    """
+    bases = [Area.objects.all().db]
+    if request.GET.get('escribir'):
+        Area.objects.create(nombre='Escrita en el request')
+        bases.append(Area.objects.all().db)
+    if request.GET.get('agregados'):
+        facetas.conteos_facetas(leer_filtros_trabajadores({}))
+        estadisticas.estadisticas('area')
+    return JsonResponse({'bases': bases})
+
+
+# URLs propias de las pruebas de réplica (`ROOT_URLCONF='usuarios.tests'`)
+urlpatterns = [path('bases/', vista_bases_de_lectura)]
+
+
+class PresupuestoConsultasTests(TestCase):
+    """Cada vista de `usuarios.urls` respeta su presupuesto de consultas y
+    no agrega consultas al crecer la cantidad de trabajadores."""
+
+    def setUp(self):
+        # Cachés de roles y catálogos compartidas entre tests
+        cache.clear()
+
+    def sembrar(self, workers):
+        call_command('seed_scale', workers=workers, batch_size=100, stdout=io.StringIO())
+
+    def test_vistas_dentro_del_presupuesto(self):
+        self.sembrar(60)
+        resultados = medir_vistas(repeticiones=2)
+        self.assertEqual(excesos_presupuesto(resultados), [])
+
+    def test_consultas_no_crecen_con_los_datos(self):
+        self.sembrar(20)
+        antes = medir_vistas(repeticiones=1)
+        self.sembrar(80)
+        despues = medir_vistas(repeticiones=1)
+        for ruta, por_rol in despues.items():
+            for rol, medicion in por_rol.items():
+                with self.subTest(ruta=ruta, rol=rol):
+                    self.assertEqual(medicion['consultas'], antes[ruta][rol]['consultas'])
+
+
+class ConsultasFormulariosCatalogoTests(TestCase):
+    """Renderizar los formularios de registro y alta no consulta una vez por departamento."""
+
+    def setUp(self):
+        cache.clear()
+        self.area = Area.objects.create(nombre='Operaciones')
+        self.otra = Area.objects.create(nombre='Finanzas')
+
+    def agregar_departamentos(self, cantidad):
+        inicio = Departamento.objects.count()
+        for i in range(inicio, inicio + cantidad):
+            Departamento.objects.create(nombre=f'Depto {i:03d}', area=self.area if i % 2 else self.otra)
+
+    def renderizar(self, form_class):
+        # Caché vacía: incluye la carga de catálogos
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            html = form_class(initial={'area': self.area.pk}).as_p()
+        return len(consultas), html
+
+    def test_consultas_fijas_al_crecer_los_departamentos(self):
+        for form_class in (UsuarioSignupForm, TrabajadorCreateForm):
+            with self.subTest(form=form_class.__name__):
+                self.agregar_departamentos(4)
+                antes, _ = self.renderizar(form_class)
+                self.agregar_departamentos(40)
+                despues, html = self.renderizar(form_class)
+                self.assertEqual(despues, antes)
+                self.assertIn('Depto 043', html)
+                self.assertNotIn('Depto 042', html)  # de otra área
+
+
+class EndpointsCatalogoTests(TestCase):
+    """ETag de los endpoints de catálogo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.area = Area.objects.create(nombre='Operaciones')
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(USUARIOS_CATALOGOS_TTL=0)
+    def test_etag_sigue_a_los_datos_y_no_a_la_version_local(self):
+        url = reverse('usuarios:api_catalogo_areas')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Cambio hecho por otro proceso: la versión en esta caché local no se entera
+        Area.objects.filter(pk=self.area.pk).update(nombre='Logística')
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.json()['areas'][0]['nombre'], 'Logística')
+
+
+class InvalidacionFacetasTests(TestCase):
+    """Solo las altas, bajas y cambios de campos filtrables renuevan la generación de facetas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.area = Area.objects.create(nombre='Operaciones')
+        cls.user = get_user_model().objects.create_user('ana')
+
+    def setUp(self):
+        cache.clear()
+
+    def renueva_generacion(self, escritura):
+        antes = facetas.generacion()
+        with self.captureOnCommitCallbacks(execute=True):
+            escritura()
+        return facetas.generacion() != antes
+
+    def test_altas_cambios_y_bajas(self):
+        trabajador = Trabajador(user=self.user, nombres='Ana', apellidos='Rojas', sexo='F')
+        self.assertTrue(self.renueva_generacion(trabajador.save))
+
+        trabajador.telefono = '+56911111111'
+        self.assertFalse(self.renueva_generacion(trabajador.save))
+        trabajador.area = self.area
+        self.assertTrue(self.renueva_generacion(trabajador.save))
+        self.assertFalse(self.renueva_generacion(trabajador.save))
+
+        cargado = Trabajador.objects.get(pk=trabajador.pk)
+        cargado.direccion = 'Av. Siempre Viva 742'
+        self.assertFalse(self.renueva_generacion(cargado.save))
+        cargado.sexo = 'O'
+        # Sin `sexo` en update_fields el cambio no se guarda
+        self.assertFalse(self.renueva_generacion(lambda: cargado.save(update_fields=['direccion'])))
+        self.assertTrue(self.renueva_generacion(lambda: cargado.save(update_fields=['sexo'])))
+
+        # Los campos diferidos no se leen ni se comparan (`save` siempre recalcula el RUT normalizado)
+        diferido = Trabajador.objects.only('telefono', 'rut', 'rut_normalizado').get(pk=trabajador.pk)
+        diferido.telefono = ''
+        self.assertFalse(self.renueva_generacion(diferido.save))
+        self.assertTrue(self.renueva_generacion(diferido.delete))
+
+    def test_compara_con_la_fila_guardada_solo_si_se_guardan_facetas(self):
+        trabajador = Trabajador.objects.create(user=self.user, nombres='Ana', apellidos='Rojas', sexo='F')
+
+        def lecturas_de_trabajador(escritura):
+            with CaptureQueriesContext(connection) as consultas:
+                escritura()
+            return sum(c['sql'].startswith('SELECT') and 'FROM "usuarios_trabajador"' in c['sql'] for c in consultas)
+
+        self.assertEqual(lecturas_de_trabajador(lambda: trabajador.save(update_fields=['telefono'])), 0)
+        self.assertEqual(lecturas_de_trabajador(trabajador.save), 1)
+        # Cargar trabajadores no prepara nada para la comparación
+        with self.assertNumQueries(1):
+            list(Trabajador.objects.all())
+        # Un cambio hecho por otra instancia se detecta contra la fila guardada
+        Trabajador.objects.filter(pk=trabajador.pk).update(sexo='O')
+        self.assertTrue(self.renueva_generacion(trabajador.save))
+
+
+@override_settings(USUARIOS_CONTADORES_FRAGMENTOS=4)
+class ContadoresTests(TestCase):
+    """Ajuste por fragmentos y reconciliación de `ContadorOrganizacion`."""
+
+    def reconciliar(self, *args):
+        call_command('reconcile_counters', *args, stdout=io.StringIO())
+
+    def test_ajustar_suma_en_el_fragmento_propio_o_en_el_0(self):
+        self.reconciliar()
+        self.assertEqual(ContadorOrganizacion.objects.filter(nombre='areas').count(), 4)
+        for fragmento, delta in ((0, 2), (3, 2), (1, -1)):
+            with mock.patch.object(contadores, '_fragmento_propio', return_value=fragmento):
+                contadores.ajustar('areas', delta)
+        self.assertEqual(contadores.totales_organizacion()['total_areas'], 3)
+        self.assertEqual(ContadorOrganizacion.objects.get(nombre='areas', fragmento=3).total, 2)
+
+        ContadorOrganizacion.objects.filter(nombre='areas', fragmento__gt=0).delete()
+        with mock.patch.object(contadores, '_fragmento_propio', return_value=2):
+            contadores.ajustar('areas', 5)
+        self.assertEqual(ContadorOrganizacion.objects.get(nombre='areas', fragmento=0).total, 7)
+
+    def test_senales_y_reconciliacion(self):
+        Area.objects.create(nombre='Operaciones')
+        # Sin filas todavía: se reconcilia al leer
+        self.assertEqual(contadores.totales_organizacion()['total_areas'], 1)
+        Area.objects.create(nombre='Finanzas')
+        Area.objects.bulk_create([Area(nombre='Logística')])  # sin señales
+        self.assertEqual(contadores.totales_organizacion()['total_areas'], 2)
+
+        self.reconciliar('--dry-run')
+        self.assertEqual(contadores.totales_organizacion()['total_areas'], 2)
+        self.assertEqual(contadores.reconciliar()['areas'], (2, 3))
+        self.assertEqual(contadores.totales_organizacion()['total_areas'], 3)
+        self.assertEqual(
+            list(ContadorOrganizacion.objects.filter(nombre='areas').order_by('fragmento').values_list('total', flat=True)),
+            [3, 0, 0, 0],
+        )
+        Area.objects.filter(nombre='Finanzas').delete()
+        self.assertEqual(contadores.totales_organizacion()['total_areas'], 2)
+        self.assertEqual(contadores.reconciliar()['areas'], (2, 2))
+
+
+class RutTests(TestCase):
+    """Dígito verificador, normalización, búsqueda y relleno de `rut_normalizado`."""
+
+    def test_digito_verificador(self):
+        self.assertEqual(calcular_dv(12345678), '5')
+        self.assertEqual(calcular_dv('11111111'), '1')
+        self.assertEqual(calcular_dv(1000005), 'K')
+        self.assertEqual(calcular_dv(1000013), '0')
+
+    def test_normalizar(self):
+        casos = {
+            '12.345.678-5': '123456785',
+            ' 12345678-5 ': '123456785',
+            '123456785': '123456785',
+            '012.345.678-5': '123456785',
+            '1.000.005-k': '1000005K',
+            '1000005K': '1000005K',
+            '1.000.013-0': '10000130',
+            '12.345.678-4': None,  # DV incorrecto
+            '1.000.005-0': None,
+            '123.456.789-2': None,  # cuerpo de 9 dígitos
+            '0-0': None,
+            '5': None,
+            '': None,
+            None: None,
+            'SIN-RUT': None,
+        }
+        for valor, esperado in casos.items():
+            with self.subTest(valor=valor):
+                self.assertEqual(normalizar_rut(valor), esperado)
+        self.assertEqual(formatear_rut('1000005K'), '1.000.005-K')
+        self.assertEqual(formatear_rut(None), '')
+
+    def test_validar(self):
+        for valor in ('', None, '12.345.678-5', '1000005-k'):
+            validar_rut(valor)
+        for valor in ('12.345.678-4', 'SIN-RUT', 'abc'):
+            with self.subTest(valor=valor), self.assertRaises(ValidationError):
+                validar_rut(valor)
+
+    def crear(self, username, rut):
+        user = get_user_model().objects.create_user(username)
+        return Trabajador.objects.create(user=user, nombres=username, apellidos='Prueba', sexo='O', rut=rut)
+
+    def test_formulario_valida_el_rut_solo_si_cambia(self):
+        # RUT heredado con DV inválido: se puede editar el resto del perfil
+        legado = self.crear('ana', '12.345.678-4')
+        datos = {'nombres': 'Ana María', 'apellidos': 'Prueba', 'sexo': 'O', 'rut': '12.345.678-4'}
+        form = TrabajadorPersonalForm(datos, instance=legado)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        legado.refresh_from_db()
+        self.assertEqual((legado.nombres, legado.rut, legado.rut_normalizado), ('Ana María', '12.345.678-4', None))
+
+        # Cambiarlo por otro inválido no se acepta; por uno válido, sí
+        form = TrabajadorPersonalForm({**datos, 'rut': '1.000.005-0'}, instance=legado)
+        self.assertIn('rut', form.errors)
+        form = TrabajadorPersonalForm({**datos, 'rut': '1.000.005-K'}, instance=legado)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().rut_normalizado, '1000005K')
+
+    def test_filtrar_por_rut_exacto_y_por_prefijo(self):
+        ana = self.crear('ana', '12.345.678-5')
+        beto = self.crear('beto', '1.000.005-K')
+        self.crear('carla', '')
+        self.assertIsNone(Trabajador.objects.get(user__username='carla').rut)
+
+        def encontrados(valor):
+            return set(filtrar_por_rut(Trabajador.objects.all(), valor).values_list('pk', flat=True))
+
+        self.assertEqual(encontrados('12.345.678-5'), {ana.pk})
+        self.assertEqual(encontrados('0012345678-5'), {ana.pk})
+        self.assertEqual(encontrados('12.345'), {ana.pk})
+        self.assertEqual(encontrados('1000005k'), {beto.pk})
+        self.assertEqual(encontrados('1'), {ana.pk, beto.pk})
+        self.assertEqual(encontrados('9'), set())
+        self.assertEqual(len(encontrados('')), 3)
+        self.assertEqual(len(encontrados('-.')), 3)
+
+    def test_migracion_rellena_rut_normalizado(self):
+        migracion = importlib.import_module('usuarios.migrations.0005_trabajador_rut_normalizado')
+        ruts = {'ana': '12.345.678-5', 'beto': '1000005k', 'carla': 'SIN-RUT', 'diego': '', 'eva': '12.345.678-4'}
+        for username in ruts:
+            self.crear(username, None)
+        for username, rut in ruts.items():
+            # Datos previos a la columna normalizada: sin pasar por `save`
+            Trabajador.objects.filter(user__username=username).update(rut=rut, rut_normalizado=None)
+
+        migracion.normalizar_ruts(apps, None)
+        self.assertEqual(
+            dict(Trabajador.objects.values_list('user__username', 'rut_normalizado')),
+            {'ana': '123456785', 'beto': '1000005K', 'carla': None, 'diego': None, 'eva': None},
+        )
+        self.assertEqual(
+            dict(Trabajador.objects.values_list('user__username', 'rut')),
+            {'ana': '12.345.678-5', 'beto': '1000005k', 'carla': None, 'diego': None, 'eva': '12.345.678-4'},
+        )
+
+
+class SanitizeTrabajadoresTests(TestCase):
+    """Conteos de `--dry-run`, cada regla de saneo y tramos con ids dispersos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.ids = {}
+        for n, (username, cambios) in enumerate([
+            ('bien', {}),
+            ('sin_nombres', {'nombres': ''}),
+            ('sin_apellidos', {'apellidos': ''}),
+            ('sexo_x', {'sexo': 'X'}),
+            ('rut_vacio', {'rut': ''}),
+            ('rut_huerfano', {'rut_normalizado': '123456785'}),
+            ('sin_ingreso', {'fecha_ingreso': None}),
+        ]):
+            # Ids dispersos: tramos por rango fijo recorrerían miles de ids vacíos
+            user = User.objects.create_user(username, id=1 + n * 10000)
+            t = Trabajador.objects.create(
+                user=user, nombres=username, apellidos='Prueba', sexo='O', fecha_ingreso=date(2020, 1, 1),
+            )
+            Trabajador.objects.filter(pk=t.pk).update(**cambios)  # sin pasar por `save`
+            cls.ids[username] = t.pk
+        User.objects.create_user('sin_trabajador', id=200000)
+
+    def sanear(self, **opciones):
+        salida = io.StringIO()
+        with mock.patch('usuarios.management.commands.sanitize_trabajadores.invalidar_facetas') as invalidar:
+            call_command('sanitize_trabajadores', chunk_size=3, stdout=salida, **opciones)
+        conteos = dict(linea.split(': ') for linea in salida.getvalue().splitlines() if ': ' in linea)
+        return conteos, invalidar.call_count
+
+    def test_dry_run_cuenta_sin_modificar(self):
+        conteos, invalidaciones = self.sanear(dry_run=True)
+        self.assertEqual(conteos, {
+            'usuarios sin trabajador': '1 (dry-run)',
+            'nombres vacíos': '1 (dry-run)',
+            'apellidos vacíos': '1 (dry-run)',
+            'sexo inválido': '1 (dry-run)',
+            'rut vacío': '2 (dry-run)',
+            'fecha_ingreso nula': '1 (dry-run)',
+        })
+        self.assertEqual(invalidaciones, 0)
+        self.assertEqual(Trabajador.objects.count(), 7)
+        self.assertTrue(Trabajador.objects.filter(nombres='').exists())
+
+    def test_aplica_cada_regla_e_invalida_una_vez(self):
+        conteos, invalidaciones = self.sanear()
+        self.assertEqual(conteos, {
+            'usuarios sin trabajador': '1', 'nombres vacíos': '1', 'apellidos vacíos': '1',
+            'sexo inválido': '1', 'rut vacío': '2', 'fecha_ingreso nula': '1',
+        })
+        self.assertEqual(invalidaciones, 1)
+
+        filas = {
+            username: Trabajador.objects.filter(pk=pk).values(
+                'nombres', 'apellidos', 'sexo', 'rut', 'rut_normalizado', 'fecha_ingreso'
+            ).get()
+            for username, pk in self.ids.items()
+        }
+        self.assertEqual(filas['sin_nombres']['nombres'], 'SinNombre')
+        self.assertEqual(filas['sin_apellidos']['apellidos'], 'SinApellido')
+        self.assertEqual(filas['sexo_x']['sexo'], 'O')
+        self.assertEqual((filas['rut_vacio']['rut'], filas['rut_vacio']['rut_normalizado']), (None, None))
+        self.assertIsNone(filas['rut_huerfano']['rut_normalizado'])
+        self.assertEqual(filas['sin_ingreso']['fecha_ingreso'], date.today())
+        self.assertEqual(filas['bien']['fecha_ingreso'], date(2020, 1, 1))
+
+        nuevo = Trabajador.objects.get(user__username='sin_trabajador')
+        self.assertEqual((nuevo.nombres, nuevo.apellidos, nuevo.sexo), ('sin_trabajador', 'Demo', 'O'))
+        # `bulk_create` y `update` no disparan señales: el índice de búsqueda se sincroniza a mano
+        indexados = TerminoBusqueda.objects.filter(termino__in=['sinnombre', 'sintrabajador'])
+        self.assertEqual(set(indexados.values_list('trabajador_id', flat=True)), {self.ids['sin_nombres'], nuevo.pk})
+
+        # Sin nada que reparar no se invalida
+        conteos, invalidaciones = self.sanear()
+        self.assertEqual(set(conteos.values()), {'0'})
+        self.assertEqual(invalidaciones, 0)
+
+    def test_tramos_saltan_los_huecos_de_ids(self):
+        Command = importlib.import_module('usuarios.management.commands.sanitize_trabajadores').Command
+        usuarios = get_user_model().objects.all()
+        tramos = [list(tramo.values_list('pk', flat=True)) for tramo in Command()._tramos(usuarios, 3)]
+        self.assertEqual([len(ids) for ids in tramos], [3, 3, 2])
+        self.assertEqual(sum(tramos, []), list(usuarios.order_by('pk').values_list('pk', flat=True)))
+
+
+class PaginacionCursorTests(TestCase):
+    """Recorrido por cursor en cada orden del listado, con fechas NULL y empates."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        # Apellidos y nombres repetidos, fechas repetidas y varias NULL
+        fechas = [None, date(2020, 1, 1), date(2020, 1, 1), None, date(2019, 5, 5), date(2021, 3, 3), None]
+        for i in range(17):
+            Trabajador.objects.create(
+                user=User.objects.create_user(f'u{i:02d}'),
+                nombres=['Ana', 'Luis', 'Ana María'][i % 3],
+                apellidos=['Rojas', 'Soto'][i % 2],
+                sexo='O',
+                fecha_ingreso=fechas[i % len(fechas)],
+            )
+
+    def recorrer(self, ordering, per_page):
+        qs = Trabajador.objects.all()
+        paginas = [paginar_por_cursor(qs, ordering, per_page=per_page)]
+        while paginas[-1].has_next():
+            paginas.append(paginar_por_cursor(qs, ordering, paginas[-1].next_cursor, per_page=per_page))
+        hacia_atras = [paginas[-1]]
+        while hacia_atras[-1].has_previous():
+            hacia_atras.append(paginar_por_cursor(qs, ordering, hacia_atras[-1].prev_cursor, per_page=per_page))
+        return paginas, hacia_atras[::-1]
+
+    def test_recorrido_sin_saltos_ni_repetidos(self):
+        for order, ordering in ORDEN_TRABAJADORES.items():
+            if order == 'relevance':
+                continue
+            esperado = list(Trabajador.objects.order_by(*ordering).values_list('pk', flat=True))
+            for per_page in (1, 3, 5, 17, 20):
+                with self.subTest(order=order, per_page=per_page):
+                    adelante, atras = self.recorrer(ordering, per_page)
+                    self.assertEqual([t.pk for p in adelante for t in p], esperado)
+                    self.assertEqual([[t.pk for t in p] for p in atras], [[t.pk for t in p] for p in adelante])
+                    self.assertEqual([p.start_index() for p in adelante], list(range(1, len(esperado) + 1, per_page)))
+                    self.assertEqual(atras[0].start_index(), 1)
+                    self.assertFalse(adelante[0].has_previous())
+
+    def test_api_trabajadores_pagina_por_cursor(self):
+        self.client.force_login(get_user_model().objects.get(username='u00'))
+        url = reverse('usuarios:api_trabajadores')
+        vistos, params = [], {'page_size': 5}
+        while True:
+            datos = self.client.get(url, params).json()
+            self.assertLessEqual(len(datos['trabajadores']), 5)
+            vistos += [t['id'] for t in datos['trabajadores']]
+            if datos['next_cursor'] is None:
+                break
+            params['cursor'] = datos['next_cursor']
+        ordering = ORDEN_TRABAJADORES['name_asc']
+        self.assertEqual(vistos, list(Trabajador.objects.order_by(*ordering).values_list('pk', flat=True)))
+
+        # Tamaño acotado y búsqueda con relevancia
+        self.assertEqual(len(self.client.get(url, {'page_size': 0}).json()['trabajadores']), 1)
+        datos = self.client.get(url, {'q': 'luis', 'page_size': 'x'}).json()
+        self.assertEqual({t['relevancia'] for t in datos['trabajadores']}, {2})
+        self.assertEqual(len(datos['trabajadores']), 6)
+
+    def test_cursor_alterado_o_de_otro_formato_vuelve_a_la_primera_pagina(self):
+        qs = Trabajador.objects.all()
+        ordering = ORDEN_TRABAJADORES['date_asc']
+        primera = [t.pk for t in paginar_por_cursor(qs, ordering, per_page=5)]
+        segunda = paginar_por_cursor(qs, ordering, paginar_por_cursor(qs, ordering, per_page=5).next_cursor, per_page=5)
+        self.assertEqual(segunda.start_index(), 6)
+
+        payload = signing.loads(paginar_por_cursor(qs, ordering, per_page=5).next_cursor, salt=CURSOR_SALT)
+        cursores = {
+            'alterado': paginar_por_cursor(qs, ordering, per_page=5).next_cursor[:-2] + 'xx',
+            'basura': 'no-es-un-cursor',
+            'otro_salt': signing.dumps(payload, salt='otro'),
+            'sin_firma': signing.b64_encode(b'{"o":["fecha_ingreso","id"]}').decode(),
+            'otro_orden': signing.dumps({**payload, 'o': ORDEN_TRABAJADORES['name_asc']}, salt=CURSOR_SALT),
+            'sin_inicio': signing.dumps({k: v for k, v in payload.items() if k != 'n'}, salt=CURSOR_SALT),
+            'inicio_invalido': signing.dumps({**payload, 'n': 0}, salt=CURSOR_SALT),
+            'direccion_invalida': signing.dumps({**payload, 'd': 'up'}, salt=CURSOR_SALT),
+            'valores_de_mas': signing.dumps({**payload, 'v': payload['v'] + [1]}, salt=CURSOR_SALT),
+            'fecha_invalida': signing.dumps({**payload, 'v': ['2020-13-45', 1]}, salt=CURSOR_SALT),
+        }
+        for nombre, cursor in cursores.items():
+            with self.subTest(cursor=nombre):
+                pagina = paginar_por_cursor(qs, ordering, cursor, per_page=5)
+                self.assertEqual([t.pk for t in pagina], primera)
+                self.assertEqual(pagina.start_index(), 1)
+                self.assertFalse(pagina.has_previous())
+
+
+class BusquedaTests(TestCase):
+    """Búsqueda indexada de `buscar_trabajadores` y su orden por relevancia."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.ids = {}
+        for username, nombres, apellidos, rut in [
+            ('sofia', 'Sofía', 'Núñez Rojas', '12.345.678-5'),
+            ('sofiana', 'Sofiana', 'Rojas', None),
+            ('ana', 'Ana Sofía', 'Pérez-Cotapos', None),
+            ('luis', 'Luis', 'Soto', '1.000.005-K'),
+        ]:
+            t = Trabajador.objects.create(
+                user=User.objects.create_user(username), nombres=nombres, apellidos=apellidos, sexo='O', rut=rut,
+            )
+            cls.ids[username] = t.pk
+
+    def buscar(self, q, ordering=('-relevancia', 'apellidos', 'nombres', 'id')):
+        qs = buscar_trabajadores(Trabajador.objects.all(), q).order_by(*ordering)
+        nombres = {pk: u for u, pk in self.ids.items()}
+        return [(nombres[t.pk], getattr(t, 'relevancia', None)) for t in qs]
+
+    def test_terminos_consulta(self):
+        self.assertEqual(terminos_consulta('  Sofía  NÚÑEZ sofia '), ['sofia', 'nunez'])
+        self.assertEqual(terminos_consulta('12.345.678-5'), ['123456785'])
+        self.assertEqual(terminos_consulta(' .- '), [])
+
+    def test_sin_acentos_por_prefijo_y_con_todos_los_terminos(self):
+        self.assertEqual({u for u, _ in self.buscar('SOFÍA')}, {'sofia', 'sofiana', 'ana'})
+        self.assertEqual({u for u, _ in self.buscar('sof roj')}, {'sofia', 'sofiana'})
+        self.assertEqual({u for u, _ in self.buscar('cotapos')}, {'ana'})
+        self.assertEqual({u for u, _ in self.buscar('perez-cotapos')}, {'ana'})
+        self.assertEqual({u for u, _ in self.buscar('12.345.678-5')}, {'sofia'})
+        self.assertEqual({u for u, _ in self.buscar('1000005k')}, {'luis'})
+        self.assertEqual(self.buscar('sofia xyz'), [])
+        # Sin términos no filtra ni anota
+        self.assertEqual(buscar_trabajadores(Trabajador.objects.all(), ' - ').count(), 4)
+
+    def test_relevancia_exacto_antes_que_prefijo(self):
+        # "sofia" es término exacto de sofia y ana (2) y prefijo de "sofiana" (1); empate por apellidos
+        self.assertEqual(self.buscar('sofia'), [('sofia', 2), ('ana', 2), ('sofiana', 1)])
+        # rojas exacto (2) + prefijo "sofia"/"sofiana"
+        self.assertEqual(self.buscar('rojas sofia'), [('sofia', 4), ('sofiana', 3)])
+
+    def test_indice_sigue_a_los_cambios(self):
+        luis = Trabajador.objects.get(pk=self.ids['luis'])
+        luis.apellidos = 'Sotomayor'
+        luis.save()
+        self.assertEqual(self.buscar('soto'), [('luis', 1)])
+        self.assertEqual(self.buscar('sotomayor'), [('luis', 2)])
+
+    def test_pagina_por_relevancia_sin_saltos(self):
+        ordering = ORDEN_TRABAJADORES['relevance']
+        qs = buscar_trabajadores(Trabajador.objects.all(), 'sofia')
+        vistos, cursor = [], None
+        while True:
+            pagina = paginar_por_cursor(qs, ordering, cursor, per_page=1)
+            vistos += [t.pk for t in pagina]
+            if not pagina.has_next():
+                break
+            cursor = pagina.next_cursor
+        self.assertEqual(vistos, [self.ids[u] for u in ('sofia', 'ana', 'sofiana')])
+
+    def test_migracion_construye_el_mismo_indice(self):
+        migracion = importlib.import_module('usuarios.migrations.0004_terminobusqueda')
+        esperados = set(TerminoBusqueda.objects.values_list('trabajador_id', 'termino'))
+        TerminoBusqueda.objects.all().delete()
+        migracion.poblar_indice(apps, None)
+        self.assertEqual(set(TerminoBusqueda.objects.values_list('trabajador_id', 'termino')), esperados)
+        self.assertIn((self.ids['ana'], 'cotapos'), esperados)
+
+
+@skipUnless(replica_configurada(), 'Requiere una réplica: DB_REPLICA_NAME (SQLite) o DB_REPLICA_HOST (MySQL)')
+@override_settings(ROOT_URLCONF='usuarios.tests', USUARIOS_REPLICA_PIN_SEGUNDOS=60)
+class ReplicaRouterTests(TransactionTestCase):
+    """Lecturas de vistas `@lectura_en_replica` y fijación a la primaria tras escribir.
+
+    Sin la transacción envolvente de `TestCase`: dentro de `atomic` todo se lee de la primaria.
+    """
+    # El runner junta las bases de todas las clases, incluso las omitidas
+    databases = {'default', 'replica'} if replica_configurada() else {'default'}
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('ana'))
+
+    def bases(self, **params):
+        return self.client.get('/bases/', params).json()['bases']
+
+    def test_lecturas_en_replica_y_primaria_tras_escribir(self):
+        self.assertEqual(self.bases(), ['replica'])
+        self.assertNotIn(SESION_PRIMARIA_HASTA, self.client.session)
+
+        # El mismo request pasa a la primaria después de escribir
+        self.assertEqual(self.bases(escribir=1), ['replica', 'default'])
+        self.assertIn(SESION_PRIMARIA_HASTA, self.client.session)
+
+        # Los siguientes requests de la sesión leen de la primaria mientras dure la marca
+        self.assertEqual(self.bases(), ['default'])
+        sesion = self.client.session
+        sesion[SESION_PRIMARIA_HASTA] = 0
+        sesion.save()
+        self.assertEqual(self.bases(), ['replica'])
+
+    def test_sin_marcar_post_o_fuera_de_un_request_usan_la_primaria(self):
+        self.assertEqual(Area.objects.all().db, 'default')
+        self.assertEqual(self.client.post('/bases/').json()['bases'], ['default'])
+        # Otra sesión no queda fijada por las escrituras de esta
+        self.assertEqual(self.bases(escribir=1), ['replica', 'default'])
+        self.client.force_login(get_user_model().objects.create_user('beto'))
+        self.assertEqual(self.bases(), ['replica'])
+
+    def test_facetas_y_estadisticas_se_cuentan_en_la_base_de_lectura(self):
+        # Escribir un área renueva la generación: el segundo request vuelve a contar
+        cache.clear()
+        with mock.patch('usuarios.facetas._contar', return_value={}) as contar_facetas, \
+                mock.patch('usuarios.estadisticas._contar', return_value={}) as contar_estadisticas:
+            self.bases(agregados=1)
+            self.bases(agregados=1, escribir=1)
+        self.assertEqual([c.args[-1] for c in contar_facetas.call_args_list], ['replica', 'default'])
+        self.assertEqual([c.args[-1] for c in contar_estadisticas.call_args_list], ['replica', 'default'])
+
+
+class ConexionFalsa:
+    """Conexión del driver para `PoolConexiones`: solo registra si se cerró."""
+
+    def __init__(self):
+        self.cerrada = False
+
+    def close(self):
+        self.cerrada = True
+
+
+class SQLitePoolWrapper(ConexionesEnPoolMixin, SQLiteDatabaseWrapper):
+    """`ConexionesEnPoolMixin` sobre SQLite: el mismo recorrido que `usuarios.db.mysql_pool`."""
+
+
+class PoolConexionesTests(SimpleTestCase):
+    """Tope, espera, vida máxima, descartes y métricas de `usuarios.db.pool`."""
+
+    def setUp(self):
+        reiniciar_metricas()
+        self.addCleanup(reiniciar_metricas)
+
+    def metricas(self, alias):
+        return {k: v for k, v in metricas_conexiones()['alias'].get(alias, {}).items() if v}
+
+    def test_tope_y_tiempo_de_espera(self):
+        pool = PoolConexiones('prueba_tope', max_size=2, timeout=0.05)
+        primera, abierta_en, reutilizada = pool.tomar(ConexionFalsa)
+        self.assertFalse(reutilizada)
+        pool.tomar(ConexionFalsa)
+        with self.assertRaises(OperationalError):
+            pool.tomar(ConexionFalsa)
+        self.assertEqual(self.metricas('prueba_tope'), {'esperas': 1, 'agotadas': 1})
+        self.assertEqual(pool.estado(), {'max_size': 2, 'en_uso': 2, 'libres': 0})
+
+        # Al devolverla queda cupo y se entrega la misma conexión abierta
+        pool.devolver(primera, abierta_en)
+        self.assertEqual(pool.estado(), {'max_size': 2, 'en_uso': 1, 'libres': 1})
+        self.assertEqual(pool.tomar(ConexionFalsa), (primera, abierta_en, True))
+        self.assertEqual(self.metricas('prueba_tope')['reutilizadas'], 1)
+
+    def test_descarta_vencidas_no_usables_y_no_reutilizables(self):
+        pool = PoolConexiones('prueba_descartes', max_size=1, max_lifetime=60)
+        vencida, abierta_en, _ = pool.tomar(ConexionFalsa)
+        pool.devolver(vencida, abierta_en - 61)
+        nueva, abierta_en, reutilizada = pool.tomar(ConexionFalsa)
+        self.assertTrue(vencida.cerrada)
+        self.assertIsNot(nueva, vencida)
+        self.assertFalse(reutilizada)
+
+        pool.devolver(nueva, abierta_en)
+        otra, abierta_en, reutilizada = pool.tomar(ConexionFalsa, usable=lambda conexion: False)
+        self.assertTrue(nueva.cerrada)
+        self.assertFalse(reutilizada)
+
+        pool.devolver(otra, abierta_en, reutilizable=False)
+        self.assertTrue(otra.cerrada)
+        self.assertEqual(pool.estado(), {'max_size': 1, 'en_uso': 0, 'libres': 0})
+        self.assertEqual(self.metricas('prueba_descartes'), {'descartadas': 3})
+
+    def test_error_al_conectar_libera_el_cupo(self):
+        pool = PoolConexiones('prueba_error', max_size=1, timeout=0.05)
+
+        def falla():
+            raise OperationalError('sin servidor')
+
+        with self.assertRaisesMessage(OperationalError, 'sin servidor'):
+            pool.tomar(falla)
+        pool.tomar(ConexionFalsa)
+        self.assertEqual(pool.estado()['en_uso'], 1)
+
+    def wrapper(self, alias):
+        archivo = tempfile.NamedTemporaryFile(suffix='.sqlite3')
+        self.addCleanup(archivo.close)
+        wrapper = SQLitePoolWrapper({
+            **connection.settings_dict, 'ENGINE': 'usuarios.db.pool', 'NAME': archivo.name,
+            'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {'pool': {'max_size': 1, 'timeout': 0.05}},
+        }, alias)
+        self.addCleanup(lambda: pool_de(alias, {}).cerrar_libres())
+        return wrapper
+
+    def test_wrapper_devuelve_la_conexion_al_cerrar(self):
+        wrapper = self.wrapper('prueba_wrapper')
+        wrapper.connect()
+        fisica = wrapper.connection
+        wrapper.close()
+        self.assertEqual(pool_de('prueba_wrapper', {}).estado(), {'max_size': 1, 'en_uso': 0, 'libres': 1})
+
+        wrapper.connect()
+        self.assertIs(wrapper.connection, fisica)
+        self.assertTrue(wrapper.conexion_reutilizada)
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        wrapper.close()
+        self.assertEqual(self.metricas('prueba_wrapper'), {'creadas': 1, 'reutilizadas': 1})
+
+    def test_wrapper_descarta_con_errores_o_dentro_de_una_transaccion(self):
+        wrapper = self.wrapper('prueba_wrapper_descartes')
+        pool = pool_de('prueba_wrapper_descartes', {})
+        for marcar in ('errors_occurred', 'in_atomic_block'):
+            with self.subTest(marcar=marcar):
+                wrapper.connect()
+                setattr(wrapper, marcar, True)
+                wrapper.close()
+                setattr(wrapper, marcar, False)
+                wrapper.connection = None
+                self.assertEqual(pool.estado()['libres'], 0)
+        self.assertEqual(self.metricas('prueba_wrapper_descartes'), {'creadas': 2, 'descartadas': 2})
+
+
+class ApiTrabajadoresTests(TestCase):
+    """`TrabajadorViewSet`: cursor, `?fields=` con columnas a pedido, facetas y solo lectura."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.rrhh = User.objects.create_user('rrhh')
+        cls.rrhh.groups.add(Group.objects.create(name=JEFE_RRHH))
+        cls.ventas, cls.bodega = Area.objects.create(nombre='Ventas'), Area.objects.create(nombre='Bodega')
+        for i in range(7):
+            t = Trabajador.objects.create(
+                user=User.objects.create_user(f't{i}'), nombres=f'Nombre{i}', apellidos=['Rojas', 'Soto'][i % 2],
+                sexo='MF'[i % 2], area=cls.ventas if i < 5 else cls.bodega,
+            )
+            ContactoEmergencia.objects.create(trabajador=t, nombre='Contacto', parentesco='Madre', telefono='+56911111111')
+        cls.url = reverse('trabajador-list')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.rrhh)
+
+    def test_cursor_recorre_en_orden_sin_repetidos(self):
+        esperado = list(Trabajador.objects.order_by(*ORDEN_TRABAJADORES['name_asc']).values_list('pk', flat=True))
+        paginas, url = [], f'{self.url}?page_size=3&fields=id'
+        while url:
+            datos = self.client.get(url).json()
+            paginas.append([t['id'] for t in datos['results']])
+            url = datos['next']
+        self.assertEqual([len(p) for p in paginas], [3, 3, 1])
+        self.assertEqual(sum(paginas, []), esperado)
+        # Desde la última página, `previous` vuelve a la anterior
+        self.assertEqual([t['id'] for t in self.client.get(datos['previous']).json()['results']], paginas[1])
+
+    def test_fields_carga_solo_las_columnas_pedidas(self):
+        # Sesión, usuario y grupos, más una consulta sin JOIN ni prefetch
+        with self.assertNumQueries(4), CaptureQueriesContext(connection) as consultas:
+            datos = self.client.get(self.url, {'fields': 'id,nombres,no_existe'}).json()
+        self.assertEqual(set(datos['results'][0]), {'id', 'nombres'})
+        sql = consultas[-1]['sql']
+        self.assertIn('usuarios_trabajador', sql)
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('direccion', sql)
+
+        # Con todos los campos (roles ya cacheados): sesión, usuario, un JOIN y un prefetch por relación
+        with self.assertNumQueries(5):
+            datos = self.client.get(self.url, {'page_size': 7}).json()
+        self.assertEqual(len(datos['results']), 7)
+        self.assertEqual(datos['results'][0]['area_nombre'], 'Ventas')
+        self.assertEqual(len(datos['results'][0]['contactos_emergencia']), 1)
+
+    def test_facetas_ignoran_su_propio_filtro(self):
+        datos = self.client.get(reverse('trabajador-facetas'), {'area': self.bodega.pk}).json()
+        self.assertEqual({a['nombre']: a['total'] for a in datos['area']}, {'Bodega': 2, 'Ventas': 5})
+        self.assertEqual({s['id']: s['total'] for s in datos['sexo']}, {'M': 1, 'F': 1, 'O': 0})
+
+    def test_solo_lectura_y_solo_rrhh(self):
+        detalle = reverse('trabajador-detail', args=[Trabajador.objects.first().pk])
+        self.assertEqual(self.client.post(self.url, {'nombres': 'X'}).status_code, 405)
+        self.assertEqual(self.client.patch(detalle, {'nombres': 'X'}, content_type='application/json').status_code, 405)
+        self.assertEqual(self.client.delete(detalle).status_code, 405)
+        self.assertEqual(Trabajador.objects.filter(nombres='X').count(), 0)
+
+        self.client.force_login(get_user_model().objects.get(username='t0'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class ExportacionTests(TestCase):
+    """CSV y NDJSON de `exportar_trabajadores`: BOM, encabezado, filtros y lectura por lotes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.rrhh = User.objects.create_user('rrhh')
+        cls.rrhh.groups.add(Group.objects.create(name=JEFE_RRHH))
+        cls.ventas = Area.objects.create(nombre='Ventas')
+        depto = Departamento.objects.create(nombre='Terreno', area=cls.ventas)
+        for i in range(7):
+            Trabajador.objects.create(
+                user=User.objects.create_user(f't{i}', email=f't{i}@correo.cl'),
+                nombres=f'Nombre{i}', apellidos=f'Núñez{i}', sexo='F', rut='12.345.678-5' if i == 0 else None,
+                fecha_ingreso=date(2020, 1, i + 1), area=cls.ventas if i % 2 == 0 else None,
+                departamento=depto if i % 2 == 0 else None, direccion='Av. Uno, 123',
+            )
+        cls.url = reverse('usuarios:exportar_trabajadores')
+
+    def setUp(self):
+        self.client.force_login(self.rrhh)
+
+    def exportar(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_con_bom_encabezado_y_filtros(self):
+        response, contenido = self.exportar(area=self.ventas.pk, order='date_desc')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(contenido.startswith('\ufeff'))
+        filas = list(csv.reader(io.StringIO(contenido[1:])))
+        self.assertEqual(filas[0], [encabezado for encabezado, _ in COLUMNAS_EXPORTACION])
+        self.assertEqual([f[2] for f in filas[1:]], ['Nombre6', 'Nombre4', 'Nombre2', 'Nombre0'])
+        self.assertEqual(
+            filas[-1],
+            [str(Trabajador.objects.get(nombres='Nombre0').pk), '12.345.678-5', 'Nombre0', 'Núñez0', 'F',
+             '2020-01-01', 'Ventas', 'Terreno', '', 't0', 't0@correo.cl', '', 'Av. Uno, 123'],
+        )
+
+    def test_ndjson_una_fila_por_linea(self):
+        response, contenido = self.exportar(formato='ndjson', q='nombre3')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        filas = [json.loads(linea) for linea in contenido.splitlines()]
+        self.assertEqual(len(filas), 1)
+        self.assertEqual(filas[0]['nombres'], 'Nombre3')
+        self.assertEqual((filas[0]['fecha_ingreso'], filas[0]['area'], filas[0]['rut']), ('2020-01-04', None, None))
+        self.assertEqual(list(filas[0]), [encabezado for encabezado, _ in COLUMNAS_EXPORTACION])
+
+    def test_consultas_por_lote(self):
+        ordering = ORDEN_TRABAJADORES['name_asc']
+        # 7 filas en lotes de 3: 3 + 3 + 1, una consulta con JOIN por lote
+        with self.assertNumQueries(3):
+            filas = list(filas_exportacion(Trabajador.objects.all(), ordering, batch_size=3))
+        self.assertEqual([f['nombres'] for f in filas], [f'Nombre{i}' for i in range(7)])
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(filas_exportacion(Trabajador.objects.all(), ordering))), 7)
+
+    def test_sin_rol_no_exporta(self):
+        self.client.force_login(get_user_model().objects.get(username='t0'))
+        self.assertRedirects(self.client.get(self.url), reverse('usuarios:perfil'), fetch_redirect_response=False)
+
+
+class UsuariosSinTrabajadorTests(TestCase):
+    """Autocompletado del alta: prefijo por username o email, mezcla sin repetidos y límite."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        for username, email in [
+            ('Carla', 'carla@correo.cl'),
+            ('carlos', 'ventas@correo.cl'),
+            ('ventas', 'carmen@correo.cl'),  # coincide con "car" solo por email
+            ('beto', 'beto@correo.cl'),
+            ('carolina', 'carolina@correo.cl'),
+        ]:
+            User.objects.create_user(username, email=email)
+        # Con trabajador: no se sugiere
+        Trabajador.objects.create(user=User.objects.get(username='carolina'), nombres='Carolina', apellidos='Paz', sexo='F')
+
+    def nombres(self, q, limite=10):
+        return [u['username'] for u in usuarios_sin_trabajador(q, limite)]
+
+    def test_prefijo_por_username_o_email_sin_repetidos(self):
+        # Una consulta por columna; "carla" coincide por ambas y aparece una vez
+        with self.assertNumQueries(2):
+            self.assertEqual(self.nombres('CAR'), ['Carla', 'carlos', 'ventas'])
+        self.assertEqual(self.nombres('ventas'), ['carlos', 'ventas'])
+        self.assertEqual(self.nombres('carla@'), ['Carla'])
+        self.assertEqual(self.nombres('arla'), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.nombres('  '), [])
+
+    def test_limite_despues_de_mezclar(self):
+        self.assertEqual(self.nombres('car', limite=2), ['Carla', 'carlos'])
+        self.assertEqual(usuarios_sin_trabajador('beto', 1), [
+            {'id': get_user_model().objects.get(username='beto').pk, 'username': 'beto', 'email': 'beto@correo.cl'},
+        ])
+
+    def test_indice_de_email_creado_por_la_migracion(self):
+        with connection.cursor() as cursor:
+            restricciones = connection.introspection.get_constraints(cursor, get_user_model()._meta.db_table)
+        self.assertEqual(restricciones['usuarios_user_email_idx']['columns'], ['email'])
+
+    def test_endpoint_solo_para_rrhh_con_limite_acotado(self):
+        url = reverse('usuarios:api_usuarios_sin_trabajador')
+        self.client.force_login(get_user_model().objects.get(username='beto'))
+        self.assertEqual(self.client.get(url, {'q': 'car'}).status_code, 403)
+
+        rrhh = get_user_model().objects.create_user('rrhh')
+        rrhh.groups.add(Group.objects.create(name=JEFE_RRHH))
+        self.client.force_login(rrhh)
+        for limite, esperados in (('1', 1), ('0', 1), ('x', 3), ('500', 3)):
+            with self.subTest(limite=limite):
+                datos = self.client.get(url, {'q': 'car', 'limite': limite}).json()
+                self.assertEqual(len(datos['usuarios']), esperados)
+
+
+class ListaUsuariosConsultasTests(TestCase):
+    """`lista_usuarios` precarga los grupos de la página: sin N+1 al crecer la página."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user('admin')
+        cls.grupos = [Group.objects.create(name=ADMINISTRADOR), Group.objects.create(name=JEFE_RRHH)]
+        cls.admin.groups.add(cls.grupos[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def crear_usuarios(self, n):
+        User = get_user_model()
+        for i in range(User.objects.count(), User.objects.count() + n):
+            User.objects.create_user(f'usuario{i:02d}').groups.add(*self.grupos)
+
+    def consultas(self):
+        self.client.get(reverse('usuarios:lista_usuarios'))  # roles y contadores en caché
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('usuarios:lista_usuarios'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(consultas)
+
+    def test_consultas_no_crecen_con_la_pagina(self):
+        self.crear_usuarios(1)
+        _, con_dos = self.consultas()
+        self.crear_usuarios(12)
+        response, con_pagina_llena = self.consultas()
+        self.assertEqual(con_pagina_llena, con_dos)
+        usuarios = list(response.context['usuarios'])
+        self.assertEqual(len(usuarios), 10)
+        # Los grupos vienen del prefetch: leerlos no consulta
+        with self.assertNumQueries(0):
+            self.assertEqual({len(u.groups.all()) for u in usuarios[1:]}, {2})
+
+
+class EstadisticasAreasCargosTests(TestCase):
+    """Totales de `lista_areas` y `lista_cargos`: sin multiplicar filas por departamento."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user('admin')
+        cls.admin.groups.add(Group.objects.create(name=ADMINISTRADOR))
+        ventas, bodega = Area.objects.create(nombre='Ventas'), Area.objects.create(nombre='Bodega')
+        Area.objects.create(nombre='Vacía')
+        # Tres departamentos en Ventas: un JOIN con departamentos triplicaría sus trabajadores
+        deptos = [Departamento.objects.create(nombre=f'Ventas {i}', area=ventas) for i in range(3)]
+        Departamento.objects.create(nombre='Bodega 1', area=bodega)
+        vendedor, chofer = Cargo.objects.create(nombre='Vendedor'), Cargo.objects.create(nombre='Chofer')
+        hoy = date.today()
+        for i, (area, depto, cargo, sexo, ingreso) in enumerate([
+            (ventas, deptos[0], vendedor, 'F', hoy),
+            (ventas, deptos[1], vendedor, 'M', date(hoy.year - 3, 1, 1)),
+            (ventas, None, vendedor, 'F', date(hoy.year - 10, 1, 1)),
+            (ventas, deptos[2], chofer, 'O', None),
+            (bodega, None, chofer, 'M', date(hoy.year - 2, 1, 1)),
+        ]):
+            Trabajador.objects.create(
+                user=User.objects.create_user(f't{i}'), nombres=f'T{i}', apellidos='Prueba',
+                area=area, departamento=depto, cargo=cargo, sexo=sexo, fecha_ingreso=ingreso,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def filas(self, ruta, clave):
+        filas = self.client.get(reverse(f'usuarios:{ruta}')).context[clave]
+        return {f['nombre']: f for f in filas}
+
+    def test_totales_por_area(self):
+        filas = self.filas('lista_areas', 'areas')
+        self.assertEqual(
+            {nombre: (f['num_departamentos'], f['num_trabajadores']) for nombre, f in filas.items()},
+            {'Bodega': (1, 1), 'Vacía': (0, 0), 'Ventas': (3, 4)},
+        )
+        self.assertEqual(filas['Ventas']['por_sexo'], {'M': 1, 'F': 2, 'O': 1})
+        # Sin fecha de ingreso no cae en ningún tramo
+        self.assertEqual(filas['Ventas']['antiguedad'], {'menos_1': 1, 'de_1_a_5': 1, 'mas_de_5': 1})
+
+    def test_totales_por_cargo(self):
+        filas = self.filas('lista_cargos', 'cargos')
+        self.assertEqual({nombre: f['num_trabajadores'] for nombre, f in filas.items()}, {'Chofer': 2, 'Vendedor': 3})
+        self.assertEqual(filas['Chofer']['por_sexo'], {'M': 1, 'F': 0, 'O': 1})
+
+    def test_una_consulta_agrupada_por_dimension(self):
+        for dimension in ('area', 'cargo'):
+            with self.subTest(dimension=dimension), CaptureQueriesContext(connection) as consultas:
+                estadisticas.estadisticas(dimension)
+            [consulta] = consultas
+            self.assertIn('GROUP BY', consulta['sql'])
+            self.assertNotIn('JOIN', consulta['sql'])
+
+
+class CacheRolesTests(TestCase):
+    """La caché de roles se invalida con cada cambio de `User.groups` y de los grupos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rrhh = Group.objects.create(name='Jefe RR.HH.')
+        cls.admin = Group.objects.create(name='Administrador')
+        cls.ana = get_user_model().objects.create_user('ana')
+        cls.beto = get_user_model().objects.create_user('beto')
+
+    def setUp(self):
+        cache.clear()
+
+    def roles(self, user):
+        # Instancia nueva, como en cada request: solo la caché compartida evita la consulta
+        return roles_de(get_user_model().objects.get(pk=user.pk))
+
+    def test_roles_cacheados_entre_requests(self):
+        self.ana.groups.add(self.rrhh)
+        self.assertEqual(self.roles(self.ana), {'Jefe RR.HH.'})
+        user = get_user_model().objects.get(pk=self.ana.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(roles_de(user), {'Jefe RR.HH.'})
+
+    def test_cambios_desde_el_usuario(self):
+        self.assertEqual(self.roles(self.ana), set())
+        self.ana.groups.add(self.rrhh)
+        self.assertEqual(self.roles(self.ana), {'Jefe RR.HH.'})
+        self.ana.groups.set([self.admin])
+        self.assertEqual(self.roles(self.ana), {'Administrador'})
+        self.ana.groups.remove(self.admin)
+        self.assertEqual(self.roles(self.ana), set())
+        self.ana.groups.add(self.rrhh, self.admin)
+        self.assertEqual(roles_de(self.ana), {'Jefe RR.HH.', 'Administrador'})
+        self.ana.groups.clear()
+        # También se descarta la copia guardada en la propia instancia
+        self.assertEqual(roles_de(self.ana), set())
+
+    def test_cambios_desde_el_grupo(self):
+        for user in (self.ana, self.beto):
+            self.assertEqual(self.roles(user), set())
+        self.rrhh.user_set.add(self.ana, self.beto)
+        self.assertEqual(self.roles(self.ana), {'Jefe RR.HH.'})
+        self.assertEqual(self.roles(self.beto), {'Jefe RR.HH.'})
+        self.rrhh.user_set.remove(self.beto)
+        self.assertEqual(self.roles(self.beto), set())
+        self.rrhh.user_set.clear()
+        self.assertEqual(self.roles(self.ana), set())
+
+    def test_grupo_renombrado_o_eliminado(self):
+        self.ana.groups.add(self.rrhh)
+        self.assertEqual(self.roles(self.ana), {'Jefe RR.HH.'})
+        self.rrhh.name = 'Personas'
+        self.rrhh.save()
+        self.assertEqual(self.roles(self.ana), {'Personas'})
+        self.rrhh.delete()
+        self.assertEqual(self.roles(self.ana), set())
+
+
+class RegistroSQLTests(TestCase):
+    """Duplicados de `RegistroSQL` y tiempo de plantillas."""
+
+    def test_duplicadas_comparan_valores_de_los_parametros(self):
+        def ejecutar(sql, params, many, context):
+            return None
+
+        registro = RegistroSQL()
+        for params in ({'id': 1}, {'id': 2}, {'id': 1}, [1], (1,), [2], None, [[1, 2]], [[1, 2]]):
+            registro(ejecutar, 'SELECT %s', params, False, {})
+        # Solo {'id': 1} y [1]/(1,) se repiten; None y listas anidadas no se comparan
+        self.assertEqual(registro.duplicadas, 2)
+        self.assertEqual(registro.consultas, 9)
+
+    def test_tope_de_sql_distintos(self):
+        def ejecutar(sql, params, many, context):
+            return None
+
+        registro = RegistroSQL(max_distintas=2)
+        for n in range(5):
+            registro(ejecutar, f'SELECT {n}', [n], False, {})
+        # Las ya vistas se siguen contando; las nuevas se descartan
+        for _ in range(5):
+            registro(ejecutar, 'SELECT 0', [0], False, {})
+        self.assertTrue(registro.truncado)
+        self.assertEqual(len(registro._sql), 2)
+        self.assertEqual(registro.duplicadas, 5)
+        self.assertEqual(registro.formas_repetidas(minimo=5), [('SELECT 0', 6)])
+        self.assertEqual(registro.consultas, 10)
+
+        sin_detalle = RegistroSQL(max_distintas=0)
+        sin_detalle(ejecutar, 'SELECT 1', [1], False, {})
+        self.assertEqual((sin_detalle.consultas, sin_detalle.duplicadas, sin_detalle.truncado), (1, 0, False))
+
+    def test_plantillas_suman_el_render_directo_y_el_diferido(self):
+        request = RequestFactory().get('/')
+        # Cada llamada al reloj avanza un segundo: cada render suma exactamente 1
+        with mock.patch('usuarios.instrumentacion.time.perf_counter', side_effect=itertools.count()):
+            with registrar_sql() as registro:
+                render_medido(request, 'usuarios/login.html')
+                response = medir_template_response(TemplateResponse(request, 'usuarios/login.html'))
+                self.assertEqual(registro.plantillas, 1)
+                response.render()
+        self.assertEqual(registro.plantillas, 2)
+        # Fuera de un registro no se mide
+        self.assertEqual(render_medido(request, 'usuarios/login.html').status_code, 200)
+
+
+class CambiosEnBloqueFormSetTests(TestCase):
+    """`CambiosEnBloqueFormSet` guarda altas, cambios y bajas con consultas en bloque."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.trabajador = Trabajador.objects.create(
+            user=get_user_model().objects.create_user('ana'), nombres='Ana', apellidos='Rojas', sexo='F',
+        )
+        cls.contactos = ContactoEmergencia.objects.bulk_create([
+            ContactoEmergencia(trabajador=cls.trabajador, nombre=nombre, parentesco='Hermano(a)', telefono=f'+5691111111{i}')
+            for i, nombre in enumerate(['Bruno', 'Carla', 'Diego'])
+        ])
+
+    def datos(self, cambios=None, borrar=(), nuevo=None):
+        """POST del formset con los contactos actuales, `cambios` {i: {campo: valor}} y un `nuevo` opcional."""
+        datos = {
+            'contacto-TOTAL_FORMS': len(self.contactos) + 1,
+            'contacto-INITIAL_FORMS': len(self.contactos),
+            'contacto-MIN_NUM_FORMS': 0,
+            'contacto-MAX_NUM_FORMS': 1000,
+        }
+        for i, c in enumerate(self.contactos):
+            fila = {'id': c.pk, 'nombre': c.nombre, 'parentesco': c.parentesco, 'telefono': c.telefono}
+            fila.update((cambios or {}).get(i, {}))
+            if i in borrar:
+                fila['DELETE'] = 'on'
+            datos.update({f'contacto-{i}-{campo}': valor for campo, valor in fila.items()})
+        for campo, valor in (nuevo or {}).items():
+            datos[f'contacto-{len(self.contactos)}-{campo}'] = valor
+        return datos
+
+    def guardar(self, datos):
+        formset = ContactoFormSet(datos, instance=self.trabajador, prefix='contacto')
+        self.assertTrue(formset.is_valid(), formset.errors)
+        return formset.save()
+
+    def test_sin_cambios_solo_lee_las_filas(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.guardar(self.datos()), [])
+
+    def test_alta_cambio_y_baja_en_bloque(self):
+        datos = self.datos(
+            cambios={1: {'telefono': '+56922222222'}},
+            borrar=[2],
+            nuevo={'nombre': 'Elena', 'parentesco': 'Madre', 'telefono': '+56933333333'},
+        )
+        # SELECT de las filas, DELETE ... IN, UPDATE en bloque e INSERT en bloque (más el savepoint)
+        with self.assertNumQueries(6):
+            guardados = self.guardar(datos)
+        self.assertEqual(len(guardados), 2)
+        self.assertEqual(
+            sorted(self.trabajador.contactos_emergencia.values_list('nombre', 'telefono')),
+            [('Bruno', '+56911111110'), ('Carla', '+56922222222'), ('Elena', '+56933333333')],
+        )
+
+    def test_cambios_en_varias_filas_no_agregan_consultas(self):
+        datos = self.datos(cambios={i: {'parentesco': 'Amigo(a)'} for i in range(3)})
+        with self.assertNumQueries(4):
+            self.guardar(datos)
+        self.assertEqual(set(self.trabajador.contactos_emergencia.values_list('parentesco', flat=True)), {'Amigo(a)'})
+
+    def test_id_ajeno_o_invalido_se_rechaza(self):
+        otro = Trabajador.objects.create(
+            user=get_user_model().objects.create_user('beto'), nombres='Beto', apellidos='Soto', sexo='M',
+        )
+        ajeno = ContactoEmergencia.objects.create(trabajador=otro, nombre='Flor', parentesco='Madre', telefono='+56944444444')
+        for valor in (ajeno.pk, 'abc'):
+            with self.subTest(valor=valor):
+                datos = {**self.datos(), 'contacto-0-id': valor}
+                formset = ContactoFormSet(datos, instance=self.trabajador, prefix='contacto')
+                self.assertFalse(formset.is_valid())
+                self.assertIn('id', formset.forms[0].errors)
+        self.assertEqual(ContactoEmergencia.objects.get(pk=ajeno.pk).nombre, 'Flor')
+
+
+class PrimerLoteFallidoMixin:
+    """Cargas por lotes (`importacion`, `aprovisionamiento`) ante un error de base en un lote."""
+
+    def cargar_con_primer_lote_fallido(self, modulo, cargar, filas):
+        """`cargar(filas)` en lotes de 2 con el primer `modulo.insertar_lote` fallando por `DataError`.
+
+        Comprueba que se informan las dos filas del lote fallido y se inserta el siguiente.
+        """
+        insertar = modulo.insertar_lote
+        lotes = []
+
+        def primer_lote_falla(lote, *args, **kwargs):
+            lotes.append(lote)
+            if len(lotes) == 1:
+                raise DataError('Data too long for column')
+            return insertar(lote, *args, **kwargs)
+
+        with mock.patch.object(modulo, 'insertar_lote', side_effect=primer_lote_falla):
+            resultado = cargar(filas, batch_size=2)
+        self.assertEqual(resultado.creadas, 2)
+        self.assertEqual([fila for fila, _, _ in resultado.errores], [2, 3])
+        return resultado
+
+
+def fila_importacion(username, **extra):
+    return {'username': username, 'email': f'{username}@ejemplo.cl', 'nombres': 'Ana', 'apellidos': 'Rojas', **extra}
+
+
+class ImportacionTests(PrimerLoteFallidoMixin, TestCase):
+    """Validación por fila, repetidos y errores de base por lote en `importar_trabajadores`."""
+
+    def setUp(self):
+        cache.clear()
+
+    def validar(self, fila):
+        resultado = ResultadoImportacion()
+        datos = importacion._validar(2, fila, importacion._Catalogo(), resultado)
+        return datos, {campo for _, campo, _ in resultado.errores}
+
+    def test_validar_fila_correcta(self):
+        datos, errores = self.validar(fila_importacion('ana', rut='12.345.678-5', sexo='femenino'))
+        self.assertEqual(errores, set())
+        self.assertEqual(datos['trabajador']['rut_normalizado'], '123456785')
+        self.assertEqual(datos['trabajador']['sexo'], 'F')
+
+    def test_validar_largos_maximos(self):
+        datos, errores = self.validar(fila_importacion(
+            'u' * 151,
+            nombres='n' * 121,
+            rut='0000012.345.678-5',  # RUT válido, pero más largo que la columna
+            telefono='9' * 31,
+            contacto_nombre='Pedro', contacto_parentesco='p' * 81, contacto_telefono='+56911111111',
+        ))
+        self.assertIsNone(datos)
+        self.assertEqual(errores, {'username', 'nombres', 'rut', 'telefono', 'contacto_parentesco'})
+
+    def test_validar_obligatorias_y_formatos(self):
+        datos, errores = self.validar({'username': 'x', 'email': 'no-es-email', 'sexo': 'z', 'rut': '12.345.678-9'})
+        self.assertIsNone(datos)
+        self.assertEqual(errores, {'email', 'nombres', 'apellidos', 'sexo', 'rut'})
+
+    def test_usuarios_repetidos_sin_distinguir_mayusculas(self):
+        get_user_model().objects.create_user('Pepe')
+        resultado = importar_trabajadores([
+            fila_importacion('Ana'), fila_importacion('ana', email='otra@ejemplo.cl'), fila_importacion('pepe'),
+        ])
+        self.assertEqual(resultado.creadas, 1)
+        self.assertEqual([(fila, campo) for fila, campo, _ in resultado.errores], [(3, 'username'), (4, 'username')])
+
+    def test_error_de_base_se_informa_por_fila_y_sigue_con_el_lote_siguiente(self):
+        filas = [fila_importacion(f'u{i}') for i in range(4)]
+        resultado = self.cargar_con_primer_lote_fallido(importacion, importar_trabajadores, filas)
+        self.assertIn('Lote no insertado', resultado.errores[0][2])
+        self.assertEqual(
+            sorted(Trabajador.objects.values_list('user__username', flat=True)), ['u2', 'u3']
+        )
+
+
+CLAVE = 'Correo-Yury-2026'
+
+
+# MD5 solo acelera las pruebas; el hash sigue pasando por `hashear_contrasenas`
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AprovisionamientoTests(PrimerLoteFallidoMixin, TestCase):
+    """Validación, hash de contraseñas e invitaciones de `aprovisionar_usuarios`."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='Recursos Humanos')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_validar_largos_y_repetidos_sin_distinguir_mayusculas(self):
+        get_user_model().objects.create_user('Existente')
+        resultado = aprovisionar_usuarios([
+            {'username': 'u' * 151},
+            {'username': 'largo', 'email': 'e' * 250 + '@x.cl'},
+            {'username': 'Pepe'},
+            {'username': 'pepe'},
+            {'username': 'existente'},
+            {'username': 'ok'},
+        ], dry_run=True)
+        self.assertEqual(resultado.creadas, 2)
+        self.assertEqual(
+            [(fila, campo) for fila, campo, _ in resultado.errores],
+            [(2, 'username'), (3, 'email'), (5, 'username'), (6, 'username')],
+        )
+        self.assertFalse(get_user_model().objects.filter(username='ok').exists())
+
+    def test_contrasenas_hasheadas_grupo_y_trabajador_por_defecto(self):
+        resultado = aprovisionar_usuarios([
+            {'username': 'ana', 'password': CLAVE, 'grupo': 'Recursos Humanos'},
+            {'username': 'beto', 'nombres': 'Alberto', 'apellidos': 'Soto'},
+        ], procesos=1)
+        self.assertEqual((resultado.creadas, resultado.errores), (2, []))
+        ana = get_user_model().objects.get(username='ana')
+        self.assertTrue(ana.check_password(CLAVE))
+        self.assertEqual(list(ana.groups.values_list('name', flat=True)), ['Recursos Humanos'])
+        self.assertEqual((ana.trabajador.nombres, ana.trabajador.apellidos), ('ana', 'Usuario'))
+        beto = get_user_model().objects.get(username='beto')
+        self.assertFalse(beto.has_usable_password())
+        self.assertEqual((beto.trabajador.nombres, beto.trabajador.apellidos), ('Alberto', 'Soto'))
+
+    def test_hash_en_pool_de_procesos_conserva_el_orden(self):
+        filas = [{'username': f'u{i:02d}', 'password': f'{CLAVE}-{i}'} for i in range(6)]
+        with mock.patch.object(aprovisionamiento, 'MINIMO_PARALELO', 2):
+            resultado = aprovisionar_usuarios(filas, procesos=2, batch_size=4)
+        self.assertEqual(resultado.creadas, 6)
+        for i, user in enumerate(get_user_model().objects.order_by('username')):
+            self.assertTrue(user.check_password(f'{CLAVE}-{i}'), user.username)
+
+    def test_error_de_base_se_informa_por_fila_y_sigue_con_el_lote_siguiente(self):
+        filas = [{'username': f'u{i}'} for i in range(4)]
+        self.cargar_con_primer_lote_fallido(aprovisionamiento, aprovisionar_usuarios, filas)
+        self.assertEqual(
+            sorted(get_user_model().objects.values_list('username', flat=True)), ['u2', 'u3']
+        )
+
+    def test_invitacion_define_la_contrasena_una_sola_vez(self):
+        resultado = aprovisionar_usuarios([
+            {'username': 'ana', 'email': 'ana@ejemplo.cl', 'password': 'se-ignora'},
+            {'username': 'beto'},
+        ], invitar=True)
+        self.assertEqual(resultado.creadas, 1)
+        self.assertEqual([(fila, campo) for fila, campo, _ in resultado.errores], [(3, 'email')])
+        [(username, email, ruta)] = resultado.invitaciones
+        self.assertEqual((username, email), ('ana', 'ana@ejemplo.cl'))
+        self.assertFalse(get_user_model().objects.get(username='ana').has_usable_password())
+
+        # Como `PasswordResetConfirmView`: el token pasa a la sesión y se redirige
+        respuesta = self.client.get(ruta)
+        self.assertEqual(respuesta.status_code, 302)
+        formulario = respuesta.url
+        self.assertTrue(self.client.get(formulario).context['validlink'])
+        respuesta = self.client.post(formulario, {'new_password1': CLAVE, 'new_password2': CLAVE})
+        self.assertRedirects(respuesta, reverse('usuarios:login'), fetch_redirect_response=False)
+        self.assertTrue(get_user_model().objects.get(username='ana').check_password(CLAVE))
+
+        # Con la contraseña ya definida el token deja de valer
+        self.client.logout()
+        self.assertFalse(self.client.get(ruta).context['validlink'])
@@ -1,5 +1,5 @@
 """Rutas de la app Usuarios: autenticación, catálogo y gestión."""
-from django.urls import path
+from django.urls import path, reverse_lazy
 from django.contrib.auth import views as auth_views
 from django.views.generic import RedirectView
 from . import views
@@ -16,6 +16,8 @@ urlpatterns = [
     path('perfil/', views.perfil, name='perfil'),
     path('trabajadores/', views.lista_trabajadores, name='lista_trabajadores'),
     path('trabajadores/nuevo/', views.alta_trabajador, name='alta_trabajador'),
+    path('trabajadores/importar/', views.importar_trabajadores, name='importar_trabajadores'),
+    path('trabajadores/exportar/', views.exportar_trabajadores, name='exportar_trabajadores'),
     path('usuarios/nuevo/', views.crear_usuario, name='crear_usuario'),
     path('departamentos/', views.lista_departamentos, name='lista_departamentos'),
     path('cargos/', views.lista_cargos, name='lista_cargos'),
@@ -23,6 +25,14 @@ urlpatterns = [
     path('deshboard/', RedirectView.as_view(pattern_name='usuarios:dashboard', permanent=False)),
     path('api/dashboard/', views.api_dashboard, name='api_dashboard'),
     path('api/trabajadores/', views.api_trabajadores, name='api_trabajadores'),
+    path('api/usuarios/sin-trabajador/', views.api_usuarios_sin_trabajador, name='api_usuarios_sin_trabajador'),
+    path('api/catalogos/areas/', views.api_catalogo_areas, name='api_catalogo_areas'),
+    path('api/catalogos/departamentos/', views.api_catalogo_departamentos, name='api_catalogo_departamentos'),
+    path('api/catalogos/cargos/', views.api_catalogo_cargos, name='api_catalogo_cargos'),
+    # Invitaciones de `aprovisionar_usuarios`: el usuario define su primera contraseña
+    path('invitacion/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(
+        template_name='usuarios/invitacion.html', success_url=reverse_lazy('usuarios:login')
+    ), name='invitacion'),
     path('password-change/', auth_views.PasswordChangeView.as_view(
         template_name='usuarios/password_change_form.html'
     ), name='password_change'),
@@ -1,21 +1,39 @@
-from django.shortcuts import render, redirect
+from asgiref.sync import sync_to_async
+from django.shortcuts import redirect
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth import login as auth_login
 from django.contrib.auth.models import Group
 from django.contrib.auth.forms import UserCreationForm
-from django.http import JsonResponse
-from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+from django.db import transaction
+from django.db.models import Count, Q
 from django.core.paginator import Paginator
 from datetime import date
 from .models import Trabajador, Area, Departamento, Cargo
+from .paginacion import paginar_por_cursor
+from .contadores import atotales_organizacion, totales_organizacion
+from . import catalogos
+from .busqueda import buscar_trabajadores, usuarios_sin_trabajador
+from .rut import filtrar_por_rut
+from .filtros import ORDEN_TRABAJADORES, leer_filtros_trabajadores, filtrar_trabajadores, orden_trabajadores, hay_filtros
+from .facetas import opciones_facetas
+from .estadisticas import filas_areas, filas_cargos, ordenar_filas
+from .exportacion import filas_exportacion, generar_csv, generar_ndjson
+from .importacion import ErrorArchivo, importar_trabajadores as importar_filas, leer_filas
+from .roles import ADMINISTRADOR, JEFE_RRHH, TRABAJADOR, tiene_rol, permisos_usuario
+from .replicas import alias_lectura, lectura_en_replica
+from .instrumentacion import render_medido, seccion
 
 # Modelo de usuario activo
 User = get_user_model()
 from .forms import (
     TrabajadorCreateForm, TrabajadorPersonalForm,
-    ContactoFormSet, CargaFormSet, UsuarioCreateForm, UsuarioSignupForm
+    ContactoFormSet, CargaFormSet, UsuarioCreateForm, UsuarioSignupForm,
+    ImportarTrabajadoresForm
 )
 
 @login_required(login_url='usuarios:login')
@@ -25,143 +43,257 @@ def logout_view(request):
     return redirect('usuarios:login')
 
 @login_required(login_url='usuarios:login')
+@lectura_en_replica
 def lista_usuarios(request):
-    """Lista todos los usuarios del sistema"""
+    """Lista paginada (por cursor) de usuarios con filtros.
+
+    Filtra por prefijo de usuario/email, grupo y estado activo; los grupos
+    se precargan en una sola consulta para toda la página.
+    """
     # Solo Administrador o superusuario puede ver el listado de usuarios
-    if not (request.user.is_superuser or _user_in_group(request.user, 'Administrador')):
+    if not tiene_rol(request.user, ADMINISTRADOR):
         return redirect('usuarios:perfil')
 
-    usuarios = User.objects.all()
-    trabajadores = Trabajador.objects.all()
-    can_create_users = request.user.is_superuser or _user_in_group(request.user, 'Administrador')
-    context = {'usuarios': usuarios, 'trabajadores': trabajadores, 'can_create_users': can_create_users}
-    return render(request, 'usuarios/lista_usuarios.html', context)
+    usuarios_qs = User.objects.prefetch_related('groups')
+
+    username = request.GET.get('username', '').strip()
+    email = request.GET.get('email', '').strip()
+    grupo = request.GET.get('grupo', '').strip()
+    estado = request.GET.get('estado', '').strip()
+
+    # Por prefijo: en MySQL `LIKE 'x%'` usa el índice único de username y el índice
+    # (no único) de email que agrega la migración 0008 (`usuarios_user_email_idx`)
+    if username:
+        usuarios_qs = usuarios_qs.filter(username__istartswith=username)
+    if email:
+        usuarios_qs = usuarios_qs.filter(email__istartswith=email)
+    if grupo:
+        usuarios_qs = usuarios_qs.filter(groups__name=grupo)
+    if estado == 'activo':
+        usuarios_qs = usuarios_qs.filter(is_active=True)
+    elif estado == 'inactivo':
+        usuarios_qs = usuarios_qs.filter(is_active=False)
+
+    page_obj = paginar_por_cursor(usuarios_qs, ['username', 'id'], request.GET.get('cursor'), per_page=10)
+
+    qs_copy = request.GET.copy()
+    qs_copy.pop('cursor', None)
+    base_qs = qs_copy.urlencode()
+
+    context = {
+        'usuarios': page_obj.object_list,
+        'page_obj': page_obj,
+        'base_qs': base_qs,
+        'filters': {'username': username, 'email': email, 'grupo': grupo, 'estado': estado},
+        'groups': Group.objects.order_by('name'),
+        'total_usuarios': totales_organizacion()['total_usuarios'],
+        'can_create_users': tiene_rol(request.user, ADMINISTRADOR),
+    }
+    return render_medido(request, 'usuarios/lista_usuarios.html', context)
 
 @login_required(login_url='usuarios:login')
+@lectura_en_replica
 def lista_trabajadores(request):
     """Listado con filtros, orden y paginación de `Trabajador`.
 
     Restringe acceso a perfiles RR.HH., Administrador o superusuario.
     Soporta búsqueda por nombre, RUT (si existe), área, cargo, depto y sexo.
+    Pagina por cursor (`?cursor=`); los enlaces `?page=N` siguen funcionando
+    con paginación por OFFSET.
     """
     # Solo RR.HH., Administrador o superusuario pueden ver el listado de trabajadores
-    if not (request.user.is_superuser or _user_in_group(request.user, 'Jefe RR.HH.') or _user_in_group(request.user, 'Administrador')):
+    if not tiene_rol(request.user, JEFE_RRHH, ADMINISTRADOR):
         return redirect('usuarios:perfil')
 
     trabajadores_qs = Trabajador.objects.select_related('area', 'departamento', 'cargo', 'user')
 
-    # Parámetros GET
-    q = request.GET.get('q', '').strip()
-    rut = request.GET.get('rut', '').strip()
-    area_id = request.GET.get('area', '').strip()
-    cargo_id = request.GET.get('cargo', '').strip()
-    depto_id = request.GET.get('depto', '').strip()
-    order = request.GET.get('order', 'name_asc')
-    page = request.GET.get('page', '1')
-    sexo = request.GET.get('sexo', '').strip()
+    # Parámetros GET, filtros y orden (compartidos con la API y exportaciones)
+    filtros = leer_filtros_trabajadores(request.GET)
+    trabajadores_qs = filtrar_trabajadores(trabajadores_qs, filtros)
+    ordering = orden_trabajadores(filtros)
+    has_filters = hay_filtros(filtros)
 
     # Detectar si el modelo tiene campo 'rut'
     has_rut = any(f.name == 'rut' for f in Trabajador._meta.get_fields())
 
-    # Filtros
-    if q:
-        trabajadores_qs = trabajadores_qs.filter(
-            Q(nombres__icontains=q) | Q(apellidos__icontains=q)
-        )
-    if has_rut and rut:
-        trabajadores_qs = trabajadores_qs.filter(rut__icontains=rut)
-    if area_id:
-        trabajadores_qs = trabajadores_qs.filter(area_id=area_id)
-    if cargo_id:
-        trabajadores_qs = trabajadores_qs.filter(cargo_id=cargo_id)
-    if depto_id:
-        trabajadores_qs = trabajadores_qs.filter(departamento_id=depto_id)
-    if sexo:
-        trabajadores_qs = trabajadores_qs.filter(sexo=sexo)
-
-    # Orden
-    order_map = {
-        'name_asc': ['apellidos', 'nombres'],
-        'name_desc': ['-apellidos', '-nombres'],
-        'date_asc': ['fecha_ingreso', 'apellidos', 'nombres'],
-        'date_desc': ['-fecha_ingreso', 'apellidos', 'nombres'],
-    }
-    trabajadores_qs = trabajadores_qs.order_by(*order_map.get(order, ['apellidos', 'nombres']))
-
-    # Conteos y paginación
-    filtered_count = trabajadores_qs.count()
-    # Paginación robusta: sanitiza el parámetro y usa get_page
-    page_str = request.GET.get("page", "1")
-    try:
-        page_num = int(page_str)
-    except (TypeError, ValueError):
-        page_num = 1
-    if page_num < 1:
-        page_num = 1
-
-    paginator = Paginator(trabajadores_qs, 10)
-    page_obj = paginator.get_page(page_num)
-
-    # Query base para paginación (sin 'page')
+    # Query base para paginación (sin 'page' ni 'cursor')
     qs_copy = request.GET.copy()
     qs_copy.pop('page', None)
+    qs_copy.pop('cursor', None)
     base_qs = qs_copy.urlencode()
 
+    totales = totales_organizacion()
+    if 'page' in request.GET and 'cursor' not in request.GET:
+        # Enlaces antiguos `?page=N`: paginación por OFFSET con un único COUNT
+        page_str = request.GET.get("page", "1")
+        try:
+            page_num = int(page_str)
+        except (TypeError, ValueError):
+            page_num = 1
+        if page_num < 1:
+            page_num = 1
+
+        paginator = Paginator(trabajadores_qs, 10)
+        page_obj = paginator.get_page(page_num)
+        filtered_count = paginator.count
+    else:
+        # Paginación por cursor: sin OFFSET; el conteo exacto es opcional (?count=1)
+        page_obj = paginar_por_cursor(trabajadores_qs, ordering, request.GET.get('cursor'), per_page=10)
+        if request.GET.get('count') == '1':
+            filtered_count = trabajadores_qs.count()
+        elif not has_filters:
+            filtered_count = totales['total_trabajadores']
+        else:
+            filtered_count = None
+
     context = {
         'trabajadores': page_obj.object_list,
         'page_obj': page_obj,
         'filtered_count': filtered_count,
-        'areas': Area.objects.all(),
-        'cargos': Cargo.objects.all(),
-        'departamentos': Departamento.objects.all(),
-        'filters': {'q': q, 'rut': rut, 'area': area_id, 'cargo': cargo_id, 'depto': depto_id, 'order': order, 'sexo': sexo},
+        # Opciones de área, departamento, cargo y sexo con su conteo bajo los demás filtros
+        'facetas': opciones_facetas(filtros),
+        'filters': filtros,
         'has_rut': has_rut,
         'base_qs': base_qs,
-        'total_trabajadores': Trabajador.objects.count(),
-        'total_areas': Area.objects.count(),
-        'total_departamentos': Departamento.objects.count(),
-        'total_cargos': Cargo.objects.count(),
+        **totales,
     }
-    return render(request, 'usuarios/lista_trabajadores.html', context)
+    return render_medido(request, 'usuarios/lista_trabajadores.html', context)
 
 @login_required(login_url='usuarios:login')
+@lectura_en_replica
+def exportar_trabajadores(request):
+    """Exporta en streaming (CSV o NDJSON) el listado filtrado de `Trabajador`.
+
+    Acepta los mismos parámetros que `lista_trabajadores` más
+    `formato=csv|ndjson`.
+    """
+    if not tiene_rol(request.user, JEFE_RRHH, ADMINISTRADOR):
+        return redirect('usuarios:perfil')
+
+    filtros = leer_filtros_trabajadores(request.GET)
+    # Las filas se leen al enviar la respuesta, ya fuera de la vista: se fija la base ahora
+    trabajadores_qs = Trabajador.objects.using(alias_lectura(Trabajador))
+    trabajadores_qs = filtrar_trabajadores(trabajadores_qs, filtros)
+    filas = filas_exportacion(trabajadores_qs, orden_trabajadores(filtros))
+
+    nombre = f"trabajadores_{date.today():%Y%m%d}"
+    if request.GET.get('formato') == 'ndjson':
+        response = StreamingHttpResponse(generar_ndjson(filas), content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nombre}.ndjson"'
+    else:
+        response = StreamingHttpResponse(generar_csv(filas), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+    return response
+
+@login_required(login_url='usuarios:login')
+@lectura_en_replica
 def dashboard(request):
     """Panel principal del sistema"""
     context = {
-        'total_usuarios': User.objects.count(),
-        'total_trabajadores': Trabajador.objects.count(),
-        'total_departamentos': Departamento.objects.count(),
-        'total_cargos': Cargo.objects.count(),
-        'total_areas': Area.objects.count(),
+        **totales_organizacion(),
         # Banderas para mostrar/ocultar acciones y menús
-        'can_view_users': request.user.is_superuser or _user_in_group(request.user, 'Administrador'),
-        'can_view_trabajadores': request.user.is_superuser or _user_in_group(request.user, 'Jefe RR.HH.') or _user_in_group(request.user, 'Administrador'),
-        'can_create_trabajador': request.user.is_superuser or _user_in_group(request.user, 'Jefe RR.HH.'),
-        'can_create_usuario': request.user.is_superuser or _user_in_group(request.user, 'Administrador'),
-        'can_manage_catalog': request.user.is_superuser or _user_in_group(request.user, 'Administrador'),
+        **permisos_usuario(request.user),
     }
-    return render(request, 'usuarios/Dashboard.html', context)
+    return render_medido(request, 'usuarios/Dashboard.html', context)
 
 @login_required(login_url='usuarios:login')
-def api_dashboard(request):
-    """API de métricas del dashboard (JSON)."""
-    data = {
-        'total_usuarios': User.objects.count(),
-        'total_trabajadores': Trabajador.objects.count(),
-        'total_departamentos': Departamento.objects.count(),
-        'total_cargos': Cargo.objects.count(),
-        'total_areas': Area.objects.count(),
-    }
-    return JsonResponse(data)
+@lectura_en_replica
+async def api_dashboard(request):
+    """API de métricas del dashboard (JSON). Async: no ocupa un hilo mientras espera la base."""
+    return JsonResponse(await atotales_organizacion())
+
+# Tamaño de página de `api_trabajadores` (`?page_size=`, hasta el máximo)
+API_TRABAJADORES_POR_PAGINA = 50
+API_TRABAJADORES_MAX_PAGINA = 500
+
+@login_required(login_url='usuarios:login')
+@lectura_en_replica
+async def api_trabajadores(request):
+    """API simple de trabajadores para pruebas de integración (async).
+
+    Con `?q=` usa el índice de búsqueda y ordena por relevancia; `?rut=`
+    busca exacto o por prefijo sobre el RUT normalizado. Pagina por cursor
+    (`?cursor=`, `?page_size=`): la respuesta trae `next_cursor` y
+    `prev_cursor` en lugar de la tabla completa.
+    """
+    q = request.GET.get('q', '').strip()
+    rut = request.GET.get('rut', '').strip()
+    try:
+        por_pagina = int(request.GET.get('page_size', API_TRABAJADORES_POR_PAGINA))
+    except ValueError:
+        por_pagina = API_TRABAJADORES_POR_PAGINA
+    por_pagina = max(1, min(por_pagina, API_TRABAJADORES_MAX_PAGINA))
+    qs = Trabajador.objects.all()
+    ordering = ORDEN_TRABAJADORES['name_asc']
+    if rut:
+        qs = filtrar_por_rut(qs, rut)
+    if q:
+        qs = buscar_trabajadores(qs, q)
+        ordering = ORDEN_TRABAJADORES['relevance']
+    # `paginar_por_cursor` es sync: una consulta en el hilo del ORM, como `acount`
+    pagina = await sync_to_async(paginar_por_cursor)(qs, ordering, request.GET.get('cursor'), per_page=por_pagina)
+    trabajadores = [
+        {'id': t.id, 'nombre': str(t), **({'relevancia': t.relevancia} if q else {})} for t in pagina
+    ]
+    return JsonResponse({
+        'trabajadores': trabajadores,
+        'next_cursor': pagina.next_cursor,
+        'prev_cursor': pagina.prev_cursor,
+    })
+
+# Máximo de sugerencias del autocompletado de usuarios
+AUTOCOMPLETAR_MAX = 20
 
 @login_required(login_url='usuarios:login')
-def api_trabajadores(request):
-    """API simple de trabajadores para pruebas de integración."""
-    trabajadores = [{'id': t.id, 'nombre': str(t)} for t in Trabajador.objects.all()]
-    return JsonResponse({'trabajadores': trabajadores})
+def api_usuarios_sin_trabajador(request):
+    """Autocompletado del alta: usuarios sin trabajador por prefijo de username/email (`?q=`, `?limite=`)."""
+    if not tiene_rol(request.user, JEFE_RRHH):
+        return JsonResponse({'detail': 'Sin permiso.'}, status=403)
+    try:
+        limite = min(max(int(request.GET.get('limite', 10)), 1), AUTOCOMPLETAR_MAX)
+    except ValueError:
+        limite = 10
+    return JsonResponse({'usuarios': usuarios_sin_trabajador(request.GET.get('q', ''), limite)})
+
+def _etag_catalogo(request, *args, **kwargs):
+    """ETag de los endpoints de catálogo: huella de los datos cargados, ruta y filtro de área.
+
+    La versión de catálogos puede ser local al proceso (`LocMemCache`); la
+    huella no, y coincide con lo que este proceso respondería. Con los
+    catálogos ya en memoria un 304 no cuesta consultas.
+    """
+    return f'"{catalogos.huella_catalogos()}-{request.resolver_match.url_name}-{request.GET.get("area", "")}"'
+
+def endpoint_catalogo(view):
+    """GET/HEAD públicos (los usa el registro) con ETag y revalidación en cada uso."""
+    return require_safe(cache_control(max_age=0, must_revalidate=True)(condition(etag_func=_etag_catalogo)(view)))
+
+@endpoint_catalogo
+def api_catalogo_areas(request):
+    """Áreas ordenadas por nombre, desde la caché de catálogos."""
+    return JsonResponse({'areas': [{'id': a.pk, 'nombre': a.nombre} for a in catalogos.areas()]})
+
+@endpoint_catalogo
+def api_catalogo_departamentos(request):
+    """Departamentos de un área (`?area=<id>`), o todos si no se indica."""
+    area = request.GET.get('area', '').strip()
+    if not area:
+        departamentos = catalogos.departamentos()
+    elif area.isdigit():
+        departamentos = catalogos.departamentos_de_area(int(area))
+    else:
+        return JsonResponse({'detail': 'Área inválida.'}, status=400)
+    return JsonResponse({'departamentos': [
+        {'id': d.pk, 'nombre': d.nombre, 'area_id': d.area_id} for d in departamentos
+    ]})
+
+@endpoint_catalogo
+def api_catalogo_cargos(request):
+    """Cargos ordenados por nombre, desde la caché de catálogos."""
+    return JsonResponse({'cargos': [{'id': c.pk, 'nombre': c.nombre} for c in catalogos.cargos()]})
 
 # función: root_redirect
-from django.shortcuts import render, redirect
+from django.shortcuts import redirect
 
 def root_redirect(request):
     """Redirige la raíz a `dashboard` si autenticado, si no a `login`."""
@@ -170,9 +302,10 @@ def root_redirect(request):
     return redirect('usuarios:login')
 
 @login_required(login_url='usuarios:login')
+@lectura_en_replica
 def lista_departamentos(request):
     """Listado de `Departamento` con filtros por nombre/área y orden."""
-    dept_qs = Departamento.objects.select_related('area')
+    dept_qs = Departamento.objects.con_area()
 
     q = request.GET.get('q', '').strip()
     area_id = request.GET.get('area', '').strip()
@@ -201,31 +334,39 @@ def lista_departamentos(request):
 
     paginator = Paginator(dept_qs, 10)
     page_obj = paginator.get_page(page_num)
+    departamentos = list(page_obj.object_list)
+    # Trabajadores por departamento de la página en una sola consulta agrupada
+    conteos = dict(
+        Trabajador.objects.filter(departamento__in=departamentos)
+        .values_list('departamento_id').annotate(n=Count('id')).order_by()
+    )
+    for d in departamentos:
+        d.num_trabajadores = conteos.get(d.id, 0)
 
     qs_copy = request.GET.copy()
     qs_copy.pop('page', None)
     base_qs = qs_copy.urlencode()
 
     context = {
-        'departamentos': page_obj.object_list,
-        'areas': Area.objects.all(),
+        'departamentos': departamentos,
+        'areas': catalogos.areas(),
         'page_obj': page_obj,
         'base_qs': base_qs,
         'filters': {'q': q, 'area': area_id, 'order': order},
-        'total_departamentos': Departamento.objects.count(),
-        'total_areas': Area.objects.count(),
+        **totales_organizacion(),
     }
-    return render(request, 'usuarios/lista_departamentos.html', context)
+    return render_medido(request, 'usuarios/lista_departamentos.html', context)
 
 @login_required(login_url='usuarios:login')
+@lectura_en_replica
 def lista_cargos(request):
-    """Gestión y listado de `Cargo` con filtros y edición inline."""
-    from django.db.models import Count
-
-    cargos_qs = Cargo.objects.all()
+    """Gestión y listado de `Cargo` con filtros y edición inline.
 
+    Los conteos por cargo salen de `usuarios.estadisticas` (cacheados) y el
+    orden y la paginación se hacen sobre el catálogo en memoria.
+    """
     # Permiso para crear catálogo (cargos)
-    can_manage_catalog = request.user.is_superuser or _user_in_group(request.user, 'Administrador')
+    can_manage_catalog = tiene_rol(request.user, ADMINISTRADOR)
 
     form_message = None
     form_status = None
@@ -278,20 +419,11 @@ def lista_cargos(request):
     q = request.GET.get('q', '').strip()
     order = request.GET.get('order', 'name_asc')
 
+    filas = filas_cargos()
     if q:
-        cargos_qs = cargos_qs.filter(nombre__icontains=q)
-
-    order_map = {
-        'name_asc': ['nombre'],
-        'name_desc': ['-nombre'],
-        'count_asc': ['num_trabajadores', 'nombre'],
-        'count_desc': ['-num_trabajadores', 'nombre'],
-    }
-
-    # Annotate cantidad de trabajadores por cargo
-    cargos_qs = cargos_qs.annotate(num_trabajadores=Count('trabajador'))
-
-    cargos_qs = cargos_qs.order_by(*order_map.get(order, ['nombre']))
+        coinciden = set(Cargo.objects.filter(nombre__icontains=q).values_list('pk', flat=True))
+        filas = [f for f in filas if f['id'] in coinciden]
+    filas = ordenar_filas(filas, order, {'count': 'num_trabajadores'})
 
     # Paginación robusta
     page_str = request.GET.get('page', '1')
@@ -302,7 +434,7 @@ def lista_cargos(request):
     if page_num < 1:
         page_num = 1
 
-    paginator = Paginator(cargos_qs, 10)
+    paginator = Paginator(filas, 10)
     page_obj = paginator.get_page(page_num)
 
     # Query base para paginación
@@ -317,19 +449,21 @@ def lista_cargos(request):
         'filters': {'q': q, 'order': order},
         'form_message': form_message,
         'form_status': form_status,
-        'total_cargos': Cargo.objects.count(),
-        'total_trabajadores': Trabajador.objects.count(),
+        **totales_organizacion(),
         'can_manage_catalog': can_manage_catalog,
     }
-    return render(request, 'usuarios/lista_cargos.html', context)
+    return render_medido(request, 'usuarios/lista_cargos.html', context)
 
 @login_required(login_url='usuarios:login')
+@lectura_en_replica
 def lista_areas(request):
-    """Gestión y listado de `Area` con métricas (deptos y trabajadores)."""
-    from django.db.models import Count
+    """Gestión y listado de `Area` con métricas (deptos y trabajadores).
 
+    Las métricas salen de `usuarios.estadisticas` (cacheadas) y el orden y la
+    paginación se hacen sobre el catálogo en memoria.
+    """
     # Permiso para crear catálogo (áreas)
-    can_manage_catalog = request.user.is_superuser or _user_in_group(request.user, 'Administrador')
+    can_manage_catalog = tiene_rol(request.user, ADMINISTRADOR)
 
     form_message = None
     form_status = None
@@ -378,27 +512,15 @@ def lista_areas(request):
                 except Area.DoesNotExist:
                     form_message = 'Área no encontrada.'
                     form_status = 'error'
-    areas_qs = Area.objects.all().annotate(
-        num_departamentos=Count('departamentos'),
-        num_trabajadores=Count('trabajador')
-    )
-
     # Filtros y orden
     q = request.GET.get('q', '').strip()
     order = request.GET.get('order', 'name_asc')
 
+    filas = filas_areas()
     if q:
-        areas_qs = areas_qs.filter(nombre__icontains=q)
-
-    order_map = {
-        'name_asc': ['nombre'],
-        'name_desc': ['-nombre'],
-        'dept_asc': ['num_departamentos', 'nombre'],
-        'dept_desc': ['-num_departamentos', 'nombre'],
-        'emp_asc': ['num_trabajadores', 'nombre'],
-        'emp_desc': ['-num_trabajadores', 'nombre'],
-    }
-    areas_qs = areas_qs.order_by(*order_map.get(order, ['nombre']))
+        coinciden = set(Area.objects.filter(nombre__icontains=q).values_list('pk', flat=True))
+        filas = [f for f in filas if f['id'] in coinciden]
+    filas = ordenar_filas(filas, order, {'dept': 'num_departamentos', 'emp': 'num_trabajadores'})
 
     # Paginación robusta
     page_str = request.GET.get('page', '1')
@@ -409,7 +531,7 @@ def lista_areas(request):
     if page_num < 1:
         page_num = 1
 
-    paginator = Paginator(areas_qs, 10)
+    paginator = Paginator(filas, 10)
     page_obj = paginator.get_page(page_num)
 
     # Query base para paginación
@@ -424,10 +546,10 @@ def lista_areas(request):
         'filters': {'q': q, 'order': order},
         'form_message': form_message,
         'form_status': form_status,
-        'total_areas': Area.objects.count(),
+        **totales_organizacion(),
         'can_manage_catalog': can_manage_catalog,
     }
-    return render(request, 'usuarios/lista_areas.html', context)
+    return render_medido(request, 'usuarios/lista_areas.html', context)
 
 
 @login_required(login_url='usuarios:login')
@@ -444,35 +566,37 @@ def perfil(request):
         contacto_fs = ContactoFormSet(request.POST, instance=trabajador, prefix='contacto')
         carga_fs = CargaFormSet(request.POST, instance=trabajador, prefix='carga')
         if form.is_valid() and contacto_fs.is_valid() and carga_fs.is_valid():
-            form.save()
-            contacto_fs.save()
-            carga_fs.save()
-            return render(request, 'usuarios/perfil.html', {
+            # Solo lo que cambió, en bloque y todo o nada
+            with seccion('perfil-guardar'), transaction.atomic():
+                if form.has_changed():
+                    form.save()
+                contacto_fs.save()
+                carga_fs.save()
+            # Formsets recargados: las filas nuevas ya tienen id
+            contacto_fs = ContactoFormSet(instance=trabajador, prefix='contacto')
+            carga_fs = CargaFormSet(instance=trabajador, prefix='carga')
+            return render_medido(request, 'usuarios/perfil.html', {
                 'form': form, 'contacto_fs': contacto_fs, 'carga_fs': carga_fs,
                 'message': 'Datos actualizados correctamente.', 'message_type': 'success',
-                'can_view_trabajadores': (request.user.is_superuser or _user_in_group(request.user, 'Jefe RR.HH.') or _user_in_group(request.user, 'Administrador')),
-                'can_view_users': (request.user.is_superuser or _user_in_group(request.user, 'Administrador')),
+                'can_view_trabajadores': tiene_rol(request.user, JEFE_RRHH, ADMINISTRADOR),
+                'can_view_users': tiene_rol(request.user, ADMINISTRADOR),
             })
     else:
         form = TrabajadorPersonalForm(instance=trabajador)
         contacto_fs = ContactoFormSet(instance=trabajador, prefix='contacto')
         carga_fs = CargaFormSet(instance=trabajador, prefix='carga')
 
-    return render(request, 'usuarios/perfil.html', {
+    return render_medido(request, 'usuarios/perfil.html', {
         'form': form, 'contacto_fs': contacto_fs, 'carga_fs': carga_fs,
-        'can_view_trabajadores': (request.user.is_superuser or _user_in_group(request.user, 'Jefe RR.HH.') or _user_in_group(request.user, 'Administrador')),
-        'can_view_users': (request.user.is_superuser or _user_in_group(request.user, 'Administrador')),
+        'can_view_trabajadores': tiene_rol(request.user, JEFE_RRHH, ADMINISTRADOR),
+        'can_view_users': tiene_rol(request.user, ADMINISTRADOR),
     })
 
-
-def _user_in_group(user, name):
-    return user.groups.filter(name=name).exists()
-
 @login_required(login_url='usuarios:login')
 def alta_trabajador(request):
     """Alta de un nuevo `Trabajador` con formsets de contactos y cargas."""
     # Permiso: superusuario o Jefe RR.HH.
-    if not (request.user.is_superuser or _user_in_group(request.user, 'Jefe RR.HH.')):
+    if not tiene_rol(request.user, JEFE_RRHH):
         return redirect('usuarios:dashboard')
 
     if request.method == 'POST':
@@ -486,7 +610,7 @@ def alta_trabajador(request):
             if contacto_fs.is_valid() and carga_fs.is_valid():
                 contacto_fs.save()
                 carga_fs.save()
-                return render(request, 'usuarios/alta_trabajador.html', {
+                return render_medido(request, 'usuarios/alta_trabajador.html', {
                     'form': TrabajadorCreateForm(),  # limpio para nuevo registro
                     'contacto_fs': ContactoFormSet(prefix='contacto', instance=Trabajador()),
                     'carga_fs': CargaFormSet(prefix='carga', instance=Trabajador()),
@@ -496,7 +620,7 @@ def alta_trabajador(request):
         # Si principal inválido, reconstruir formsets para mostrar errores
         contacto_fs = ContactoFormSet(request.POST, prefix='contacto', instance=Trabajador())
         carga_fs = CargaFormSet(request.POST, prefix='carga', instance=Trabajador())
-        return render(request, 'usuarios/alta_trabajador.html', {
+        return render_medido(request, 'usuarios/alta_trabajador.html', {
             'form': form, 'contacto_fs': contacto_fs, 'carga_fs': carga_fs
         })
 
@@ -505,15 +629,49 @@ def alta_trabajador(request):
     # Para render, usamos una instancia vacía (no se guarda hasta POST)
     contacto_fs = ContactoFormSet(prefix='contacto', instance=Trabajador())
     carga_fs = CargaFormSet(prefix='carga', instance=Trabajador())
-    return render(request, 'usuarios/alta_trabajador.html', {
+    return render_medido(request, 'usuarios/alta_trabajador.html', {
         'form': form, 'contacto_fs': contacto_fs, 'carga_fs': carga_fs
     })
 
+@login_required(login_url='usuarios:login')
+def importar_trabajadores(request):
+    """Importación masiva de trabajadores desde CSV/XLSX con reporte de errores por fila."""
+    # Permiso: superusuario o Jefe RR.HH. (igual que alta_trabajador)
+    if not tiene_rol(request.user, JEFE_RRHH):
+        return redirect('usuarios:dashboard')
+
+    resultado = None
+    message = None
+    message_type = 'info'
+    if request.method == 'POST':
+        form = ImportarTrabajadoresForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            dry_run = form.cleaned_data['dry_run']
+            try:
+                resultado = importar_filas(leer_filas(archivo.file, archivo.name), dry_run=dry_run)
+            except ErrorArchivo as exc:
+                message, message_type = str(exc), 'danger'
+            else:
+                accion = 'válidas' if dry_run else 'creadas'
+                message = f"Filas leídas: {resultado.leidas}; {accion}: {resultado.creadas}; con errores: {resultado.filas_con_error}."
+                message_type = 'warning' if resultado.errores else 'success'
+    else:
+        form = ImportarTrabajadoresForm()
+
+    return render_medido(request, 'usuarios/importar_trabajadores.html', {
+        'form': form,
+        'resultado': resultado,
+        'errores': resultado.errores[:500] if resultado else [],
+        'message': message,
+        'message_type': message_type,
+    })
+
 @login_required(login_url='usuarios:login')
 def crear_usuario(request):
     """Crea `User` y asigna opcionalmente un `Group` existente."""
     # Permiso: superusuario, Administrador o Jefe RR.HH.
-    if not (request.user.is_superuser or _user_in_group(request.user, 'Administrador') or _user_in_group(request.user, 'Jefe RR.HH.')):
+    if not tiene_rol(request.user, ADMINISTRADOR, JEFE_RRHH):
         return redirect('usuarios:dashboard')
 
     message = None
@@ -544,7 +702,7 @@ def crear_usuario(request):
     else:
         form = UsuarioCreateForm()
 
-    return render(request, 'usuarios/crear_usuario.html', {
+    return render_medido(request, 'usuarios/crear_usuario.html', {
         'form': form, 'message': message, 'message_type': message_type,
         'groups': Group.objects.all().order_by('name')
     })
@@ -559,7 +717,7 @@ def signup(request):
             user = form.save()
             # Asignar grupo Trabajador y crear registro Trabajador por defecto
             try:
-                grp, _ = Group.objects.get_or_create(name='Trabajador')
+                grp, _ = Group.objects.get_or_create(name=TRABAJADOR)
                 user.groups.add(grp)
             except Exception:
                 pass
@@ -579,6 +737,6 @@ def signup(request):
             return redirect('usuarios:dashboard')
     else:
         form = UsuarioSignupForm()
-    return render(request, 'usuarios/signup.html', {
+    return render_medido(request, 'usuarios/signup.html', {
         'form': form, 'message': message, 'message_type': message_type
     })